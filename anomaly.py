@@ -0,0 +1,222 @@
+import argparse
+import datetime
+import math
+import os
+
+from load_json import read_json_file
+from schema import DATA_VERSION_FILE, EPOCH, detect_date_format, get_date_sequences, get_timestamp_seconds, \
+    read_date_format
+from storage import get_data_dir, save_data
+
+# Flags sudden spikes in battery drain, which usually point at a driver or firmware problem. Every metric keeps
+# rolling statistics that are updated in O(1) per value:
+#   EWMA mean and variance                 -> z score
+#   running median (stochastic             -> robust z score, which one spike cannot drag along like the mean
+#   approximation) and EWMA mean absolute
+#   deviation from it
+# A value is an anomaly when its robust z score against the statistics *before* it is above Z_THRESHOLD. The
+# statistics of each machine are kept in its data directory, so every import only feeds the rows it has not seen.
+#
+# Metrics:
+#   active drain (mWh/h), standby drain (mWh/h)   battery usage rows, energy drained over the duration
+#   standby drain estimate (%)                     life estimate rows, connected standby drain at full charge
+#   live drain (%/h)                               consecutive live samples on battery
+ANOMALY_STATE_FILE = 'anomaly-state.json'
+ANOMALY_EVENTS_FILE = 'anomalies.json'
+
+EWMA_ALPHA = 0.05
+Z_THRESHOLD = 3.5
+# Values seen before a metric can raise anomalies
+WARMUP_COUNT = 20
+# The robust spread is never taken below this fraction of the median, so a metric that was constant for a while
+# does not flag every small change
+MIN_SPREAD = 0.05
+# Battery usage rows shorter than this are too short for a meaningful rate
+MIN_DURATION = 300
+# Most recent events kept in ANOMALY_EVENTS_FILE
+MAX_EVENTS = 1000
+# Standard deviation / mean absolute deviation of a normal distribution, so the robust spread estimates the standard
+# deviation like the z score does
+MEAN_DEVIATION_SCALE = math.sqrt(math.pi / 2)
+
+STATE_METRICS = {
+    'active': 'active drain (mWh/h)',
+    'connected standby': 'standby drain (mWh/h)',
+}
+
+
+class RollingStats:
+    FIELDS = ['count', 'mean', 'variance', 'median', 'mean_deviation', 'last_time']
+
+    def __init__(self, count=0, mean=0.0, variance=0.0, median=0.0, mean_deviation=0.0, last_time=None):
+        self.count = count
+        self.mean = mean
+        self.variance = variance
+        self.median = median
+        self.mean_deviation = mean_deviation
+        self.last_time = last_time
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def get_scores(self, value):
+        # (z, robust z) of value against the current statistics
+        z = (value - self.mean) / math.sqrt(self.variance) if self.variance > 0 else 0.0
+        spread = max(MEAN_DEVIATION_SCALE * self.mean_deviation, MIN_SPREAD * abs(self.median), 1e-9)
+        return z, (value - self.median) / spread
+
+    def update(self, value, alpha=EWMA_ALPHA):
+        if self.count == 0:
+            self.mean = self.median = value
+        else:
+            # Exponentially weighted mean and variance
+            difference = value - self.mean
+            increment = alpha * difference
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + difference * increment)
+
+            # Median by stochastic approximation: fixed-size steps towards the value, scaled by the spread; the mean
+            # absolute deviation from it is an EWMA
+            deviation = abs(value - self.median)
+            step = alpha * (self.mean_deviation if self.mean_deviation > 0 else deviation)
+            self.median += step if value > self.median else -step if value < self.median else 0
+            self.mean_deviation += alpha * (deviation - self.mean_deviation)
+        self.count += 1
+
+
+def load_rolling_stats(values):
+    # State files written before the mean absolute deviation was renamed store it as 'mad'
+    values = dict(values)
+    if 'mad' in values:
+        values.setdefault('mean_deviation', values.pop('mad'))
+    return RollingStats(**values)
+
+
+class AnomalyDetector:
+    def __init__(self, state=None, alpha=EWMA_ALPHA, threshold=Z_THRESHOLD, warmup=WARMUP_COUNT):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        # Metric -> RollingStats
+        self.stats = {metric: load_rolling_stats(values) for metric, values in (state or {}).items()}
+        # Last live sample on battery: (time, percent)
+        self.live_sample = None
+
+    def get_state(self):
+        return {metric: stats.to_dict() for metric, stats in self.stats.items()}
+
+    def update(self, metric, time, value):
+        # Feed one value of `metric` at `time` (seconds since the epoch); returns an event for an anomaly, else None.
+        # Values not newer than the last one fed are ignored, so overlapping imports are only counted once.
+        stats = self.stats.get(metric)
+        if stats is None:
+            stats = self.stats[metric] = RollingStats()
+        if value is None or math.isnan(value) or (stats.last_time is not None and time <= stats.last_time):
+            return None
+
+        event = None
+        if stats.count >= self.warmup:
+            z, robust_z = stats.get_scores(value)
+            if robust_z >= self.threshold:
+                event = {
+                    'TIME': time,
+                    'METRIC': metric,
+                    'VALUE': round(value, 2),
+                    'BASELINE': round(stats.median, 2),
+                    'Z SCORE': round(z, 2),
+                    'ROBUST Z SCORE': round(robust_z, 2),
+                }
+        stats.update(value, self.alpha)
+        stats.last_time = time
+        return event
+
+    def feed_battery_usage(self, rows):
+        # Typed battery usage rows (see schema.py), in report order
+        events = []
+        for row in sorted(rows, key=lambda row: get_timestamp_seconds(row['START TIME']) or 0):
+            metric = STATE_METRICS.get((row['STATE'] or '').strip().lower())
+            time = get_timestamp_seconds(row['START TIME'])
+            duration = row['DURATION']
+            if metric is None or time is None or not duration or duration < MIN_DURATION \
+                    or row['ENERGY DRAINED (mWh)'] is None:
+                continue
+            event = self.update(metric, time, row['ENERGY DRAINED (mWh)'] / (duration / 3600))
+            if event is not None:
+                events.append(event)
+        return events
+
+    def feed_life_estimates(self, rows, date_format=None):
+        # Typed battery life estimate rows; each period counts at its end date
+        date_format = date_format or detect_date_format(get_date_sequences({'battery life estimates': rows}))
+        if date_format is None:
+            return []
+        events = []
+        for row in rows:
+            try:
+                end = datetime.datetime.strptime(row['END DATE'] or '', date_format)
+            except ValueError:
+                continue
+            event = self.update('standby drain estimate (%)', int((end - EPOCH).total_seconds()),
+                                row['CONNECTED STANDBY (FULL CHARGE) DRAIN (%)'])
+            if event is not None:
+                events.append(event)
+        return events
+
+    def feed_live_sample(self, time, percent, plugged):
+        # One reading of the live battery state (e.g. psutil every few seconds); the drain between two readings on
+        # battery at least MIN_DURATION apart is a value of "live drain (%/h)"
+        if plugged:
+            self.live_sample = None
+            return None
+        if self.live_sample is None:
+            self.live_sample = (time, percent)
+            return None
+        start_time, start_percent = self.live_sample
+        if time - start_time < MIN_DURATION:
+            return None
+        self.live_sample = (time, percent)
+        return self.update('live drain (%/h)', time, (start_percent - percent) / ((time - start_time) / 3600))
+
+
+def read_json_or_default(path, default):
+    try:
+        return read_json_file(path)
+    except (OSError, ValueError):
+        return default
+
+
+def detect_anomalies(data_dir=None):
+    # Feed the rows of data_dir the detector has not seen yet and record the new anomalies; returns them
+    data_dir = data_dir or get_data_dir()
+    state_path = os.path.join(data_dir, ANOMALY_STATE_FILE)
+    events_path = os.path.join(data_dir, ANOMALY_EVENTS_FILE)
+
+    detector = AnomalyDetector(read_json_or_default(state_path, {}))
+    events = detector.feed_battery_usage(read_json_or_default(os.path.join(data_dir, 'battery-usage.json'), []))
+    events += detector.feed_life_estimates(
+        read_json_or_default(os.path.join(data_dir, 'battery-life-estimates.json'), []),
+        read_date_format(os.path.join(data_dir, DATA_VERSION_FILE)))
+    events.sort(key=lambda event: event['TIME'])
+
+    save_data(detector.get_state(), state_path)
+    if events:
+        save_data((read_json_or_default(events_path, []) + events)[-MAX_EVENTS:], events_path)
+    return events
+
+
+def format_event(event):
+    time = (EPOCH + datetime.timedelta(seconds=event['TIME'])).strftime('%Y-%m-%d %H:%M')
+    return (f"{time}  {event['METRIC']}: {event['VALUE']:g} (baseline {event['BASELINE']:g}, "
+            f"robust z {event['ROBUST Z SCORE']:g})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flag abnormal active and standby battery drain")
+    parser.add_argument('data', nargs='*', help="data directories, one per machine (default: data)")
+    args = parser.parse_args()
+
+    for data_dir in args.data or [get_data_dir()]:
+        events = detect_anomalies(data_dir)
+        print(f"{data_dir}: {len(events)} new anomalies")
+        for event in events:
+            print('  ' + format_event(event))
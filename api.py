@@ -0,0 +1,347 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from extract import SECTIONS
+from load_json import parse_dates
+from schema import DATA_VERSION_FILE, SCHEMAS, decode_mwh, decode_timestamp, detect_date_format, get_date_sequences, \
+    get_timestamp_seconds, read_date_format
+from storage import get_data_dir
+
+# Local JSON API over data/, for dashboards and scripts that should not start the window or parse a report:
+#   GET /api                        index of the endpoints and table sections
+#   GET /api/battery                installed battery details
+#   GET /api/report                 system details of the report
+#   GET /api/health                 design and full charge capacity, health %
+#   GET /api/sections/<section>     rows of a table section, e.g. /api/sections/battery-capacity-history
+#       ?start=2024-01-01&end=2024-02-01   rows starting in [start, end), ISO dates or date-times
+#       &offset=0&limit=1000               page of the matching rows
+# Responses are cached with their ETag until the files in data/ change (a refresh, or watch.py ingesting a report).
+# Browsers only let pages read the API from origins listed with --allow-origin; none are allowed by default, so a
+# web page the user happens to visit cannot read the battery data.
+API_HOST = '127.0.0.1'
+API_PORT = 8765
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+# The data/ files are checked for changes at most this often
+RELOAD_INTERVAL = 1.0
+
+# Cached responses; the oldest is dropped first, so arbitrary queries cannot grow the cache without bound
+MAX_CACHED_RESPONSES = 4096
+
+STATUS_TEXTS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    503: 'Service Unavailable',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def get_section_name(title):
+    return title.replace(' ', '-')
+
+
+def get_start_keys(title, rows, date_format=None):
+    # Start of every row as epoch seconds (NaN when missing), for the date range filter
+    if not rows:
+        return np.array([], dtype=float)
+    columns = [column for column, _ in SCHEMAS[title]]
+    if 'START TIME' in columns:
+        seconds = [get_timestamp_seconds(row['START TIME']) for row in rows]
+        return np.array([np.nan if value is None else value for value in seconds], dtype=float)
+    if 'START DATE' in columns:
+        # Same parsing as the loaders, with the date format of the report
+        dates = parse_dates(pd.Series([row['START DATE'] for row in rows]), date_format)
+        keys = dates.to_numpy().astype('datetime64[s]').astype('int64').astype(float)
+        keys[dates.isna().to_numpy()] = np.nan
+        return keys
+    return None
+
+
+def parse_query_timestamp(query, name):
+    if name not in query:
+        return None
+    value = get_timestamp_seconds(decode_timestamp(query[name][-1]))
+    if value is None:
+        raise ApiError(400, f"Invalid {name} date: {query[name][-1]}")
+    return value
+
+
+def parse_query_int(query, name, default, minimum, maximum):
+    if name not in query:
+        return default
+    try:
+        value = int(query[name][-1])
+    except ValueError:
+        raise ApiError(400, f"Invalid {name}: {query[name][-1]}")
+    if not minimum <= value <= maximum:
+        raise ApiError(400, f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def encode_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class DataStore:
+    # data/ held in memory, with the encoded responses cached per path and query
+
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or get_data_dir()
+        self.signature = None
+        self.checked_at = None
+        self.generation = 0
+        self.objects = {}
+        self.tables = {}
+        self.cache = {}
+
+    def get_files(self):
+        # Section title -> JSON file in data_dir
+        return {title: os.path.join(self.data_dir, output_json)
+                for title, _, _, output_json in SECTIONS}
+
+    def get_signature(self):
+        signature = []
+        for json_file in self.get_files().values():
+            try:
+                stat = os.stat(json_file)
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def reload_if_changed(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.checked_at is not None and now - self.checked_at < RELOAD_INTERVAL:
+            return
+        self.checked_at = now
+
+        signature = self.get_signature()
+        if signature == self.signature:
+            return
+        self.load()
+        self.signature = signature
+        self.generation += 1
+        self.cache.clear()
+
+    def load(self):
+        objects = {}
+        sections = {}
+        for title, json_file in self.get_files().items():
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading {json_file}:", e)
+                continue
+            if title in SCHEMAS:
+                sections[title] = data or []
+            else:
+                objects[title] = data
+
+        date_format = read_date_format(os.path.join(self.data_dir, DATA_VERSION_FILE))
+        if date_format is None:
+            date_format = detect_date_format(get_date_sequences(sections))
+        self.objects = objects
+        self.tables = {get_section_name(title): (rows, get_start_keys(title, rows, date_format))
+                       for title, rows in sections.items()}
+
+    def get_response(self, target):
+        # Request target -> (status, body, etag); the body of a successful response is computed once per data change
+        self.reload_if_changed()
+        response = self.cache.get(target)
+        if response is None:
+            try:
+                body = encode_json(self.handle(target))
+                etag = f'"{self.generation}-{hashlib.sha1(body).hexdigest()[:16]}"'
+                response = (200, body, etag)
+                if len(self.cache) >= MAX_CACHED_RESPONSES:
+                    del self.cache[next(iter(self.cache))]
+                self.cache[target] = response
+            except ApiError as e:
+                response = (e.status, encode_json({'error': str(e)}), None)
+        return response
+
+    def handle(self, target):
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        path = url.path.rstrip('/')
+
+        if path == '/api':
+            return {
+                'endpoints': ['/api/battery', '/api/report', '/api/health', '/api/sections/<section>'],
+                'sections': {name: len(rows) for name, (rows, _) in self.tables.items()},
+            }
+        if path == '/api/battery':
+            return self.get_object('installed batteries')
+        if path == '/api/report':
+            return self.get_object('battery report')
+        if path == '/api/health':
+            return self.get_health()
+        if path.startswith('/api/sections/'):
+            return self.get_section(path[len('/api/sections/'):], query)
+        raise ApiError(404, f"Unknown endpoint: {url.path}")
+
+    def get_object(self, title):
+        if title not in self.objects:
+            raise ApiError(503, f"No {title} data, generate the report first")
+        return self.objects[title]
+
+    def get_health(self):
+        battery = self.get_object('installed batteries')
+        design_capacity = decode_mwh(battery.get('DESIGN CAPACITY'))
+        full_charge_capacity = decode_mwh(battery.get('FULL CHARGE CAPACITY'))
+        health = None
+        if design_capacity and full_charge_capacity is not None:
+            health = round(full_charge_capacity / design_capacity * 100, 2)
+        return {
+            'DESIGN CAPACITY': design_capacity,
+            'FULL CHARGE CAPACITY': full_charge_capacity,
+            'HEALTH (%)': health,
+        }
+
+    def get_section(self, name, query):
+        if name not in self.tables:
+            raise ApiError(404, f"Unknown section: {name}")
+        rows, keys = self.tables[name]
+
+        start = parse_query_timestamp(query, 'start')
+        end = parse_query_timestamp(query, 'end')
+        offset = parse_query_int(query, 'offset', 0, 0, 2 ** 62)
+        limit = parse_query_int(query, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+
+        if (start is not None or end is not None) and keys is not None:
+            # Rows without a start never fall in a range
+            mask = ~np.isnan(keys)
+            if start is not None:
+                mask &= keys >= start
+            if end is not None:
+                mask &= keys < end
+            matches = np.flatnonzero(mask)
+            total = len(matches)
+            page = [rows[i] for i in matches[offset:offset + limit].tolist()]
+        else:
+            total = len(rows)
+            page = rows[offset:offset + limit]
+
+        return {
+            'section': name,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'rows': page,
+        }
+
+
+class ApiServer:
+    def __init__(self, store, host=API_HOST, port=API_PORT, allowed_origins=()):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.allowed_origins = set(allowed_origins)
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"Serving battery data on http://{self.host}:{self.port}/api")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def build_response(self, status, body, etag=None, keep_alive=True, head=False, origin=None):
+        headers = [
+            f"HTTP/1.1 {status} {STATUS_TEXTS[status]}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            "Cache-Control: no-cache",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if self.allowed_origins:
+            headers.append("Vary: Origin")
+        if origin is not None and origin in self.allowed_origins:
+            headers.append(f"Access-Control-Allow-Origin: {origin}")
+        if etag is not None:
+            headers.append(f"ETag: {etag}")
+        return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + (b'' if head else body)
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive, so a client can send many requests over one connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    writer.write(self.build_response(400, encode_json({'error': "Malformed request"}),
+                                                     keep_alive=False))
+                    break
+                method, target, version = parts
+                if int(headers.get('content-length', 0) or 0):
+                    await reader.readexactly(int(headers['content-length']))
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                if method not in ('GET', 'HEAD'):
+                    status, body, etag = 405, encode_json({'error': f"Method {method} not allowed"}), None
+                else:
+                    status, body, etag = self.store.get_response(target)
+                    if etag is not None and etag in headers.get('if-none-match', '').split(', '):
+                        status, body = 304, b''
+
+                writer.write(self.build_response(status, body, etag, keep_alive, head=method == 'HEAD',
+                                                 origin=headers.get('origin')))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError: header line over the stream limit, or a bad Content-Length
+            pass
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the battery data as a local JSON API")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--data', help="data directory")
+    parser.add_argument('--allow-origin', action='append', default=[], metavar='ORIGIN',
+                        help="origin of a web page allowed to read the API, e.g. http://localhost:3000 (repeatable)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(ApiServer(DataStore(args.data), args.host, args.port, args.allow_origin).serve_forever())
+    except KeyboardInterrupt:
+        print("Stopping")
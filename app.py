@@ -1,38 +1,56 @@
 import datetime
+import multiprocessing
 import sys
-import json
 import os
-import requests
-import psutil
 import subprocess
+import threading
 from pathlib import Path
 
-from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QComboBox, QTableWidget, QTableWidgetItem, \
-    QHBoxLayout, QLabel, QProgressDialog, QMenuBar, QMessageBox, QSlider, QHeaderView, QStyleFactory, QMenu, \
-    QGraphicsTextItem, QScrollArea, QGraphicsRectItem
-from PyQt6.QtGui import QFont, QPixmap, QIcon, QAction, QDesktopServices, QPalette, QColor, QPainter, QMovie
-from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QBarSet, QBarSeries, QValueAxis, QDateTimeAxis, \
-    QBarCategoryAxis
-from PyQt6.QtCore import Qt, QTimer, QUrl, QCoreApplication, QDateTime, QRectF, QPropertyAnimation, QSize
+from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QComboBox, QTableView, QHBoxLayout, \
+    QLabel, QProgressDialog, QMenuBar, QMessageBox, QSlider, QHeaderView, QStyleFactory, QMenu, QGraphicsTextItem, \
+    QScrollArea, QGraphicsRectItem, QDialog, QLineEdit, QFileDialog
+from PyQt6.QtGui import QFont, QAction, QDesktopServices, QColor, QPainter
+from PyQt6.QtCharts import QChart, QChartView, QBarSet, QBarSeries, QValueAxis, \
+    QBarCategoryAxis, QStackedBarSeries
+from PyQt6.QtCore import Qt, QTimer, QUrl, QCoreApplication, QDateTime, QRectF, QPointF, QPropertyAnimation, \
+    QThread, QThreadPool, QRunnable, QObject, pyqtSignal
 
 import numpy as np
 import pandas as pd
-import seaborn as sns
 
+from archive import archive_snapshot
+from assets import get_icon, get_pixmap, play_animation
+from charts import build_capacity_history, build_life_estimates
+from export import EXPORTERS, export_data, get_available_formats
 from load_json import load_capacity_history_from_json, load_life_estimates_from_json, load_recent_usage_from_json, \
-    load_battery_usage_from_json, load_current_battery_life_estimate_from_json, read_json_file
-from generate import generate_battery_report
-from clean import clean_html
-from extract import extract_data
+    load_battery_usage_from_json, load_current_battery_life_estimate_from_json, load_usage_history_from_json, \
+    read_json_file
+from schema import SCHEMAS, DATE, DURATION, is_data_current, read_summary
+from sessions import SESSION_GAP, get_session_bounds, label_sessions
+from table_model import DataFrameModel, format_date, format_duration
+from themes import apply_theme, get_theme, style_chart
+from sources import get_report_source
+from storage import get_data_dir, get_data_path
+from update import check_for_updates, download_update, is_newer_version, UpdateError, UPDATE_CHECK_INTERVAL
 
 # TODO: Replace with the current version
 CURRENT_VERSION = "2.0.0"
 
+# Sessions shown at a time in the drain chart, the slider scrolls through the rest
+DRAIN_SESSIONS_TO_SHOW = 20
+
+# Section -> (MainWindow attribute, loader, data file) of the sections loaded in the background at startup
+SECTION_LOADERS = {
+    'capacity history': ('capacity_df', load_capacity_history_from_json, 'battery-capacity-history.json'),
+    'life estimates': ('life_estimates_df', load_life_estimates_from_json, 'battery-life-estimates.json'),
+    'recent usage': ('recent_usage_df', load_recent_usage_from_json, 'recent-usage.json'),
+    'battery usage': ('battery_usage_df', load_battery_usage_from_json, 'battery-usage.json'),
+}
+
 
 class CustomChartView(QChartView):
-    def __init__(self, chart, get_current_graph, parent=None):
+    def __init__(self, chart, parent=None):
         super().__init__(chart, parent)
-        self.get_current_graph = get_current_graph
         self.setRenderHint(QPainter.RenderHint.Antialiasing)
 
         # Coordinate display item
@@ -48,43 +66,70 @@ class CustomChartView(QChartView):
         self.bg_rect.setBrush(QColor(255, 255, 255, 200))  # White with transparency
         self.bg_rect.setPen(QColor(0, 0, 0, 0))  # No border
 
+        # Samples of the plotted series, sorted by x, and the function that formats one of them
+        self.series = None
+        self.x_values = np.empty(0)
+        self.y_values = np.empty(0)
+        self.format_point = None
+        self.hover_index = None
+
+        # Mouse moves only record the position; the tooltip is updated at most once per displayed frame
+        self.hover_pos = None
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.timeout.connect(self.update_hover)
+
         self.setMouseTracking(True)
 
+    def set_series(self, series, format_point):
+        points = series.points()
+        x_values = np.fromiter((point.x() for point in points), dtype=float, count=len(points))
+        y_values = np.fromiter((point.y() for point in points), dtype=float, count=len(points))
+        order = np.argsort(x_values, kind='stable')
+
+        self.series = series
+        self.x_values = x_values[order]
+        self.y_values = y_values[order]
+        self.format_point = format_point
+        self.clear_hover()
+
+    def clear_series(self):
+        self.series = None
+        self.x_values = np.empty(0)
+        self.y_values = np.empty(0)
+        self.format_point = None
+        self.clear_hover()
+
+    def get_frame_interval(self):
+        screen = self.screen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        return max(1, int(1000 / (refresh_rate if refresh_rate > 0 else 60)))
+
     def mouseMoveEvent(self, event):
-        pos = self.mapToScene(event.pos())
-        chart_item = self.chart().mapToValue(pos)
-
-        x_val = QDateTime.fromMSecsSinceEpoch(int(chart_item.x())).toString("dd-MM-yyyy")
-        y_val = int(chart_item.y())
-        current_graph = self.get_current_graph()
-
-        if current_graph == "Battery Capacity History":
-            y_val = y_val / 1000
-            text = f"{x_val}\n{y_val:.2f} Wh"
-        elif current_graph == "Battery Life Estimates (Active)":
-            text = f"{x_val}\n"
-            if y_val >= 60:
-                hr = int(y_val / 60)
-                text += f"{hr} hr "
-                min = int(y_val % 60)
-            else:
-                min = y_val
-            text += f"{min} min (Active)"
-        elif current_graph == "Battery Life Estimates (Standby)":
-            text = f"{x_val}\n"
-            if y_val >= 60:
-                hr = int(y_val / 60)
-                text += f"{hr} hr "
-                min = int(y_val % 60)
-            else:
-                min = y_val
-            text += f"{min} min (Standby)"
-        else:
-            text = ""
+        self.hover_pos = event.position().toPoint()
+        if not self.hover_timer.isActive():
+            self.hover_timer.start(self.get_frame_interval())
+        super().mouseMoveEvent(event)
+
+    def update_hover(self):
+        if self.hover_pos is None or self.series is None or not len(self.x_values):
+            return
+
+        # Snap to the sample nearest to the cursor along x
+        x = self.chart().mapToValue(self.mapToScene(self.hover_pos), self.series).x()
+        index = int(np.searchsorted(self.x_values, x))
+        if index == len(self.x_values) or (index > 0 and x - self.x_values[index - 1] <= self.x_values[index] - x):
+            index -= 1
+        if index == self.hover_index:
+            return
+        self.hover_index = index
 
-        self.coord_item.setPlainText(text)
+        x_value = self.x_values[index]
+        y_value = self.y_values[index]
+        self.coord_item.setPlainText(self.format_point(x_value, y_value))
 
-        # Set the position of the text item
+        # Set the position of the text item next to the sample
+        pos = self.chart().mapToPosition(QPointF(x_value, y_value), self.series)
         self.coord_item.setPos(pos.x() + 15, pos.y() - 30)
 
         # Update the background rectangle
@@ -92,14 +137,238 @@ class CustomChartView(QChartView):
         self.bg_rect.setRect(text_rect.adjusted(-5, -5, 5, 5))  # Add padding
         self.bg_rect.setPos(pos.x() + 15, pos.y() - 30)
 
-        super().mouseMoveEvent(event)
-
-    def leaveEvent(self, event):
+    def clear_hover(self):
+        self.hover_timer.stop()
+        self.hover_pos = None
+        self.hover_index = None
         self.coord_item.setPlainText("")
         self.bg_rect.setRect(QRectF())
+
+    def leaveEvent(self, event):
+        self.clear_hover()
         super().leaveEvent(event)
 
 
+def format_date_point(x_value):
+    return QDateTime.fromMSecsSinceEpoch(int(x_value)).toString("dd-MM-yyyy")
+
+
+def format_capacity_point(x_value, y_value):
+    return f"{format_date_point(x_value)}\n{y_value / 1000:.2f} Wh"
+
+
+def format_life_estimate_point(state):
+    label = 'Active' if state == 'active' else 'Standby'
+
+    def format_point(x_value, y_value):
+        minutes = int(y_value)
+        text = f"{format_date_point(x_value)}\n"
+        if minutes >= 60:
+            text += f"{minutes // 60} hr "
+        return text + f"{minutes % 60} min ({label})"
+
+    return format_point
+
+
+def get_drain_sessions(df, gap=SESSION_GAP):
+    # Battery usage rows -> energy drained (mWh) per session and STATE, one row per session indexed by its start and
+    # one column per state. Sessions are found and summed in one vectorized pass, so the chart only slices the result.
+    if df.empty:
+        return pd.DataFrame()
+    df = df.sort_values('START TIME', kind='stable')
+    start = df['START TIME'].to_numpy()
+    end = start + df['DURATION'].fillna(pd.Timedelta(0)).to_numpy()
+
+    # Every battery usage row is on battery, so sessions only split on gaps
+    session = label_sessions(start, end, np.ones(len(df), dtype=bool), gap)
+    first, _ = get_session_bounds(session)
+    session_count = len(first)
+
+    states = df['STATE'].astype('category')
+    codes = states.cat.codes.to_numpy()
+    state_count = len(states.cat.categories)
+    known = codes >= 0
+    totals = np.bincount(session[known] * state_count + codes[known],
+                         weights=df['ENERGY DRAINED (mWh)'].to_numpy(dtype=float)[known],
+                         minlength=session_count * state_count).reshape(session_count, state_count)
+
+    sessions = pd.DataFrame(totals, index=pd.DatetimeIndex(start[first]), columns=list(states.cat.categories))
+    # States that never drained anything would only add empty bar sets
+    return sessions.loc[:, sessions.sum() > 0]
+
+
+class DataBrowserDialog(QDialog):
+    # Browse the long sections in a virtual table: only the visible rows are ever rendered
+    SECTIONS = [
+        ('Recent usage', 'recent usage', 'recent-usage.json', load_recent_usage_from_json),
+        ('Battery usage', 'battery usage', 'battery-usage.json', load_battery_usage_from_json),
+        ('Usage history', 'usage history', 'usage-history.json', load_usage_history_from_json),
+        ('Battery capacity history', 'battery capacity history', 'battery-capacity-history.json',
+         load_capacity_history_from_json),
+        ('Battery life estimates', 'battery life estimates', 'battery-life-estimates.json',
+         load_life_estimates_from_json),
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Browse Data')
+        self.resize(900, 600)
+
+        self.section_box = QComboBox()
+        self.section_box.addItems([title for title, _, _, _ in self.SECTIONS])
+        self.section_box.currentIndexChanged.connect(self.load_section)
+
+        self.filter_column_box = QComboBox()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText('Filter (text, or >, <, = on numbers)')
+        self.filter_edit.setClearButtonEnabled(True)
+
+        # Filter once typing pauses rather than on every key press
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.filter_column_box.currentIndexChanged.connect(self.apply_filter)
+
+        self.row_count_label = QLabel()
+
+        self.model = DataFrameModel(parent=self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setAlternatingRowColors(True)
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
+        # Fixed row heights, so the view never measures rows it does not show
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(24)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel('Section: '))
+        controls.addWidget(self.section_box)
+        controls.addStretch(1)
+        controls.addWidget(QLabel('Filter: '))
+        controls.addWidget(self.filter_column_box)
+        controls.addWidget(self.filter_edit)
+
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.table_view)
+        layout.addWidget(self.row_count_label)
+        self.setLayout(layout)
+
+        self.load_section()
+
+    def load_section(self):
+        _, section, file_name, load_function = self.SECTIONS[self.section_box.currentIndex()]
+        json_file = get_data_path(file_name)
+        df = load_function(json_file) if os.path.exists(json_file) else pd.DataFrame(
+            columns=[column for column, _ in SCHEMAS[section]])
+
+        # Durations kept as seconds are shown as h:mm:ss, report periods without a time of day
+        formatters = {}
+        for column, column_type in SCHEMAS[section]:
+            if column_type == DURATION and df[column].dtype.kind != 'm':
+                formatters[column] = format_duration
+            elif column_type == DATE and df[column].dtype.kind == 'M':
+                formatters[column] = format_date
+        self.model.set_data_frame(df, formatters)
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_view.resizeColumnsToContents()
+
+        self.filter_column_box.blockSignals(True)
+        self.filter_column_box.clear()
+        self.filter_column_box.addItems(self.model.headers)
+        self.filter_column_box.blockSignals(False)
+        self.apply_filter()
+
+    def apply_filter(self):
+        column = self.filter_column_box.currentIndex()
+        self.model.set_filter(column if column >= 0 else None, self.filter_edit.text())
+        self.row_count_label.setText(f"{self.model.rowCount():,} of {self.model.row_count:,} rows")
+
+
+class UpdateCheckWorker(QThread):
+    update_checked = pyqtSignal(object, object, object)
+
+    def __init__(self, min_interval=0, parent=None):
+        super().__init__(parent)
+        self.min_interval = min_interval
+
+    def run(self):
+        # Runs off the GUI thread so a slow network never freezes the window
+        latest_version, download_url, digest = check_for_updates(min_interval=self.min_interval)
+        self.update_checked.emit(latest_version, download_url, digest)
+
+
+class UpdateDownloadWorker(QThread):
+    progress = pyqtSignal(object, object)
+    downloaded = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, download_url, installer_path, digest=None, allow_unverified=False, parent=None):
+        super().__init__(parent)
+        self.download_url = download_url
+        self.installer_path = installer_path
+        self.digest = digest
+        self.allow_unverified = allow_unverified
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            # Progress is throttled by download_update, so the GUI only receives a few signals per second
+            download_update(self.download_url, self.installer_path, self.digest,
+                            progress_callback=self.progress.emit, cancel_event=self.cancel_event,
+                            allow_unverified=self.allow_unverified)
+            self.downloaded.emit(self.installer_path)
+        except (UpdateError, OSError) as e:
+            self.failed.emit(str(e))
+
+
+class ExportWorker(QThread):
+    exported = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, output_path, export_format, parent=None):
+        super().__init__(parent)
+        self.output_path = output_path
+        self.export_format = export_format
+
+    def run(self):
+        # Sections are streamed chunk by chunk, so a long history neither freezes the window nor fills the memory
+        try:
+            self.exported.emit(export_data(self.output_path, self.export_format))
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+
+
+class SectionLoadSignals(QObject):
+    # QRunnable is not a QObject, so the tasks of one load share this to report back to the GUI thread
+    loaded = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+
+class SectionLoadTask(QRunnable):
+    def __init__(self, section, signals):
+        super().__init__()
+        self.section = section
+        self.signals = signals
+
+    def run(self):
+        # One section per task, so a broken section never holds up the others. Any error is reported: an exception
+        # escaping run() would leave its group waiting forever.
+        _, loader, file_name = SECTION_LOADERS[self.section]
+        try:
+            df = loader(get_data_path(file_name))
+        except Exception as e:
+            self.signals.failed.emit(self.section, str(e))
+            return
+        self.signals.loaded.emit(self.section, df)
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -110,13 +379,30 @@ class MainWindow(QMainWindow):
 
         # Set the default theme on initialization
         self.theme = 'accent'
-        set_accent_palette(app)
+        apply_theme(app, get_theme(self.theme))
 
         # palette = Palette()
         # palette.ID = self.theme
         # self.setStyleSheet(_load_stylesheet(palette=palette))
         # self.setStyleSheet(create_custom_qss_from_palette("light", "", set_light_palette()))
 
+        self.data_browser = None
+        self.export_worker = None
+        self.section_load_signals = None
+        self.pending_sections = set()
+        self.failed_sections = {}
+        self.section_groups = []
+        self.update_timer = None
+
+        # The section loaders run one after another on a single background thread, in the order of SECTION_LOADERS,
+        # so the small sections and their charts come first. Loading is mostly JSON decoding, which holds the GIL:
+        # more threads load no faster (python benchmark.py loaders) and only compete with the GUI thread.
+        self.section_load_pool = QThreadPool(self)
+        self.section_load_pool.setMaxThreadCount(1)
+
+        # Pick the battery data source for this platform
+        self.report_source = get_report_source()
+
         # Add menu bar
         self.menu_bar = self.create_menu_bar()
         self.setMenuBar(self.menu_bar)
@@ -126,22 +412,27 @@ class MainWindow(QMainWindow):
         self.progress_dialog.show()
 
         # Get all required data
-        data_files = [
-            "data/battery-capacity-history.json",
-            "data/battery-life-estimates.json",
-            "data/battery-report.json",
-            "data/battery-usage.json",
-            "data/installed-batteries.json",
-            "data/recent-usage.json",
-            "data/usage-history.json"
-        ]
-
-        if not all(os.path.exists(file) for file in data_files):
+        data_files = [get_data_path(file_name) for file_name in [
+            "battery-capacity-history.json",
+            "battery-life-estimates.json",
+            "battery-report.json",
+            "battery-usage.json",
+            "installed-batteries.json",
+            "recent-usage.json",
+            "usage-history.json"
+        ]]
+
+        # Data written in an older layout is regenerated as well
+        if not all(os.path.exists(file) for file in data_files) or not is_data_current():
             QTimer.singleShot(2000, self.get_data)
         else:
             # Load all data into widgets
             self.load_data()
 
+        # Check for updates in the background, at most once per interval
+        self.update_check_worker = None
+        QTimer.singleShot(5000, lambda: self.start_update_check(UPDATE_CHECK_INTERVAL, interactive=False))
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
 
@@ -167,6 +458,16 @@ class MainWindow(QMainWindow):
         show_report_action.triggered.connect(self.show_battery_report)
         file_menu.addAction(show_report_action)
 
+        # Browse data action
+        browse_action = QAction("Browse Data...", self)
+        browse_action.triggered.connect(self.show_data_browser)
+        file_menu.addAction(browse_action)
+
+        # Export data action
+        export_action = QAction("Export Data...", self)
+        export_action.triggered.connect(self.export_data)
+        file_menu.addAction(export_action)
+
         # Refresh action
         refresh_action = QAction("Refresh", self)
         refresh_action.triggered.connect(self.refresh_data)
@@ -215,8 +516,51 @@ class MainWindow(QMainWindow):
 
     def show_battery_report(self):
         file_path = 'battery-report.html'
-        if file_path:
-            os.startfile(file_path)
+        if os.path.exists(file_path):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.abspath(file_path)))
+        else:
+            QMessageBox.information(self, "Battery Report", "No battery-report.html is available on this system.")
+
+    def show_data_browser(self):
+        # A new browser every time, so it always shows the latest data
+        if self.data_browser is not None:
+            self.data_browser.close()
+        self.data_browser = DataBrowserDialog(self)
+        self.data_browser.show()
+
+    def export_data(self):
+        if self.export_worker is not None and self.export_worker.isRunning():
+            return
+
+        # File dialog filter -> export format, for the formats whose packages are installed
+        filters = {
+            'xlsx': "Excel Workbook (*.xlsx)",
+            'csv': "CSV Files, one per section (*.csv)",
+            'parquet': "Parquet Files, one per section (*.parquet)",
+        }
+        formats = {filters[name]: name for name in filters if name in get_available_formats()}
+        default_path = f"battery-data-{datetime.date.today().isoformat()}.{next(iter(formats.values()))}"
+        output_path, selected_filter = QFileDialog.getSaveFileName(self, "Export Data", default_path,
+                                                                   ";;".join(formats))
+        if not output_path:
+            return
+
+        export_format = formats.get(selected_filter, 'csv')
+        extension = '.' + EXPORTERS[export_format].extension
+        if not output_path.endswith(extension):
+            output_path += extension
+
+        self.export_worker = ExportWorker(output_path, export_format, self)
+        self.export_worker.exported.connect(self.on_data_exported)
+        self.export_worker.failed.connect(self.on_data_export_failed)
+        self.export_worker.start()
+
+    def on_data_exported(self, paths):
+        QMessageBox.information(self, "Export Data", "Data exported to:\n" + "\n".join(paths))
+
+    def on_data_export_failed(self, error):
+        print("Error exporting data:", error)
+        QMessageBox.critical(self, "Export Error", f"Failed to export data: {error}")
 
     def refresh_data(self):
         self.show_loading_indicator()
@@ -233,12 +577,12 @@ class MainWindow(QMainWindow):
         # self.setStyleSheet(_load_stylesheet(palette=palette))
 
         self.theme = theme_name
-        if theme_name == 'light':
-            set_light_palette(app)
-        elif theme_name == 'dark':
-            set_dark_palette(app)
-        elif theme_name == 'accent':
-            set_accent_palette(app)
+        theme = get_theme(theme_name)
+        apply_theme(app, theme)
+
+        # The charts that are already built keep their series and axes, only their colours change
+        for chart in self.get_charts():
+            style_chart(chart, theme)
 
     def show_about_dialog(self):
         about_text = (
@@ -251,99 +595,99 @@ class MainWindow(QMainWindow):
         )
         QMessageBox.about(self, "About Us", about_text)
 
-    def check_for_updates(self):
-        # GitHub repository details
-        repo_owner = "arnav003"
-        repo_name = "Battery-Health-Report-Generator"
+    def download_and_install_update(self, download_url, installer_path, digest=None, allow_unverified=False):
+        # Create a QProgressDialog to show download progress
+        self.download_dialog = QProgressDialog("Downloading update...", "Cancel", 0, 100, self)
+        self.download_dialog.setWindowTitle("Downloading Update")
+        self.download_dialog.setAutoClose(False)
+        self.download_dialog.setAutoReset(False)
+
+        # Download the installer in the background
+        self.update_download_worker = UpdateDownloadWorker(download_url, installer_path, digest, allow_unverified,
+                                                           self)
+        self.update_download_worker.progress.connect(self.on_update_download_progress)
+        self.update_download_worker.downloaded.connect(self.on_update_downloaded)
+        self.update_download_worker.failed.connect(self.on_update_download_failed)
+        self.download_dialog.canceled.connect(self.update_download_worker.cancel)
+        self.update_download_worker.start()
+
+        self.download_dialog.show()
+
+    def on_update_download_progress(self, downloaded_size, total_size):
+        if total_size:
+            self.download_dialog.setMaximum(100)
+            self.download_dialog.setValue(int(downloaded_size * 100 / total_size))
+        else:
+            # Size unknown, show a busy indicator instead
+            self.download_dialog.setMaximum(0)
+        self.download_dialog.setLabelText(f"Downloading update... {downloaded_size / (1024 * 1024):.1f} MB")
 
-        # GitHub API URL for releases
-        api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/releases/latest"
+    def on_update_downloaded(self, installer_path):
+        # Close the progress dialog
+        self.download_dialog.close()
 
-        try:
-            response = requests.get(api_url)
-            if response.status_code == 200:
-                latest_release = response.json()
-                latest_version = latest_release["tag_name"]
-                download_url = None
-                for asset in latest_release['assets']:
-                    if asset['name'].endswith('.exe'):
-                        download_url = asset['browser_download_url']
-                        break
-                return latest_version, download_url
-            else:
-                print("Failed to fetch release information from GitHub:", response.text)
-                return None, None
-        except Exception as e:
-            print("Error checking for updates:", e)
-            return None, None
+        # Open file explorer at the directory containing the installer
+        installer_directory = os.path.dirname(installer_path)
+        subprocess.Popen(['explorer', installer_directory])
 
-    def download_and_install_update(self, download_url, installer_path):
-        # Create a QMessageBox to show download progress
-        progress_dialog = QMessageBox(self)
-        progress_dialog.setWindowTitle("Downloading Update")
-        progress_dialog.setText("Downloading update...")
-        progress_dialog.setStandardButtons(QMessageBox.StandardButton.Cancel)
-        progress_dialog.show()
+        # Exit the application
+        QCoreApplication.quit()
 
-        try:
-            # Download the installer
-            response = requests.get(download_url, stream=True)
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-
-            with open(installer_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-                        progress = int((downloaded_size / total_size) * 100)
-                        progress_dialog.setText(f"Downloading update... {progress}%")
-                        QCoreApplication.processEvents()  # Process pending events to update UI
-                    else:
-                        break
-
-            # Close the progress dialog
-            progress_dialog.close()
-
-            # Open file explorer at the directory containing the installer
-            installer_directory = os.path.dirname(installer_path)
-            subprocess.Popen(['explorer', installer_directory])
-
-            # Exit the application
-            sys.exit()
-        except Exception as e:
-            print("Error downloading updates:", e)
+    def on_update_download_failed(self, error):
+        self.download_dialog.close()
+        print("Error downloading updates:", error)
+        if not self.update_download_worker.cancel_event.is_set():
             QMessageBox.critical(self, "Update Error", "Failed to download updates. Please try again later.")
 
+    def start_update_check(self, min_interval=0, interactive=True):
+        # Ignore the request if a check is already running
+        if self.update_check_worker is not None and self.update_check_worker.isRunning():
+            return
+
+        self.update_check_worker = UpdateCheckWorker(min_interval, self)
+        self.update_check_worker.update_checked.connect(
+            lambda latest_version, download_url, digest: self.on_update_checked(latest_version, download_url, digest,
+                                                                                interactive))
+        self.update_check_worker.start()
+
     def update_software(self):
         # Check for updates
-        latest_version, download_url = self.check_for_updates()
+        self.start_update_check()
+
+    def on_update_checked(self, latest_version, download_url, digest=None, interactive=True):
         if latest_version is None or download_url is None:
-            QMessageBox.critical(self, "Update Error", "Failed to check for updates. Please try again later.")
+            if interactive:
+                QMessageBox.critical(self, "Update Error", "Failed to check for updates. Please try again later.")
             return
 
         current_version = CURRENT_VERSION
         latest_version = latest_version.lstrip("v")
-        if latest_version > current_version:
+        if is_newer_version(latest_version, current_version):
             # Prompt user to download and install updates
             reply = QMessageBox.question(self, "Update Available",
                                          f"A new version ({latest_version}) is available. Do you want to download and install it?",
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
-            if reply == QMessageBox.StandardButton.Yes:
-                # Download and install updates
-                # You can use a library like requests to download the file
-                # For simplicity, let's assume the download URL is in `download_url`
-                # and the file is downloaded to the current directory
-                try:
-                    installer_path = str(Path.home() / "Downloads") + f"\latest_installer_v{latest_version}.exe"
-                    self.download_and_install_update(download_url, installer_path)
-                    QMessageBox.information(self, "Update Complete",
-                                            "The software has been updated successfully. Please restart the application.")
-                except Exception as e:
-                    print("Error downloading updates:", e)
-                    QMessageBox.critical(self, "Update Error", "Failed to download updates. Please try again later.")
-        else:
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+            # Without a published checksum the installer cannot be verified, so the user has to accept that
+            # explicitly; the default answer is No
+            allow_unverified = False
+            if not digest:
+                reply = QMessageBox.warning(self, "Unverified Update",
+                                            "No checksum is published for this update, so the downloaded installer "
+                                            "cannot be verified. Download and install it anyway?",
+                                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                            QMessageBox.StandardButton.No)
+                if reply != QMessageBox.StandardButton.Yes:
+                    return
+                allow_unverified = True
+
+            # Download the installer to the Downloads folder; an interrupted download is resumed next time
+            installer_path = str(Path.home() / "Downloads" / f"latest_installer_v{latest_version}.exe")
+            self.download_and_install_update(download_url, installer_path, digest, allow_unverified)
+        elif interactive:
             QMessageBox.information(self, "No Updates", "You are already using the latest version of the software.")
 
     def send_feedback(self):
@@ -356,10 +700,14 @@ class MainWindow(QMainWindow):
         self.progress_dialog.setAutoClose(False)
 
     def get_data(self):
-        generate_battery_report()
-        clean_html()
-        self.create_directory("data")
-        extract_data()
+        self.create_directory(get_data_dir())
+        self.report_source.collect()
+
+        # Keep the history of every refresh; only rows not seen before take up space
+        try:
+            archive_snapshot()
+        except (OSError, ValueError) as e:
+            print("Error archiving data:", e)
 
         # Load all data into widgets
         self.load_data()
@@ -372,31 +720,16 @@ class MainWindow(QMainWindow):
             print(f"Directory '{directory_path}' already exists.")
 
     def load_data(self):
-        # Calculate battery health percentage
-        self.battery_health_percentage = self.calculate_battery_health()
-
-        # Calculate current battery info
-        self.current_battery_info = self.get_current_battery_info()
-
-        # Create the first table widget
-        self.table_widget1 = QTableWidget()
-        self.table_widget1.setColumnCount(2)
-        self.setup_table_style(self.table_widget1)
-        self.load_data_into_table(self.table_widget1, 'data/battery-report.json')
-        self.table_widget1.setMinimumHeight(300)
-
-        # Create the second table widget
-        self.table_widget2 = QTableWidget()
-        self.table_widget2.setColumnCount(2)
-        self.setup_table_style(self.table_widget2)
-        self.load_data_into_table(self.table_widget2, 'data/installed-batteries.json')
-        self.table_widget2.setMinimumHeight(300)
+        # The summary written at extraction is enough for the header; data extracted before it existed falls back
+        # to the battery details
+        self.summary = read_summary()
+        if self.summary is not None and self.summary.get('health') is not None:
+            self.battery_health_percentage = self.summary['health']
+        else:
+            self.battery_health_percentage = self.calculate_battery_health()
 
-        # Load data
-        self.capacity_df = load_capacity_history_from_json('data/battery-capacity-history.json')
-        self.life_estimates_df = load_life_estimates_from_json('data/battery-life-estimates.json')
-        self.recent_usage_df = load_recent_usage_from_json('data/recent-usage.json')
-        self.battery_usage_df = load_battery_usage_from_json('data/battery-usage.json')
+        if self.update_timer is not None:
+            self.update_timer.stop()
 
         # Create scroll area
         self.main_window_scroll = QScrollArea()
@@ -415,12 +748,91 @@ class MainWindow(QMainWindow):
 
         # Add battery health icon and percentage
         self.battery_health_layout = self.update_battery_health_label()
+        if self.summary is not None and self.summary.get('report_time'):
+            self.battery_health_layout.setToolTip(f"Report generated on {self.summary['report_time']}")
         self.layout.addWidget(self.battery_health_layout, alignment=Qt.AlignmentFlag.AlignCenter)
 
         # Add suggestion
         self.suggestion_label = self.get_suggestion_label()
         self.layout.addWidget(self.suggestion_label, alignment=Qt.AlignmentFlag.AlignCenter)
 
+        # One slot per group of widgets, so each group keeps its place whichever section is parsed first
+        self.add_tables(self.add_section_slot())
+        self.section_groups = [
+            (self.add_history_chart, ['capacity history', 'life estimates'], self.add_section_slot()),
+            (self.add_recent_usage_chart, ['recent usage'], self.add_section_slot()),
+            (self.add_battery_usage_chart, ['battery usage'], self.add_section_slot()),
+        ]
+        self.add_current_battery_info()
+
+        self.progress_dialog.close()
+
+        # The sections are parsed in the background and every group is added as soon as its sections are ready.
+        # The tasks are queued from the event loop, so the header is painted before they compete for the GIL.
+        self.pending_sections = set(SECTION_LOADERS)
+        self.failed_sections = {}
+        self.section_load_signals = SectionLoadSignals(self)
+        self.section_load_signals.loaded.connect(self.on_section_loaded)
+        self.section_load_signals.failed.connect(self.on_section_load_failed)
+        QTimer.singleShot(0, lambda signals=self.section_load_signals: self.start_section_loads(signals))
+
+    def start_section_loads(self, signals):
+        if signals is not self.section_load_signals:
+            return
+        for section in SECTION_LOADERS:
+            self.section_load_pool.start(SectionLoadTask(section, signals))
+
+    def add_section_slot(self):
+        slot = QVBoxLayout()
+        self.layout.addLayout(slot)
+        return slot
+
+    def on_section_loaded(self, section, df):
+        # A refresh started since these tasks were queued has replaced the widgets they were loading for
+        if self.sender() is not self.section_load_signals:
+            return
+        setattr(self, SECTION_LOADERS[section][0], df)
+        self.pending_sections.discard(section)
+        self.populate_section_groups()
+
+    def on_section_load_failed(self, section, error):
+        if self.sender() is not self.section_load_signals:
+            return
+        print(f"Error loading {section}:", error)
+        self.failed_sections[section] = error
+        self.pending_sections.discard(section)
+        self.populate_section_groups()
+
+    def populate_section_groups(self):
+        # Groups whose sections are all in; a group with a failed section shows the error in its place
+        waiting = []
+        for add_group, sections, slot in self.section_groups:
+            if any(section in self.pending_sections for section in sections):
+                waiting.append((add_group, sections, slot))
+                continue
+            errors = [f"{section}: {self.failed_sections[section]}" for section in sections
+                      if section in self.failed_sections]
+            if errors:
+                error_label = QLabel("Failed to load " + "; ".join(errors))
+                error_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                slot.addWidget(error_label)
+            else:
+                add_group(slot)
+        self.section_groups = waiting
+
+    def add_tables(self, layout):
+        # Create the first table widget
+        self.table_widget1 = QTableView()
+        self.setup_table_style(self.table_widget1)
+        self.load_data_into_table(self.table_widget1, get_data_path('battery-report.json'))
+        self.table_widget1.setMinimumHeight(300)
+
+        # Create the second table widget
+        self.table_widget2 = QTableView()
+        self.setup_table_style(self.table_widget2)
+        self.load_data_into_table(self.table_widget2, get_data_path('installed-batteries.json'))
+        self.table_widget2.setMinimumHeight(300)
+
         # Create horizontal layout for tables
         self.table_layout = QHBoxLayout()
 
@@ -428,8 +840,9 @@ class MainWindow(QMainWindow):
         self.table_layout.addWidget(self.table_widget1)
         self.table_layout.addWidget(self.table_widget2)
 
-        self.layout.addLayout(self.table_layout)
+        layout.addLayout(self.table_layout)
 
+    def add_history_chart(self, layout):
         # Create combo box for selecting data
         self.combo_box = QComboBox()
         self.combo_box.addItem("Battery Capacity History")
@@ -446,14 +859,15 @@ class MainWindow(QMainWindow):
         self.combo_box_layout.addWidget(self.combo_box)
         self.combo_box_layout.addStretch(1)  # Add stretchable space after the combo box
 
-        self.layout.addLayout(self.combo_box_layout)
-        self.layout.addStretch(1)  # Add stretchable space after the combo box to push it up
+        layout.addLayout(self.combo_box_layout)
+        layout.addStretch(1)  # Add stretchable space after the combo box to push it up
 
         # Create the chart and add it to the layout
         self.chart = QChart()
-        self.chart_view = CustomChartView(self.chart, self.get_current_graph)
+        style_chart(self.chart, get_theme(self.theme))
+        self.chart_view = CustomChartView(self.chart)
         self.chart_view.setMinimumHeight(500)
-        self.layout.addWidget(self.chart_view)
+        layout.addWidget(self.chart_view)
 
         # List to keep track of axes
         self.current_axes = []
@@ -461,22 +875,41 @@ class MainWindow(QMainWindow):
         # Initial plot
         self.update_plot()
 
+    def add_recent_usage_chart(self, layout):
         # Create the chart and add it to the layout
         self.recent_usage_chart = QChart()
+        style_chart(self.recent_usage_chart, get_theme(self.theme))
         self.recent_usage_chart_view = QChartView(self.recent_usage_chart)
         self.recent_usage_chart_view.setMinimumHeight(500)
         self.recent_usage_chart_view.setRenderHint(QPainter.RenderHint.Antialiasing)
-        self.layout.addWidget(self.recent_usage_chart_view)
+        layout.addWidget(self.recent_usage_chart_view)
 
         # List to keep track of axes
         self.recent_usage_current_axes = []
 
         # Slider for scrolling
         self.sl = QSlider(Qt.Orientation.Horizontal)
-        self.layout.addWidget(self.sl)
+        layout.addWidget(self.sl)
 
         self.plot_recent_usage()
 
+    def add_battery_usage_chart(self, layout):
+        # Energy drained per battery session, stacked by state
+        self.battery_usage_chart = QChart()
+        style_chart(self.battery_usage_chart, get_theme(self.theme))
+        self.battery_usage_chart_view = QChartView(self.battery_usage_chart)
+        self.battery_usage_chart_view.setMinimumHeight(500)
+        self.battery_usage_chart_view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        layout.addWidget(self.battery_usage_chart_view)
+
+        self.battery_usage_current_axes = []
+
+        self.drain_slider = QSlider(Qt.Orientation.Horizontal)
+        layout.addWidget(self.drain_slider)
+
+        self.plot_battery_usage()
+
+    def add_current_battery_info(self):
         # Add current battery percentage and charging state
         self.current_battery_info_layout = None
 
@@ -491,24 +924,18 @@ class MainWindow(QMainWindow):
         self.update_timer.timeout.connect(func)
         self.update_timer.start(10000)  # Update every 10000 milliseconds (1 second)
 
-        self.progress_dialog.close()
-
     def calculate_battery_health(self):
         # Load installed batteries data
-        battery_data = read_json_file('data/installed-batteries.json')
+        battery_data = read_json_file(get_data_path('installed-batteries.json'))
         design_capacity = int(battery_data["DESIGN CAPACITY"].replace(',', '').split(' ')[0])
         full_charge_capacity = int(battery_data["FULL CHARGE CAPACITY"].replace(',', '').split(' ')[0])
         battery_health_percentage = (full_charge_capacity / design_capacity) * 100
         return battery_health_percentage
 
     def update_battery_health_label(self):
-        battery_health_icon = 'icons/battery-animation-transparent-cropped.gif'
-
+        # Frames pre-scaled to 48x48 by build_assets.py
         icon_label = QLabel()
-        icon_movie = QMovie(battery_health_icon)
-        icon_movie.setScaledSize(QSize(48, 48))
-        icon_label.setMovie(icon_movie)
-        icon_movie.start()
+        play_animation(icon_label, 'battery-health')
 
         # battery_health_icon = QPixmap('icons/battery_icon.png')
         #
@@ -537,10 +964,8 @@ class MainWindow(QMainWindow):
         return container
 
     def get_suggestion_label(self):
-        suggestion_icon = QPixmap('icons/i_icon.png')
         suggestion_label_icon = QLabel()
-        suggestion_label_icon.setPixmap(suggestion_icon.scaled(26, 26, Qt.AspectRatioMode.KeepAspectRatio,
-                                                               Qt.TransformationMode.SmoothTransformation))
+        suggestion_label_icon.setPixmap(get_pixmap('suggestion'))
 
         if self.battery_health_percentage > 75:
             suggestion_text = "Battery Health: Excellent - Your battery is in great condition."
@@ -581,25 +1006,10 @@ class MainWindow(QMainWindow):
         return container
 
     def get_current_battery_info(self):
-        battery = psutil.sensors_battery()
-
-        if battery.secsleft < 0:
-            time_remaining = '- -'
-        else:
-            time_remaining = datetime.timedelta(seconds=battery.secsleft)
-        if battery.power_plugged:
-            is_plugged = 'Yes'
-        else:
-            is_plugged = 'No'
-        if battery:
-            battery_info = {
-                'Percent': battery.percent,
-                'Seconds left': time_remaining,
-                'Plugged in': is_plugged
-            }
-            return battery_info
-        else:
-            return "No battery information available"
+        battery_info = self.report_source.get_current_battery_info()
+        if battery_info is None:
+            return {'Percent': 0, 'Seconds left': '- -', 'Plugged in': '- -'}
+        return battery_info
 
     def update_current_battery_info_label(self):
         print("running...")
@@ -662,10 +1072,10 @@ class MainWindow(QMainWindow):
 
         # Set cell padding
         table_widget.setStyleSheet("""
-                QTableWidget::item { 
+                QTableView::item { 
                     padding: 10px; 
                 }
-                QTableWidget::item:hover {
+                QTableView::item:hover {
                     background-color: none;
                     border: none;
                 }
@@ -673,18 +1083,16 @@ class MainWindow(QMainWindow):
 
     def load_data_into_table(self, table_widget, file_path):
         # Read data from JSON file
-        with open(file_path, 'r') as file:
-            data = json.load(file)
+        data = read_json_file(file_path)
 
-        # Set number of rows
-        table_widget.setRowCount(len(data))
+        # Key / value rows, rendered by the view on demand
+        df = pd.DataFrame([(key, str(value)) for key, value in data.items()], columns=['KEY', 'VALUE'])
+        table_widget.setModel(DataFrameModel(df, parent=table_widget))
 
-        # Populate table with data
-        for row, (key, value) in enumerate(data.items()):
-            key_item = QTableWidgetItem(key)
-            value_item = QTableWidgetItem(str(value))
-            table_widget.setItem(row, 0, key_item)
-            table_widget.setItem(row, 1, value_item)
+    def get_charts(self):
+        # The charts built so far; the sections are added in the background, so some may not exist yet
+        charts = [getattr(self, name, None) for name in ['chart', 'recent_usage_chart', 'battery_usage_chart']]
+        return [chart for chart in charts if chart is not None]
 
     def get_current_graph(self):
         return self.combo_box.currentText()
@@ -701,6 +1109,7 @@ class MainWindow(QMainWindow):
 
     def update_plot(self):
         # Clear previous chart data
+        self.chart_view.clear_series()
         self.chart.removeAllSeries()
         self.clear_axes()
 
@@ -714,103 +1123,38 @@ class MainWindow(QMainWindow):
             self.plot_life_estimates('standby')
 
     def plot_capacity_history(self):
-        x_values = np.asarray(self.capacity_df['START DATE'])
-        y_values = self.capacity_df['FULL CHARGE CAPACITY']
-
-        series = QLineSeries()
-        for date, value in zip(x_values, y_values):
-            datetime_obj = pd.to_datetime(date).to_pydatetime()
-            series.append(QDateTime(datetime_obj).toMSecsSinceEpoch(), value)
-
-        # Customize series
-        series.setColor(QColor("#0078d7"))
-        series.setPointsVisible(True)
-
-        self.chart.addSeries(series)
-        self.chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
-
-        # Create and customize x-axis as QDateTimeAxis
-        axis_x = QDateTimeAxis()
-        axis_x.setTitleText("Date")
-        axis_x.setFormat("dd-MM-yyyy")
-        axis_x.setLabelsAngle(-45)
-        axis_x.setTickCount(10)  # Adjust number of ticks as needed
-
-        # Create and customize y-axis as QValueAxis
-        axis_y = QValueAxis()
-        axis_y.setTitleText("Full Charge Capacity (mWh)")
-
-        self.chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
-        self.chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
-
-        series.attachAxis(axis_x)
-        series.attachAxis(axis_y)
+        series, axes = build_capacity_history(self.chart, self.capacity_df)
+        if series is None:
+            return
 
         # Add axes to current_axes list
-        self.current_axes.extend([axis_x, axis_y])
-
-        # Customize chart
-        self.chart.setTitle('Battery Capacity History')
-        self.chart.setBackgroundBrush(QColor("#f0f0f0"))
-        self.chart.setTitleFont(QFont("Arial", 14, QFont.Weight.Bold))
-
-    def plot_life_estimates(self, state):
-        x_values = np.asarray(self.capacity_df['START DATE'])
-
-        data = load_current_battery_life_estimate_from_json('data/current-battery-life-estimate.json')
-
-        design_capacity_estimate = None
-        if state == 'active':
-            columns_to_plot = ['ACTIVE (FULL CHARGE)', 'ACTIVE (DESIGN CAPACITY)']
-            design_capacity_estimate = data["ACTIVE (DESIGN CAPACITY)"][0]
-            self.chart.setTitle('Battery Life Estimates (Active)')
-        elif state == 'standby':
-            columns_to_plot = ['CONNECTED STANDBY (FULL CHARGE) (time)', 'CONNECTED STANDBY (DESIGN CAPACITY) (time)']
-            design_capacity_estimate = data["CONNECTED STANDBY (DESIGN CAPACITY)"][0]
-            self.chart.setTitle('Battery Life Estimates (Standby)')
-
-        y_values_in_sec = (self.life_estimates_df[columns_to_plot[0]] / self.life_estimates_df[
-            columns_to_plot[1]]) * design_capacity_estimate
-        y_values = y_values_in_sec / 60
-
-        series = QLineSeries()
-        for date, value in zip(x_values, y_values):
-            datetime_obj = pd.to_datetime(date).to_pydatetime()
-            series.append(QDateTime(datetime_obj).toMSecsSinceEpoch(), value)
-
-        # Customize series
-        series.setColor(QColor("#0078d7"))
-        series.setPointsVisible(True)
+        self.current_axes.extend(axes)
 
-        self.chart.addSeries(series)
-        self.chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
+        # Hover snaps to the plotted samples
+        self.chart_view.set_series(series, format_capacity_point)
 
-        # Create and customize x-axis as QDateTimeAxis
-        axis_x = QDateTimeAxis()
-        axis_x.setTitleText("Date")
-        axis_x.setFormat("dd-MM-yyyy")
-        axis_x.setLabelsAngle(-45)
-        axis_x.setTickCount(10)  # Adjust number of ticks as needed
-
-        # Create and customize y-axis as QValueAxis
-        axis_y = QValueAxis()
-        axis_y.setTitleText("Drain Time (in minutes)")
+        style_chart(self.chart, get_theme(self.theme))
 
-        self.chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
-        self.chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
-
-        series.attachAxis(axis_x)
-        series.attachAxis(axis_y)
+    def plot_life_estimates(self, state):
+        data = load_current_battery_life_estimate_from_json(get_data_path('current-battery-life-estimate.json'))
+        series, axes = build_life_estimates(self.chart, self.capacity_df, self.life_estimates_df, data, state)
+        if series is None:
+            return
 
         # Add axes to current_axes list
-        self.current_axes.extend([axis_x, axis_y])
+        self.current_axes.extend(axes)
 
-        # Customize chart
-        self.chart.setBackgroundBrush(QColor("#f0f0f0"))
-        self.chart.setTitleFont(QFont("Arial", 14, QFont.Weight.Bold))
+        # Hover snaps to the plotted samples
+        self.chart_view.set_series(series, format_life_estimate_point(state))
+
+        style_chart(self.chart, get_theme(self.theme))
 
     def plot_recent_usage(self):
         df = self.recent_usage_df
+        if df.empty:
+            self.sl.hide()
+            self.recent_usage_chart.setTitle('Recent Battery Levels (no data)')
+            return
 
         # Drop duplicate START TIME values
         df = df.drop_duplicates(subset=['START TIME'])
@@ -840,7 +1184,7 @@ class MainWindow(QMainWindow):
 
         self.recent_usage_df = df_resampled
 
-        self.hours_to_show = 12
+        self.hours_to_show = min(12, len(df_resampled))
 
         # Adding scroll functionality
         self.sl.setMinimum(0)
@@ -916,130 +1260,81 @@ class MainWindow(QMainWindow):
 
         # Customize chart
         self.recent_usage_chart.setTitle('Recent Battery Levels')
-        self.recent_usage_chart.setBackgroundBrush(QColor("#f0f0f0"))
+        style_chart(self.recent_usage_chart, get_theme(self.theme))
         self.recent_usage_chart.setTitleFont(QFont("Arial", 14, QFont.Weight.Bold))
 
         # Add axes to current_axes list
         self.recent_usage_current_axes.extend([axis_x, axis_y])
 
     def plot_battery_usage(self):
-        sns.barplot(data=self.battery_usage_df, x='START TIME', y='ENERGY DRAINED (mWh)', hue='STATE',
-                    ax=self.ax)
-        self.ax.set_ylabel('Energy Drained (mWh)')
-        self.ax.set_xlabel('Start Time')
-        self.ax.set_title('Battery Drains')
-
-        tick_labels = self.ax.get_xticklabels()
-
-        # Extract the text from tick labels
-        tick_texts = [label.get_text() for label in tick_labels]
-
-        # Convert to datetime format and then format to hours and minutes
-        formatted_tick_labels = [pd.to_datetime(text).strftime('%H:%M') for text in tick_texts]
-
-        # Update the x-axis with the formatted tick labels and rotate for better readability
-        self.ax.set_xticklabels(formatted_tick_labels, rotation=45, ha='right')
-
-
-def apply_stylesheet(app, file_name):
-    STYLESHEET_PATH = Path(__file__).parent / file_name
-    if STYLESHEET_PATH.exists():
-        app.setStyleSheet(STYLESHEET_PATH.read_text())
-    else:
-        print(f"Stylesheet not found: {STYLESHEET_PATH}")
-
-
-def set_light_palette(app):
-    palette = QPalette()
-
-    # Base colors
-    palette.setColor(QPalette.ColorRole.Window, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.WindowText, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.Base, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.AlternateBase, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.ToolTipBase, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.ToolTipText, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.Text, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.Button, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.ButtonText, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.BrightText, QColor(255, 0, 0))
-
-    # Highlight colors
-    palette.setColor(QPalette.ColorRole.Highlight, QColor(0, 120, 215))
-    palette.setColor(QPalette.ColorRole.Accent, QColor(0, 120, 215))
-    palette.setColor(QPalette.ColorRole.HighlightedText, QColor(255, 255, 255))
-
-    # Menubar colors
-    palette.setColor(QPalette.ColorRole.Light, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.Midlight, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.Dark, QColor(200, 200, 200))
-    palette.setColor(QPalette.ColorRole.Mid, QColor(180, 180, 180))
-    palette.setColor(QPalette.ColorRole.Shadow, QColor(160, 160, 160))
-
-    app.setPalette(palette)
-
-    apply_stylesheet(app, "stylesheets/light_stylesheet.css")
+        self.drain_sessions = get_drain_sessions(self.battery_usage_df)
+        if self.drain_sessions.empty:
+            self.drain_slider.hide()
+            self.battery_usage_chart.setTitle('Battery Drain per Session (no data)')
+            return
 
+        self.drain_sessions_to_show = min(DRAIN_SESSIONS_TO_SHOW, len(self.drain_sessions))
 
-def set_accent_palette(app):
-    palette = QPalette()
+        self.drain_slider.setMinimum(0)
+        self.drain_slider.setMaximum(len(self.drain_sessions) - self.drain_sessions_to_show)
+        self.drain_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
+        self.drain_slider.setTickInterval(5)
 
-    # Base colors
-    palette.setColor(QPalette.ColorRole.Window, QColor(245, 245, 245))  # Light gray background
-    palette.setColor(QPalette.ColorRole.WindowText, QColor(30, 30, 30))  # Dark text
-    palette.setColor(QPalette.ColorRole.Base, QColor(255, 255, 255))  # White for input fields
-    palette.setColor(QPalette.ColorRole.AlternateBase, QColor(240, 240, 240))  # Slightly darker for alternate rows
-    palette.setColor(QPalette.ColorRole.ToolTipBase, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.ToolTipText, QColor(30, 30, 30))
-    palette.setColor(QPalette.ColorRole.Text, QColor(30, 30, 30))
-    palette.setColor(QPalette.ColorRole.Button, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.ButtonText, QColor(30, 30, 30))
-    palette.setColor(QPalette.ColorRole.BrightText, QColor(255, 0, 0))  # Red for bright text
+        self.drain_slider.valueChanged.connect(self.update_battery_usage)
+        # Latest sessions first; setValue only emits when the value changes
+        self.drain_slider.setValue(len(self.drain_sessions) - self.drain_sessions_to_show)
+        self.update_battery_usage()
 
-    # Highlight colors
-    palette.setColor(QPalette.ColorRole.Highlight, QColor(0, 122, 204))  # Accent color for highlights
-    palette.setColor(QPalette.ColorRole.Accent, QColor(0, 122, 204))  # Accent color for focus
-    palette.setColor(QPalette.ColorRole.HighlightedText, QColor(255, 255, 255))  # White text on highlight
+    def update_battery_usage(self):
+        for axis in self.battery_usage_current_axes:
+            self.battery_usage_chart.removeAxis(axis)
+        self.battery_usage_current_axes = []
+        self.battery_usage_chart.removeAllSeries()
 
-    # Menubar colors
-    palette.setColor(QPalette.ColorRole.Light, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.Midlight, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.Dark, QColor(200, 200, 200))
-    palette.setColor(QPalette.ColorRole.Mid, QColor(180, 180, 180))
-    palette.setColor(QPalette.ColorRole.Shadow, QColor(160, 160, 160))
+        pos = int(self.drain_slider.value())
+        sessions = self.drain_sessions.iloc[pos:pos + self.drain_sessions_to_show]
 
-    app.setPalette(palette)
+        bar_series = QStackedBarSeries()
+        for state in sessions.columns:
+            bar_set = QBarSet(str(state))
+            bar_set.append(sessions[state].tolist())
+            bar_series.append(bar_set)
 
-    apply_stylesheet(app, "stylesheets/accent_stylesheet.css")
+        self.battery_usage_chart.addSeries(bar_series)
 
+        current_date = datetime.datetime.now().date()
+        x_labels = [start.strftime("%H:%M") if start.date() == current_date else start.strftime("%d-%m %H:%M")
+                    for start in sessions.index]
 
-def set_dark_palette(app):
-    palette = QPalette()
+        axis_x = QBarCategoryAxis()
+        axis_x.setTitleText("Session start")
+        axis_x.setLabelsAngle(-45)
+        axis_x.append(x_labels)
 
-    # Base colors
-    palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
-    palette.setColor(QPalette.ColorRole.WindowText, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.Base, QColor(35, 35, 35))
-    palette.setColor(QPalette.ColorRole.AlternateBase, QColor(53, 53, 53))
-    palette.setColor(QPalette.ColorRole.ToolTipBase, QColor(53, 53, 53))
-    palette.setColor(QPalette.ColorRole.ToolTipText, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.Text, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.Button, QColor(53, 53, 53))
-    palette.setColor(QPalette.ColorRole.ButtonText, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.BrightText, QColor(255, 0, 0))
+        axis_y = QValueAxis()
+        axis_y.setRange(0, max(float(sessions.sum(axis=1).max()), 1) * 1.1)
+        axis_y.applyNiceNumbers()
+        axis_y.setTitleText("Energy Drained (mWh)")
+        axis_y.setLabelFormat("%.0f")
 
-    # Additional colors
-    palette.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
-    palette.setColor(QPalette.ColorRole.HighlightedText, QColor(0, 0, 0))
+        self.battery_usage_chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
+        self.battery_usage_chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
 
-    app.setPalette(palette)
+        bar_series.attachAxis(axis_x)
+        bar_series.attachAxis(axis_y)
 
-    apply_stylesheet(app, "stylesheets/dark_stylesheet.css")
+        # Customize chart
+        self.battery_usage_chart.setTitle('Battery Drain per Session')
+        style_chart(self.battery_usage_chart, get_theme(self.theme))
+        self.battery_usage_chart.setTitleFont(QFont("Arial", 14, QFont.Weight.Bold))
 
+        self.battery_usage_current_axes.extend([axis_x, axis_y])
 
 if __name__ == "__main__":
+    # Needed by the extraction worker processes in the frozen (pyinstaller) build
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
-    app.setWindowIcon(QIcon('icons/app_icon.ico'))
+    app.setWindowIcon(get_icon('app-icon'))
     app.setStyle(QStyleFactory.create("windows11"))  # ['windows11', 'windowsvista', 'Windows', 'Fusion']
     # apply_stylesheet(app, "stylesheets/custom_stylesheet.css")
     window = MainWindow()
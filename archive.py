@@ -0,0 +1,257 @@
+import argparse
+import array
+import datetime
+import json
+import os
+
+from extract import SECTIONS, save_json, save_summary
+from schema import DATA_VERSION, DATA_VERSION_FILE, SUMMARY_FILE, read_date_format
+from storage import atomic_write, get_data_dir
+
+# Every refresh of the data directory can be archived as a snapshot. Rows are shared between snapshots:
+#   <section>.jsonl   append-only log of every distinct row ever seen in the section, one JSON document per line
+#   <section>.idx     byte offset of every line of the log, as 64-bit integers
+#   snapshots/<id>.json
+#                     manifest: for each section, the runs [first, last] of log rows that make up the snapshot
+# A refresh that only adds a few rows to a report therefore only appends those rows plus a manifest of a few
+# runs, and restoring any snapshot is a handful of seeks and sequential reads.
+# The archive is kept in the "archive" directory of the data directory.
+ARCHIVE_DIR_NAME = 'archive'
+
+
+def get_section_names():
+    # "battery-report.json" -> "battery-report"
+    return [os.path.splitext(output_json)[0] for _, _, _, output_json in SECTIONS]
+
+
+def encode_row(row):
+    # Canonical form, so equal rows always produce the same line
+    return json.dumps(row, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def get_runs(sequence):
+    # [3, 4, 5, 9, 10] -> [[3, 5], [9, 10]]
+    runs = []
+    for number in sequence:
+        if runs and number == runs[-1][1] + 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return runs
+
+
+class SectionLog:
+    def __init__(self, archive_dir, name):
+        self.log_path = os.path.join(archive_dir, name + '.jsonl')
+        self.index_path = os.path.join(archive_dir, name + '.idx')
+        self.offsets = None
+        self.rows = None
+        self.size = 0
+
+    def read_offsets(self):
+        offsets = array.array('q')
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                offsets.frombytes(f.read())
+        return offsets
+
+    def open(self):
+        # Load the row -> line number map needed to append; repairs a log or index cut short by a crash
+        self.rows = {}
+        self.offsets = array.array('q')
+        if not os.path.exists(self.log_path):
+            open(self.log_path, 'wb').close()
+
+        offset = 0
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                self.rows.setdefault(line, len(self.offsets))
+                self.offsets.append(offset)
+                offset += len(line)
+        if offset != os.path.getsize(self.log_path):
+            # Drop a partially written last line
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(offset)
+
+        if self.read_offsets() != self.offsets:
+            with open(self.index_path, 'wb') as f:
+                self.offsets.tofile(f)
+        self.size = offset
+
+    def append(self, rows):
+        # Line numbers of `rows` in the log, appending the rows it does not contain yet
+        numbers = []
+        new_lines = []
+        new_offsets = array.array('q')
+        for row in rows:
+            line = encode_row(row)
+            number = self.rows.get(line)
+            if number is None:
+                number = len(self.offsets) + len(new_offsets)
+                self.rows[line] = number
+                new_offsets.append(self.size)
+                new_lines.append(line)
+                self.size += len(line)
+            numbers.append(number)
+
+        if new_lines:
+            # The log is written before the index, and both before any manifest refers to the new rows
+            with open(self.log_path, 'ab') as f:
+                f.write(b''.join(new_lines))
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.index_path, 'ab') as f:
+                new_offsets.tofile(f)
+            self.offsets.extend(new_offsets)
+        return numbers
+
+    def read_runs(self, runs):
+        offsets = self.read_offsets()
+        rows = []
+        with open(self.log_path, 'rb') as f:
+            for first, last in runs:
+                f.seek(offsets[first])
+                if last + 1 < len(offsets):
+                    block = f.read(offsets[last + 1] - offsets[first])
+                else:
+                    block = f.read()
+                rows.extend(json.loads(line) for line in block.splitlines())
+        return rows
+
+
+def get_archive_dir(archive_dir=None, data_dir=None):
+    # The archive of a data directory is kept inside it, unless another archive directory is given
+    return archive_dir or os.path.join(data_dir or get_data_dir(), ARCHIVE_DIR_NAME)
+
+
+def get_snapshot_dir(archive_dir):
+    return os.path.join(archive_dir, 'snapshots')
+
+
+def list_snapshots(archive_dir=None):
+    archive_dir = get_archive_dir(archive_dir)
+    snapshot_dir = get_snapshot_dir(archive_dir)
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(snapshot_dir) if name.endswith('.json'))
+
+
+def read_manifest(snapshot_id, archive_dir=None):
+    archive_dir = get_archive_dir(archive_dir)
+    with open(os.path.join(get_snapshot_dir(archive_dir), snapshot_id + '.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(manifest, archive_dir):
+    # Replaced atomically, so a snapshot is either complete or absent
+    path = os.path.join(get_snapshot_dir(archive_dir), manifest['id'] + '.json')
+    atomic_write(path, json.dumps(manifest, indent=4).encode('utf-8'))
+
+
+def get_snapshot_id(archive_dir):
+    snapshot_id = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    existing = set(list_snapshots(archive_dir))
+    suffix = 1
+    unique_id = snapshot_id
+    while unique_id in existing:
+        suffix += 1
+        unique_id = f"{snapshot_id}-{suffix:03d}"
+    return unique_id
+
+
+def archive_snapshot(data_dir=None, archive_dir=None):
+    # Archive the current data files; returns the snapshot id, or the latest one if nothing changed
+    data_dir = data_dir or get_data_dir()
+    archive_dir = get_archive_dir(archive_dir, data_dir)
+    os.makedirs(get_snapshot_dir(archive_dir), exist_ok=True)
+
+    sections = {}
+    for name in get_section_names():
+        json_file = os.path.join(data_dir, name + '.json')
+        if not os.path.exists(json_file):
+            continue
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # Key/value sections are stored as a single row
+        is_object = isinstance(data, dict)
+        log = SectionLog(archive_dir, name)
+        log.open()
+        numbers = log.append([data] if is_object else data)
+        sections[name] = {'type': 'object' if is_object else 'rows', 'runs': get_runs(numbers)}
+
+    snapshots = list_snapshots(archive_dir)
+    if snapshots:
+        latest = read_manifest(snapshots[-1], archive_dir)
+        if latest['sections'] == sections:
+            print(f"Data unchanged since snapshot {latest['id']}")
+            return latest['id']
+
+    manifest = {
+        'id': get_snapshot_id(archive_dir),
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'data_version': DATA_VERSION,
+        'date_format': read_date_format(os.path.join(data_dir, DATA_VERSION_FILE)),
+        'sections': sections,
+    }
+    write_manifest(manifest, archive_dir)
+    print(f"Archived snapshot {manifest['id']}")
+    return manifest['id']
+
+
+def load_snapshot(snapshot_id, archive_dir=None):
+    # Section name -> section data, as it was in the data directory when the snapshot was taken
+    archive_dir = get_archive_dir(archive_dir)
+    manifest = read_manifest(snapshot_id, archive_dir)
+    data = {}
+    for name, section in manifest['sections'].items():
+        rows = SectionLog(archive_dir, name).read_runs(section['runs'])
+        data[name] = rows[0] if section['type'] == 'object' else rows
+    return data
+
+
+def restore_snapshot(snapshot_id, output_dir=None, archive_dir=None):
+    output_dir = output_dir or get_data_dir()
+    archive_dir = get_archive_dir(archive_dir)
+    data = load_snapshot(snapshot_id, archive_dir)
+    for name, section_data in data.items():
+        save_json(section_data, os.path.join(output_dir, name + '.json'))
+    manifest = read_manifest(snapshot_id, archive_dir)
+    # Snapshots taken before the date format was stored leave it to be detected by the loaders
+    save_json({'version': manifest['data_version'], 'date_format': manifest.get('date_format')},
+              os.path.join(output_dir, DATA_VERSION_FILE))
+    # The header of the window is read from the summary, so it is rebuilt from the restored sections
+    sections = {title: data.get(os.path.splitext(output_json)[0]) for title, _, _, output_json in SECTIONS}
+    save_summary(sections, os.path.join(output_dir, SUMMARY_FILE))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive and restore snapshots of the data directory")
+    parser.add_argument('--archive', help="archive directory (default: archive in the data directory)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="Archive the current data")
+    snapshot_parser.add_argument('--data', help="data directory")
+
+    list_parser = subparsers.add_parser('list', help="List the archived snapshots")
+    list_parser.add_argument('--data', help="data directory")
+
+    restore_parser = subparsers.add_parser('restore', help="Write the data of a snapshot")
+    restore_parser.add_argument('snapshot_id')
+    restore_parser.add_argument('--data', help="data directory whose archive is read")
+    restore_parser.add_argument('--output', help="output directory (default: the data directory)")
+
+    args = parser.parse_args()
+    if args.command == 'snapshot':
+        archive_snapshot(args.data, args.archive)
+    elif args.command == 'list':
+        archive_dir = get_archive_dir(args.archive, args.data)
+        for snapshot_id in list_snapshots(archive_dir):
+            manifest = read_manifest(snapshot_id, archive_dir)
+            rows = sum(last - first + 1 for section in manifest['sections'].values()
+                       for first, last in section['runs'])
+            print(f"{snapshot_id}  {manifest['created_at']}  {rows} rows")
+    elif args.command == 'restore':
+        restore_snapshot(args.snapshot_id, args.output or args.data, get_archive_dir(args.archive, args.data))
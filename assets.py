@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QSize, Qt, QTimer
+from PyQt6.QtGui import QIcon, QImage, QMovie, QPixmap
+
+# Images shown by the app, pre-scaled to the size they are displayed at and stored in one compiled bundle by
+# build_assets.py. Every image is stored as raw premultiplied ARGB32 pixels, zlib-compressed, so loading it is one
+# read of the bundle and one decompression: no GIF or PNG decoding and no scaling at startup or per frame. Without
+# a bundle (a checkout where build_assets.py was not run) or with a bundle older than its sources, the images are
+# read from icons/ and scaled at runtime, as before.
+#
+# Sources are compared by content, not by modification time, which copies and installers do not keep. A packaged
+# app (PyInstaller sets sys.frozen) ships the bundle built with it and does not check its sources at all.
+#
+# Bundle layout:
+#   BUNDLE_MAGIC, header length (uint32 little-endian), JSON header, image data
+#   header: {'version', 'assets': {name: {'source', 'size', 'mtime', 'sha256', 'images': [{'width', 'height',
+#            'delay', 'offset', 'length'}]}}}
+ASSETS_DIR = Path(__file__).parent / 'assets'
+BUNDLE_PATH = ASSETS_DIR / 'assets.bundle'
+BUNDLE_MAGIC = b'BHRGASSETS'
+BUNDLE_VERSION = 2
+
+# Name -> (source file, displayed sizes); the frames of an animation are all kept, at its first size
+ASSETS = {
+    'battery-health': ('icons/battery-animation-transparent-cropped.gif', [(48, 48)]),
+    'suggestion': ('icons/i_icon.png', [(26, 26)]),
+    'app-icon': ('icons/app_icon.ico', [(16, 16), (24, 24), (32, 32), (48, 48), (64, 64), (256, 256)]),
+}
+
+# Loaded bundle: (header, data), or None when there is none; read once per process
+BUNDLE = {}
+
+
+def get_source_path(name):
+    return Path(__file__).parent / ASSETS[name][0]
+
+
+def get_source_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def is_stale(name, asset):
+    # True when the source of an asset changed after the bundle was built
+    if getattr(sys, 'frozen', False):
+        return False
+    try:
+        stat = os.stat(get_source_path(name))
+    except OSError:
+        # Sources are not needed once the bundle is built
+        return False
+    if stat.st_size != asset['size']:
+        return True
+    # Same size and time: unchanged, without reading the source. Otherwise the content decides (a checkout or a
+    # copy gives files a new time).
+    if stat.st_mtime_ns == asset['mtime']:
+        return False
+    return get_source_digest(get_source_path(name)) != asset['sha256']
+
+
+def read_bundle(bundle_path=BUNDLE_PATH):
+    # (header, data) of the bundle, or None when it is missing or was built by another version
+    try:
+        with open(bundle_path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    if not content.startswith(BUNDLE_MAGIC):
+        print(f"Not an asset bundle: {bundle_path}")
+        return None
+    start = len(BUNDLE_MAGIC)
+    (header_length,) = struct.unpack_from('<I', content, start)
+    start += 4
+    try:
+        header = json.loads(content[start:start + header_length])
+    except ValueError:
+        print(f"Corrupt asset bundle: {bundle_path}")
+        return None
+    if header.get('version') != BUNDLE_VERSION:
+        print(f"Asset bundle {bundle_path} was built by another version, run build_assets.py")
+        return None
+    return header, memoryview(content)[start + header_length:]
+
+
+def get_bundle():
+    if 'bundle' not in BUNDLE:
+        BUNDLE['bundle'] = read_bundle()
+    return BUNDLE['bundle']
+
+
+def get_images(name):
+    # [(QImage, delay in ms)] of an asset from the bundle, or None when it has to be loaded from its source
+    bundle = get_bundle()
+    if bundle is None:
+        return None
+    header, data = bundle
+    asset = header['assets'].get(name)
+    if asset is None:
+        return None
+    # A source edited after the bundle was built wins over the stale bundle
+    if is_stale(name, asset):
+        print(f"Asset bundle is older than {asset['source']}, run build_assets.py")
+        return None
+
+    images = []
+    for image in asset['images']:
+        pixels = zlib.decompress(data[image['offset']:image['offset'] + image['length']])
+        # The QImage only borrows the buffer, so it is copied once into memory Qt owns
+        qimage = QImage(pixels, image['width'], image['height'], image['width'] * 4,
+                        QImage.Format.Format_ARGB32_Premultiplied).copy()
+        images.append((qimage, image['delay']))
+    return images
+
+
+def get_pixmap(name):
+    images = get_images(name)
+    if images is not None:
+        return QPixmap.fromImage(images[0][0])
+    width, height = ASSETS[name][1][0]
+    return QPixmap(str(get_source_path(name))).scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                                                      Qt.TransformationMode.SmoothTransformation)
+
+
+def get_icon(name):
+    images = get_images(name)
+    if images is None:
+        return QIcon(str(get_source_path(name)))
+    icon = QIcon()
+    for image, _ in images:
+        icon.addPixmap(QPixmap.fromImage(image))
+    return icon
+
+
+class FrameAnimation(QObject):
+    # Plays pre-scaled frames on a label; each frame is converted to a pixmap the first time it is shown
+
+    def __init__(self, label, images):
+        super().__init__(label)
+        self.label = label
+        self.images = images
+        self.pixmaps = [None] * len(images)
+        self.index = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.show_next_frame)
+
+    def start(self):
+        self.index = len(self.images) - 1
+        self.show_next_frame()
+
+    def stop(self):
+        self.timer.stop()
+
+    def show_next_frame(self):
+        self.index = (self.index + 1) % len(self.images)
+        if self.pixmaps[self.index] is None:
+            self.pixmaps[self.index] = QPixmap.fromImage(self.images[self.index][0])
+        self.label.setPixmap(self.pixmaps[self.index])
+        if len(self.images) > 1:
+            # GIFs with no delay are played at 10 frames per second, like browsers do
+            self.timer.start(self.images[self.index][1] or 100)
+
+
+def play_animation(label, name):
+    # Start the animation `name` on label; returns the object playing it, which the label owns
+    images = get_images(name)
+    if images is not None:
+        animation = FrameAnimation(label, images)
+    else:
+        # Decoded and scaled frame by frame from the source
+        animation = QMovie(str(get_source_path(name)), parent=label)
+        animation.setScaledSize(QSize(*ASSETS[name][1][0]))
+        label.setMovie(animation)
+    animation.start()
+    return animation
@@ -0,0 +1,570 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from clean import clean_html
+from extract import SECTIONS, parse_sections
+from extract_xml import parse_xml_report
+from parsers import get_available_backends, get_backend, parse_file
+
+
+def best_time(function, repeat=3):
+    # Best wall-clock time of `repeat` runs, in seconds
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_parsers(report_paths, repeat=3):
+    # Parse and extract time of every available parser backend, per report
+    for file_path in report_paths:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            markup = file.read()
+        print(f"{file_path} ({len(markup) / (1024 * 1024):.2f} MB)")
+
+        for name in get_available_backends():
+            backend = get_backend(name)
+            document = backend.parse(markup)
+
+            def extract_sections():
+                for _, parse_function, header_text, _ in SECTIONS:
+                    parse_function(backend, document, header_text)
+
+            parse_time = best_time(lambda: backend.parse(markup), repeat)
+            extract_time = best_time(extract_sections, repeat)
+            print(f"  {name:<12} parse {parse_time * 1000:9.1f} ms   extract {extract_time * 1000:9.1f} ms")
+
+
+def benchmark_xml(html_path, xml_path, repeat=3):
+    # Full ingestion of the same report: clean + parse + extract the HTML, or stream the XML
+    backend = get_backend()
+    cleaned_path = os.path.join(tempfile.mkdtemp(), 'cleaned_battery-report.html')
+
+    def ingest_html():
+        clean_html(html_path, cleaned_path)
+        document = parse_file(cleaned_path, backend)
+        for _, parse_function, header_text, _ in SECTIONS:
+            parse_function(backend, document, header_text)
+
+    html_time = best_time(ingest_html, repeat)
+    xml_time = best_time(lambda: parse_xml_report(xml_path), repeat)
+    print(f"HTML ({backend.name}) {html_time * 1000:9.1f} ms   {html_path}")
+    print(f"XML            {xml_time * 1000:9.1f} ms   {xml_path}")
+
+
+def benchmark_parallel(file_path, max_workers=None, repeat=3):
+    # Section extraction time of one report with 1..max_workers worker processes
+    with open(file_path, 'r', encoding='utf-8') as file:
+        markup = file.read()
+    backend = get_backend()
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"{file_path} ({len(markup) / (1024 * 1024):.2f} MB, {backend.name}, {os.cpu_count()} CPUs)")
+
+    sequential = parse_sections(markup, backend, 1)
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        # Every worker count must produce exactly the sequential result
+        if parse_sections(markup, backend, workers) != sequential:
+            print(f"  {workers} worker(s): output differs from sequential extraction")
+            return
+        elapsed = best_time(lambda: parse_sections(markup, backend, workers), repeat)
+        baseline = baseline or elapsed
+        print(f"  {workers:>2} worker(s) {elapsed * 1000:9.1f} ms   speedup {baseline / elapsed:5.2f}x")
+
+
+def benchmark_api(data_dir=None, requests=20000, concurrency=32):
+    # Requests per second of the JSON API from local keep-alive clients, cached and uncached
+    from api import ApiServer, DataStore
+
+    loop = asyncio.new_event_loop()
+    server = ApiServer(DataStore(data_dir), port=0)
+    loop.run_until_complete(server.start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    async def client(targets, count):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        for i in range(count):
+            target = targets[i % len(targets)]
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('latin-1'))
+            headers = await reader.readuntil(b'\r\n\r\n')
+            length = int(headers.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+        writer.close()
+
+    async def run(targets):
+        per_client = requests // concurrency
+        await asyncio.gather(*(client(targets, per_client) for _ in range(concurrency)))
+        return per_client * concurrency
+
+    cases = [
+        ('health', ['/api/health']),
+        ('capacity history page', ['/api/sections/battery-capacity-history?limit=100']),
+        ('battery usage date range', ['/api/sections/battery-usage?start=2024-01-01&end=2024-02-01&limit=100']),
+        ('uncached pages', [f'/api/sections/recent-usage?offset={i}&limit=10' for i in range(requests)]),
+    ]
+    print(f"{server.store.data_dir}, {requests} requests, {concurrency} connections")
+    for name, targets in cases:
+        start = time.perf_counter()
+        count = asyncio.run(run(targets))
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<26} {count / elapsed:9.0f} requests/s")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def benchmark_serializers(data_dir=None, repeat=5):
+    # Write (serialize + atomic replace) and read time of every data file with each serializer
+    import json
+    from storage import SERIALIZERS, get_available_serializers, get_data_dir, get_serializer, save_data
+
+    data_dir = data_dir or get_data_dir()
+    sections = {}
+    for _, _, _, output_json in SECTIONS:
+        path = os.path.join(data_dir, output_json)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                sections[output_json] = json.load(f)
+    print(f"{data_dir} ({len(sections)} sections)")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        def write_in_place():
+            # How data/ used to be written: indented, straight into the target file
+            for file_name, data in sections.items():
+                with open(os.path.join(output_dir, file_name), 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+
+        def read_all():
+            for file_name in sections:
+                with open(os.path.join(output_dir, file_name), 'r', encoding='utf-8') as f:
+                    json.load(f)
+
+        def get_size():
+            return sum(os.path.getsize(os.path.join(output_dir, file_name)) for file_name in sections)
+
+        baseline = best_time(write_in_place, repeat)
+        print(f"  {'json indent=4, in place':<26} write {baseline * 1000:8.1f} ms   "
+              f"read {best_time(read_all, repeat) * 1000:8.1f} ms   {get_size() / 1024:9.0f} KB")
+
+        for name in get_available_serializers():
+            serializer = get_serializer(name)
+
+            def write_atomic():
+                for file_name, data in sections.items():
+                    save_data(data, os.path.join(output_dir, file_name), serializer)
+
+            elapsed = best_time(write_atomic, repeat)
+            print(f"  {name + ', atomic':<26} write {elapsed * 1000:8.1f} ms   "
+                  f"read {best_time(read_all, repeat) * 1000:8.1f} ms   {get_size() / 1024:9.0f} KB   "
+                  f"{baseline / elapsed:5.2f}x")
+
+    try:
+        import msgpack
+    except ImportError:
+        return
+    # For reference only: data/ stays JSON because every reader of it parses JSON
+    elapsed = best_time(lambda: [msgpack.packb(data) for data in sections.values()], repeat)
+    size = sum(len(msgpack.packb(data)) for data in sections.values())
+    print(f"  {'msgpack (encode only)':<26} write {elapsed * 1000:8.1f} ms   {'':>16}   {size / 1024:9.0f} KB")
+
+
+def benchmark_dates(rows=150000, repeat=3):
+    # Parse time and correctness of a long daily history written in several locales, letting pandas infer the
+    # format (what the loaders used to do) versus detecting it once and parsing with it, with every date parser
+    import pandas as pd
+    from load_json import get_available_date_parsers, get_date_parser
+    from schema import detect_date_format
+
+    # Distinct dates as in a report (pandas caches repeated values); starting early keeps long histories in the
+    # range of datetime64[ns]
+    truth = pd.Series(pd.date_range('1700-01-01', periods=rows, freq='D').astype('datetime64[ns]'))
+    for label, written_format in [('ISO', '%Y-%m-%d'), ('US', '%m/%d/%Y'), ('day first', '%d/%m/%Y'),
+                                  ('German', '%d.%m.%Y'), ('Hungarian', '%Y. %m. %d.')]:
+        dates = truth.dt.strftime(written_format)
+        print(f"{label} ({written_format}, {rows} rows)")
+
+        def parse_inferred():
+            return pd.to_datetime(dates)
+
+        try:
+            elapsed = best_time(parse_inferred, repeat)
+            wrong = int((parse_inferred() != truth).sum())
+            print(f"  {'inferred':<26} {elapsed * 1000:8.1f} ms   {wrong} wrong")
+        except ValueError as e:
+            print(f"  {'inferred':<26} fails: {str(e).splitlines()[0]}")
+
+        detect_elapsed = best_time(lambda: detect_date_format([dates.tolist()]), repeat)
+        date_format = detect_date_format([dates.tolist()])
+
+        print(f"  {'detect ' + date_format:<26} {detect_elapsed * 1000:8.1f} ms")
+        for name in get_available_date_parsers():
+            date_parser = get_date_parser(name)
+
+            def parse_explicit():
+                return date_parser.parse(dates, date_format)
+
+            elapsed = best_time(parse_explicit, repeat)
+            wrong = int((parse_explicit() != truth).sum())
+            print(f"  {'explicit, ' + name:<26} {elapsed * 1000:8.1f} ms   {wrong} wrong")
+
+
+def benchmark_memory(data_dirs=None, budget=None):
+    # Footprint of every loaded section with the plain dtypes the loaders used to return and with the compact ones,
+    # and how many machines' data fits in a RAM budget (in MB)
+    from load_json import get_memory_usage, load_section
+    from schema import SCHEMAS
+    from storage import get_data_dir
+
+    totals = [0, 0]
+    data_dirs = data_dirs or [get_data_dir()]
+    for data_dir in data_dirs:
+        print(data_dir)
+        for title, _, _, output_json in SECTIONS:
+            json_file = os.path.join(data_dir, output_json)
+            if title not in SCHEMAS or not os.path.exists(json_file):
+                continue
+            before = get_memory_usage(load_section(json_file, title, compact=False))
+            after = get_memory_usage(load_section(json_file, title))
+            totals[0] += before
+            totals[1] += after
+            print(f"  {title:<32} {before / 1024:9.0f} KB -> {after / 1024:9.0f} KB   {after / max(before, 1):5.0%}")
+
+    before, after = totals
+    print(f"Total {before / 1024 ** 2:.1f} MB -> {after / 1024 ** 2:.1f} MB ({after / max(before, 1):.0%}) "
+          f"for {len(data_dirs)} machine(s)")
+    if budget and before and after:
+        per_machine = [total / len(data_dirs) for total in totals]
+        print(f"A {budget} MB budget holds {int(budget * 1024 ** 2 // per_machine[0])} machines before, "
+              f"{int(budget * 1024 ** 2 // per_machine[1])} after")
+
+
+def benchmark_sessions(data_dir=None, scale=10, queries=1000):
+    # Segmentation time of the recent usage log repeated `scale` times end to end, and the latency of the index
+    # queries on the result
+    import numpy as np
+    import pandas as pd
+    from sessions import SessionIndex, load_recent_usage, segment_sessions
+    from storage import get_data_dir
+
+    df = load_recent_usage(os.path.join(data_dir or get_data_dir(), 'recent-usage.json'))
+    if df.empty:
+        print("No recent usage rows")
+        return
+    span = df['START TIME'].max() - df['START TIME'].min() + pd.Timedelta(hours=1)
+    frames = []
+    for i in range(scale):
+        frame = df.copy()
+        frame['START TIME'] = frame['START TIME'] + span * i
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+
+    elapsed = best_time(lambda: segment_sessions(df))
+    index = SessionIndex(segment_sessions(df))
+    print(f"{len(df)} rows -> {len(index)} sessions")
+    print(f"  {'segment':<26} {elapsed * 1000:8.1f} ms")
+
+    latest = index.starts[-1]
+    for label, query in [
+        ('worst 10, last 30 days', lambda: index.worst(10, 30)),
+        ('worst 10, all', lambda: index.worst(10)),
+        ('sessions in a week', lambda: index.between(latest - np.timedelta64(7, 'D'), latest)),
+    ]:
+        elapsed = best_time(lambda: [query() for _ in range(queries)])
+        print(f"  {label:<26} {elapsed / queries * 1e6:8.1f} us")
+
+
+def benchmark_anomaly(data_dir=None, machines=100):
+    # Rows per second of the anomaly detector over the battery usage and life estimate rows of data_dir, fed to a
+    # fresh detector per machine as on a first import of a fleet
+    from anomaly import AnomalyDetector, read_json_or_default
+    from schema import DATA_VERSION_FILE, read_date_format
+    from storage import get_data_dir
+
+    data_dir = data_dir or get_data_dir()
+    usage = read_json_or_default(os.path.join(data_dir, 'battery-usage.json'), [])
+    estimates = read_json_or_default(os.path.join(data_dir, 'battery-life-estimates.json'), [])
+    date_format = read_date_format(os.path.join(data_dir, DATA_VERSION_FILE))
+
+    def run():
+        for _ in range(machines):
+            detector = AnomalyDetector()
+            detector.feed_battery_usage(usage)
+            detector.feed_life_estimates(estimates, date_format)
+
+    elapsed = best_time(run, 1)
+    rows = (len(usage) + len(estimates)) * machines
+    print(f"{machines} machines x {len(usage) + len(estimates)} rows")
+    print(f"  {'detect':<26} {elapsed:8.2f} s   {rows / elapsed:10.0f} rows/s   "
+          f"{elapsed / machines * 1000:.1f} ms per machine")
+
+
+# Run in a fresh interpreter for every measurement, so nothing is imported or cached yet
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from PyQt6.QtCore import QEvent, QObject
+from PyQt6.QtWidgets import QApplication
+import app
+imported = time.perf_counter()
+
+
+class PaintWatcher(QObject):
+    painted = None
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint and self.painted is None:
+            self.painted = time.perf_counter()
+        return False
+
+
+app.app = QApplication(sys.argv)
+window = app.MainWindow()
+watcher = PaintWatcher()
+window.battery_health_layout.installEventFilter(watcher)
+window.show()
+# The sections are loaded in the background after the window is shown, and added as they are ready
+while watcher.painted is None or window.pending_sections:
+    app.app.processEvents()
+    time.sleep(0.001)
+print(imported - start, watcher.painted - start, time.perf_counter() - start)
+"""
+
+
+def benchmark_startup(data_dir=None, repeat=5):
+    # Time to import the app, to paint the health header of the main window and to fill in every section, on the
+    # offscreen platform
+    import subprocess
+    import sys
+    from storage import DATA_DIR_VARIABLE, get_data_dir
+
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    env[DATA_DIR_VARIABLE] = os.path.abspath(data_dir or get_data_dir())
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env=env, capture_output=True, text=True, check=True).stdout
+        results.append([float(value) for value in output.strip().splitlines()[-1].split()])
+    imported, painted, populated = (sorted(values)[len(values) // 2] for values in zip(*results))
+    print(f"{env[DATA_DIR_VARIABLE]} (median of {repeat})")
+    print(f"  {'import app':<26} {imported * 1000:8.1f} ms")
+    print(f"  {'health header painted':<26} {painted * 1000:8.1f} ms")
+    print(f"  {'all sections shown':<26} {populated * 1000:8.1f} ms")
+
+
+
+def benchmark_loaders(data_dir=None, repeat=5):
+    # The app's section loaders one after another, as the app runs them, versus all at once in a thread pool
+    from PyQt6.QtCore import QCoreApplication, QThreadPool
+    from app import SECTION_LOADERS, SectionLoadSignals, SectionLoadTask
+    from storage import set_data_dir
+
+    if data_dir:
+        set_data_dir(data_dir)
+    application = QCoreApplication.instance() or QCoreApplication([])
+    signals = SectionLoadSignals()
+    failures = []
+    signals.failed.connect(lambda section, error: failures.append(section))
+
+    def load_sequential():
+        for section in SECTION_LOADERS:
+            SectionLoadTask(section, signals).run()
+
+    def load_concurrent():
+        pool = QThreadPool()
+        pool.setMaxThreadCount(len(SECTION_LOADERS))
+        for section in SECTION_LOADERS:
+            pool.start(SectionLoadTask(section, signals))
+        pool.waitForDone()
+
+    sequential = best_time(load_sequential, repeat)
+    concurrent = best_time(load_concurrent, repeat)
+    application.processEvents()
+    print(f"{len(SECTION_LOADERS)} sections (best of {repeat}){', failed: ' + ', '.join(set(failures)) if failures else ''}")
+    print(f"  {'sequential':<12} {sequential * 1000:8.1f} ms")
+    print(f"  {'thread pool':<12} {concurrent * 1000:8.1f} ms  {sequential / concurrent:.2f}x")
+
+
+def benchmark_themes(data_dir=None, repeat=20):
+    # Latency of a theme switch in the loaded main window, painted, with the themes built on every switch as
+    # before versus built once and cached
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+    import app
+    import themes
+    from storage import set_data_dir
+
+    if data_dir:
+        set_data_dir(data_dir)
+    app.app = QApplication.instance() or QApplication([])
+    window = app.MainWindow()
+    window.show()
+    while window.pending_sections:
+        app.app.processEvents()
+        time.sleep(0.001)
+
+    def switch(names, build):
+        for name in names:
+            theme = themes.Theme(name) if build else themes.get_theme(name)
+            themes.apply_theme(app.app, theme)
+            for chart in window.get_charts():
+                themes.style_chart(chart, theme)
+            window.repaint()
+            app.app.processEvents()
+
+    names = ['light', 'dark', 'accent'] * repeat
+    build_time = best_time(lambda: [themes.Theme(name) for name in themes.THEMES], repeat) / len(themes.THEMES)
+    print(f"  {'build':<8} {build_time * 1000:8.2f} ms per theme (palette, stylesheet and chart colours)")
+    for label, build in [('rebuilt', True), ('cached', False)]:
+        switch(names[:3], build)
+        start = time.perf_counter()
+        switch(names, build)
+        print(f"  {label:<8} {(time.perf_counter() - start) / len(names) * 1000:8.2f} ms per switch")
+
+
+
+def benchmark_assets(repeat=10):
+    # Decoding every displayed image, from the sources scaled at runtime versus from the pre-scaled bundle
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QSize
+    from PyQt6.QtGui import QGuiApplication, QImageReader
+    import assets
+
+    application = QGuiApplication.instance() or QGuiApplication([])
+
+    def load_sources():
+        for name, (_, sizes) in assets.ASSETS.items():
+            # What QMovie and QPixmap.scaled do while the app runs: decode every frame and scale it
+            reader = QImageReader(str(assets.get_source_path(name)))
+            reader.setScaledSize(QSize(*sizes[0]))
+            while not reader.read().isNull() and reader.supportsAnimation():
+                pass
+
+    def load_bundle():
+        assets.BUNDLE.clear()
+        for name in assets.ASSETS:
+            assets.get_images(name)
+
+    source_bytes = sum(os.path.getsize(assets.get_source_path(name)) for name in assets.ASSETS)
+    print(f"{len(assets.ASSETS)} assets (best of {repeat})")
+    print(f"  {'sources':<8} {best_time(load_sources, repeat) * 1000:8.2f} ms  {source_bytes / 1024:6.0f} KB read")
+    print(f"  {'bundle':<8} {best_time(load_bundle, repeat) * 1000:8.2f} ms  "
+          f"{os.path.getsize(assets.BUNDLE_PATH) / 1024:6.0f} KB read")
+
+
+
+def benchmark_render(data_dir=None, machines=32, max_workers=None):
+    # Charts per second of render.py over a fleet of copies of one machine, per worker count
+    from render import CHARTS, render_fleet
+    from storage import get_data_dir
+
+    data_dirs = [data_dir or get_data_dir()] * machines
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, *(2 ** i for i in range(1, max_workers.bit_length())), max_workers})
+    print(f"{machines} machines, {machines * len(CHARTS)} charts")
+    baseline = None
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            render_fleet(data_dirs, output_dir, workers=workers)
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"  {workers:>3} workers  {elapsed:6.2f} s  {machines * len(CHARTS) / elapsed:7.1f} charts/s  "
+              f"{baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the report pipeline")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    parsers_parser = subparsers.add_parser('parsers', help="Compare the HTML parser backends")
+    parsers_parser.add_argument('reports', nargs='+', help="battery report HTML files")
+    parsers_parser.add_argument('--repeat', type=int, default=3)
+
+    xml_parser = subparsers.add_parser('xml', help="Compare HTML and XML ingestion of the same report")
+    xml_parser.add_argument('html_report', help="battery-report.html")
+    xml_parser.add_argument('xml_report', help="battery-report.xml")
+    xml_parser.add_argument('--repeat', type=int, default=3)
+
+    parallel_parser = subparsers.add_parser('parallel', help="Scale section extraction across worker processes")
+    parallel_parser.add_argument('report', help="cleaned battery report HTML file")
+    parallel_parser.add_argument('--max-workers', type=int, help="default: number of CPUs")
+    parallel_parser.add_argument('--repeat', type=int, default=3)
+
+    api_parser = subparsers.add_parser('api', help="Requests per second of the local JSON API")
+    api_parser.add_argument('--data', help="data directory")
+    api_parser.add_argument('--requests', type=int, default=20000)
+    api_parser.add_argument('--concurrency', type=int, default=32)
+
+    serializers_parser = subparsers.add_parser('serializers', help="Compare the data file serializers")
+    serializers_parser.add_argument('--data', help="data directory")
+    serializers_parser.add_argument('--repeat', type=int, default=5)
+
+    dates_parser = subparsers.add_parser('dates', help="Inferred versus detected date parsing of long histories")
+    dates_parser.add_argument('--rows', type=int, default=150000)
+    dates_parser.add_argument('--repeat', type=int, default=3)
+
+    memory_parser = subparsers.add_parser('memory', help="Memory footprint of the loaded sections")
+    memory_parser.add_argument('data', nargs='*', help="data directories, one per machine (default: data)")
+    memory_parser.add_argument('--budget', type=float, help="RAM budget in MB")
+
+    sessions_parser = subparsers.add_parser('sessions', help="Discharge session segmentation and queries")
+    sessions_parser.add_argument('--data', help="data directory")
+    sessions_parser.add_argument('--scale', type=int, default=10, help="times the recent usage log is repeated")
+
+    anomaly_parser = subparsers.add_parser('anomaly', help="Throughput of the drain anomaly detector")
+    anomaly_parser.add_argument('--data', help="data directory")
+    anomaly_parser.add_argument('--machines', type=int, default=100)
+
+    startup_parser = subparsers.add_parser('startup', help="Cold start time of the app")
+    startup_parser.add_argument('--data', help="data directory")
+    startup_parser.add_argument('--repeat', type=int, default=5)
+
+    loaders_parser = subparsers.add_parser('loaders', help="Sequential versus concurrent section loading")
+    loaders_parser.add_argument('--data', help="data directory")
+    loaders_parser.add_argument('--repeat', type=int, default=5)
+
+    themes_parser = subparsers.add_parser('themes', help="Theme switch latency of the main window")
+    themes_parser.add_argument('--data', help="data directory")
+    themes_parser.add_argument('--repeat', type=int, default=20)
+
+    assets_parser = subparsers.add_parser('assets', help="Runtime-scaled versus pre-scaled images")
+    assets_parser.add_argument('--repeat', type=int, default=10)
+
+    render_parser = subparsers.add_parser('render', help="Offscreen chart rendering throughput per worker count")
+    render_parser.add_argument('--data', help="data directory of the machine to copy")
+    render_parser.add_argument('--machines', type=int, default=32)
+    render_parser.add_argument('--max-workers', type=int, help="default: number of CPUs")
+
+    args = parser.parse_args()
+    if args.benchmark == 'parsers':
+        benchmark_parsers(args.reports, args.repeat)
+    elif args.benchmark == 'xml':
+        benchmark_xml(args.html_report, args.xml_report, args.repeat)
+    elif args.benchmark == 'parallel':
+        benchmark_parallel(args.report, args.max_workers, args.repeat)
+    elif args.benchmark == 'api':
+        benchmark_api(args.data, args.requests, args.concurrency)
+    elif args.benchmark == 'serializers':
+        benchmark_serializers(args.data, args.repeat)
+    elif args.benchmark == 'dates':
+        benchmark_dates(args.rows, args.repeat)
+    elif args.benchmark == 'memory':
+        benchmark_memory(args.data, args.budget)
+    elif args.benchmark == 'startup':
+        benchmark_startup(args.data, args.repeat)
+    elif args.benchmark == 'sessions':
+        benchmark_sessions(args.data, args.scale)
+    elif args.benchmark == 'anomaly':
+        benchmark_anomaly(args.data, args.machines)
+    elif args.benchmark == 'loaders':
+        benchmark_loaders(args.data, args.repeat)
+    elif args.benchmark == 'themes':
+        benchmark_themes(args.data, args.repeat)
+    elif args.benchmark == 'assets':
+        benchmark_assets(args.repeat)
+    elif args.benchmark == 'render':
+        benchmark_render(args.data, args.machines, args.max_workers)
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import struct
+import zlib
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QImageReader
+
+from assets import ASSETS, BUNDLE_MAGIC, BUNDLE_PATH, BUNDLE_VERSION, get_source_digest, get_source_path
+
+# Build step for assets.py: scales every image of ASSETS to the sizes it is displayed at and writes the compiled
+# bundle. Run it before pyinstaller and again after changing an icon; the app falls back to the source images while
+# the bundle is missing or stale.
+
+
+def read_source_images(source_path):
+    # Every image in the file (the frames of a GIF, the sizes of an ICO), as (QImage, delay in ms)
+    reader = QImageReader(str(source_path))
+    images = []
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        images.append((image, max(reader.nextImageDelay(), 0)))
+        if not reader.supportsAnimation() and not reader.jumpToNextImage():
+            break
+    if not images:
+        raise ValueError(f"Cannot read {source_path}: {reader.errorString()}")
+    return images
+
+
+def scale_image(image, width, height):
+    image = image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+    if image.width() == width and image.height() == height:
+        return image
+    return image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def build_asset(name):
+    # [(QImage, delay)] of one asset: every frame of an animation at its size, or one image per size
+    source_images = read_source_images(get_source_path(name))
+    sizes = ASSETS[name][1]
+    if len(sizes) == 1:
+        width, height = sizes[0]
+        return [(scale_image(image, width, height), delay) for image, delay in source_images]
+
+    images = []
+    for width, height in sizes:
+        # The smallest image of the file that is at least as large, so nothing is scaled up
+        candidates = [image for image, _ in source_images if image.width() >= width and image.height() >= height]
+        source = min(candidates, key=lambda image: image.width()) if candidates else \
+            max((image for image, _ in source_images), key=lambda image: image.width())
+        images.append((scale_image(source, width, height), 0))
+    return images
+
+
+def build_bundle(bundle_path=BUNDLE_PATH):
+    header = {'version': BUNDLE_VERSION, 'assets': {}}
+    chunks = []
+    offset = 0
+    for name in ASSETS:
+        entries = []
+        for image, delay in build_asset(name):
+            stride = image.width() * 4
+            bits = image.constBits()
+            bits.setsize(image.sizeInBytes())
+            # Rows may be padded in memory; only width * 4 bytes of each are stored
+            pixels = b''.join(bytes(bits[row * image.bytesPerLine():row * image.bytesPerLine() + stride])
+                              for row in range(image.height()))
+            chunk = zlib.compress(pixels, 9)
+            entries.append({'width': image.width(), 'height': image.height(), 'delay': delay,
+                            'offset': offset, 'length': len(chunk)})
+            chunks.append(chunk)
+            offset += len(chunk)
+        stat = os.stat(get_source_path(name))
+        header['assets'][name] = {
+            'source': ASSETS[name][0],
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'sha256': get_source_digest(get_source_path(name)),
+            'images': entries,
+        }
+        print(f"{name}: {len(entries)} images from {ASSETS[name][0]}")
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    with open(bundle_path, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+    print(f"Bundle written to {bundle_path} ({os.path.getsize(bundle_path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the pre-scaled asset bundle of the app")
+    parser.add_argument('--output', default=str(BUNDLE_PATH), help="bundle file")
+    args = parser.parse_args()
+
+    build_bundle(args.output)
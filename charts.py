@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from PyQt6.QtCharts import QChart, QDateTimeAxis, QLineSeries, QValueAxis
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QFont
+
+# The history charts, built on any QChart: the window plots them in its chart view and render.py draws them
+# offscreen to image files. Every builder returns the plotted series and the axes it added, or (None, []) when
+# there is nothing to plot; colours are left to themes.style_chart.
+
+
+def get_date_series(x_values, y_values):
+    # Dates are placed at their local time, as QDateTime places a naive datetime; converted in one pass and added
+    # to the series in one call, rather than point by point. Missing and infinite values are skipped, as append
+    # skips them.
+    count = min(len(x_values), len(y_values))
+    dates = pd.DatetimeIndex(x_values[:count])
+    y_values = np.asarray(y_values, dtype=float)[:count]
+    valid = ~dates.isna() & np.isfinite(y_values)
+    series = QLineSeries()
+    series.replace([QPointF(date.timestamp() * 1000, value)
+                    for date, value in zip(dates[valid].to_pydatetime(), y_values[valid])])
+
+    # Customize series
+    series.setPointsVisible(True)
+    return series
+
+
+def add_date_axes(chart, series, y_title):
+    # Create and customize x-axis as QDateTimeAxis
+    axis_x = QDateTimeAxis()
+    axis_x.setTitleText("Date")
+    axis_x.setFormat("dd-MM-yyyy")
+    axis_x.setLabelsAngle(-45)
+    axis_x.setTickCount(10)  # Adjust number of ticks as needed
+
+    # Create and customize y-axis as QValueAxis
+    axis_y = QValueAxis()
+    axis_y.setTitleText(y_title)
+
+    chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
+    chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
+
+    series.attachAxis(axis_x)
+    series.attachAxis(axis_y)
+    return [axis_x, axis_y]
+
+
+def build_capacity_history(chart, capacity_df, animate=True):
+    if capacity_df.empty:
+        chart.setTitle('Battery Capacity History (no data)')
+        return None, []
+
+    series = get_date_series(np.asarray(capacity_df['START DATE']), capacity_df['FULL CHARGE CAPACITY'])
+    chart.addSeries(series)
+    if animate:
+        chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
+    axes = add_date_axes(chart, series, "Full Charge Capacity (mWh)")
+
+    # Customize chart
+    chart.setTitle('Battery Capacity History')
+    chart.setTitleFont(QFont("Arial", 14, QFont.Weight.Bold))
+    return series, axes
+
+
+def build_life_estimates(chart, capacity_df, life_estimates_df, current_estimate_df, state, animate=True):
+    # state: 'active' or 'standby'; the estimates are scaled to the current design capacity estimate
+    if life_estimates_df.empty or current_estimate_df.empty:
+        chart.setTitle('Battery Life Estimates (no data)')
+        return None, []
+
+    if state == 'active':
+        columns_to_plot = ['ACTIVE (FULL CHARGE)', 'ACTIVE (DESIGN CAPACITY)']
+        design_capacity_estimate = current_estimate_df["ACTIVE (DESIGN CAPACITY)"][0]
+        chart.setTitle('Battery Life Estimates (Active)')
+    else:
+        columns_to_plot = ['CONNECTED STANDBY (FULL CHARGE) (time)', 'CONNECTED STANDBY (DESIGN CAPACITY) (time)']
+        design_capacity_estimate = current_estimate_df["CONNECTED STANDBY (DESIGN CAPACITY)"][0]
+        chart.setTitle('Battery Life Estimates (Standby)')
+
+    y_values_in_sec = (life_estimates_df[columns_to_plot[0]] / life_estimates_df[
+        columns_to_plot[1]]) * design_capacity_estimate
+    y_values = y_values_in_sec / 60
+
+    series = get_date_series(np.asarray(capacity_df['START DATE']), y_values)
+    chart.addSeries(series)
+    if animate:
+        chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
+    axes = add_date_axes(chart, series, "Drain Time (in minutes)")
+
+    # Customize chart
+    chart.setTitleFont(QFont("Arial", 14, QFont.Weight.Bold))
+    return series, axes
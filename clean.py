@@ -1,6 +1,8 @@
-def clean_html():
-    input_file = 'battery-report.html'
-    output_file = 'cleaned_battery-report.html'
+from timing import timed_stage
+
+
+@timed_stage
+def clean_html(input_file='battery-report.html', output_file='cleaned_battery-report.html'):
     try:
         with open(input_file, 'r') as infile:
             lines = infile.readlines()
@@ -0,0 +1,270 @@
+import argparse
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from extract import SECTIONS
+from load_json import SECTION_CONVERTERS, load_section_chunks, read_json_file
+from schema import SCHEMAS, TIMESTAMP, DATE, MWH, PERCENT, DURATION
+from storage import get_data_dir
+
+# Rows read, converted and written at a time; memory use depends on this, not on the length of the history
+EXPORT_CHUNK_SIZE = 50000
+
+# Excel worksheets hold at most this many rows, longer sections continue on another sheet
+XLSX_MAX_ROWS = 1048576
+
+EXCEL_EPOCH = np.datetime64('1899-12-30T00:00:00', 's')
+
+
+def get_export_sections(data_dir=None):
+    # (section title, JSON file) of every section present in data_dir
+    data_dir = data_dir or get_data_dir()
+    sections = []
+    for title, _, _, output_json in SECTIONS:
+        json_file = os.path.join(data_dir, output_json)
+        if os.path.exists(json_file):
+            sections.append((title, json_file))
+    return sections
+
+
+def get_column_types(title):
+    if title in SCHEMAS:
+        return dict(SCHEMAS[title])
+    # Key/value sections are exported as two text columns
+    return {}
+
+
+def iter_section_frames(title, json_file, chunk_size=EXPORT_CHUNK_SIZE):
+    if title in SECTION_CONVERTERS:
+        for df in load_section_chunks(json_file, title, chunk_size):
+            # Durations are exported as seconds in every format
+            for column in df.columns:
+                if df[column].dtype.kind == 'm':
+                    df[column] = df[column].dt.total_seconds()
+            yield df
+    else:
+        data = read_json_file(json_file)
+        yield pd.DataFrame([(key, str(value)) for key, value in data.items()], columns=['KEY', 'VALUE'])
+
+
+def get_file_name(title):
+    return title.replace(' ', '-')
+
+
+class CsvExporter:
+    extension = 'csv'
+
+    def __init__(self, output_path):
+        # One file per section: "<output>-<section>.csv"
+        self.base_path = os.path.splitext(output_path)[0]
+        self.file = None
+        self.paths = []
+
+    def begin_section(self, title):
+        path = f"{self.base_path}-{get_file_name(title)}.csv"
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.column_types = get_column_types(title)
+        self.header = True
+        self.paths.append(path)
+
+    def write_frame(self, df):
+        df.to_csv(self.file, header=self.header, index=False, date_format='%Y-%m-%d %H:%M:%S')
+        self.header = False
+
+    def end_section(self):
+        if self.header and self.column_types:
+            # Keep the header for sections without rows
+            pd.DataFrame(columns=list(self.column_types)).to_csv(self.file, index=False)
+        self.file.close()
+        self.file = None
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class ParquetExporter:
+    extension = 'parquet'
+
+    # Arrow type of every schema column type; the schema is fixed up front so all chunks of a section match
+    ARROW_TYPES = {
+        TIMESTAMP: 'timestamp',
+        DATE: 'timestamp',
+        MWH: 'float64',
+        PERCENT: 'float64',
+        DURATION: 'float64',
+    }
+
+    def __init__(self, output_path):
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.base_path = os.path.splitext(output_path)[0]
+        self.writer = None
+        self.paths = []
+
+    def get_arrow_type(self, column_type):
+        arrow_type = self.ARROW_TYPES.get(column_type)
+        if arrow_type == 'timestamp':
+            return self._pyarrow.timestamp('s')
+        if arrow_type == 'float64':
+            return self._pyarrow.float64()
+        return self._pyarrow.string()
+
+    def begin_section(self, title):
+        self.path = f"{self.base_path}-{get_file_name(title)}.parquet"
+        self.column_types = get_column_types(title)
+        self.schema = None
+        self.writer = None
+
+    def open_writer(self, columns):
+        self.schema = self._pyarrow.schema([(column, self.get_arrow_type(self.column_types.get(column)))
+                                            for column in columns])
+        self.writer = self._parquet.ParquetWriter(self.path, self.schema)
+        self.paths.append(self.path)
+
+    def write_frame(self, df):
+        if self.writer is None:
+            self.open_writer(df.columns)
+        self.writer.write_table(self._pyarrow.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def end_section(self):
+        if self.writer is None:
+            # A section without rows is written as a file with its columns and no rows
+            self.open_writer(list(self.column_types) or ['KEY', 'VALUE'])
+            self.writer.write_table(self.schema.empty_table())
+        self.writer.close()
+        self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class XlsxExporter:
+    extension = 'xlsx'
+
+    def __init__(self, output_path):
+        import xlsxwriter
+        # constant_memory writes every row to disk as soon as the next one starts
+        self.workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+        self.date_time_format = self.workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        self.date_format = self.workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        self.duration_format = self.workbook.add_format({'num_format': '[h]:mm:ss'})
+        self.header_format = self.workbook.add_format({'bold': True})
+        self.paths = [output_path]
+
+    def begin_section(self, title):
+        self.title = title
+        self.column_types = get_column_types(title)
+        self.sheet_count = 0
+        self.worksheet = None
+
+    def add_worksheet(self, columns):
+        self.sheet_count += 1
+        name = self.title if self.sheet_count == 1 else f"{self.title[:25]} ({self.sheet_count})"
+        self.worksheet = self.workbook.add_worksheet(name[:31])
+        self.worksheet.write_row(0, 0, columns, self.header_format)
+        self.worksheet.set_column(0, len(columns) - 1, 18)
+        self.row = 1
+
+    def get_column_values(self, series, column_type):
+        # Column -> (values, cell format), with dates as Excel serial days and missing values as None
+        if series.dtype.kind == 'M':
+            values = (series.to_numpy().astype('datetime64[s]') - EXCEL_EPOCH) / np.timedelta64(1, 'D')
+            cell_format = self.date_format if column_type == DATE else self.date_time_format
+            return [None if np.isnan(value) else value for value in values.tolist()], cell_format
+        if column_type == DURATION:
+            values = series.to_numpy(dtype=float, na_value=np.nan) / 86400
+            return [None if np.isnan(value) else value for value in values.tolist()], self.duration_format
+        if series.dtype.kind in 'iuf':
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            return [None if np.isnan(value) else value for value in values.tolist()], None
+        return [None if pd.isna(value) else str(value) for value in series.tolist()], None
+
+    def write_frame(self, df):
+        columns = [self.get_column_values(df[column], self.column_types.get(column)) for column in df.columns]
+        for i in range(len(df)):
+            if self.worksheet is None or self.row == XLSX_MAX_ROWS:
+                self.add_worksheet(list(df.columns))
+            for column_index, (values, cell_format) in enumerate(columns):
+                value = values[i]
+                if value is None:
+                    continue
+                if isinstance(value, str):
+                    self.worksheet.write_string(self.row, column_index, value)
+                else:
+                    self.worksheet.write_number(self.row, column_index, value, cell_format)
+            self.row += 1
+
+    def end_section(self):
+        if self.worksheet is None:
+            # Keep a sheet with the header for empty sections
+            self.add_worksheet(['KEY', 'VALUE'] if not self.column_types else list(self.column_types))
+
+    def close(self):
+        self.workbook.close()
+
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'parquet': ParquetExporter,
+    'xlsx': XlsxExporter,
+}
+
+
+# Optional packages needed by some formats; CSV only needs pandas
+FORMAT_MODULES = {
+    'parquet': 'pyarrow',
+    'xlsx': 'xlsxwriter',
+}
+
+
+def get_available_formats():
+    available = []
+    for name in EXPORTERS:
+        try:
+            if name in FORMAT_MODULES:
+                __import__(FORMAT_MODULES[name])
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def export_data(output_path, export_format='csv', data_dir=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Stream every section of data_dir to output_path; returns the files written
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    exporter = EXPORTERS[export_format](output_path)
+    try:
+        for title, json_file in get_export_sections(data_dir):
+            print(f'Exporting {title}')
+            exporter.begin_section(title)
+            for df in iter_section_frames(title, json_file, chunk_size):
+                exporter.write_frame(df)
+            exporter.end_section()
+    finally:
+        exporter.close()
+
+    print(f"Data successfully exported to {', '.join(exporter.paths)}")
+    return exporter.paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export every extracted section to CSV, Parquet or Excel")
+    parser.add_argument('format', choices=list(EXPORTERS))
+    parser.add_argument('output', nargs='?', help="output file; CSV and Parquet write one file per section next to it")
+    parser.add_argument('--data', help="data directory")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    output = args.output or f"battery-data-{datetime.date.today().isoformat()}.{EXPORTERS[args.format].extension}"
+    export_data(output, args.format, args.data, args.chunk_size)
@@ -1,38 +1,71 @@
-import json
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from bs4 import BeautifulSoup
+from parsers import BACKENDS, get_backend, parse_file
+from schema import DATA_VERSION, DATA_VERSION_FILE, SUMMARY_FILE, get_decoders, decode_row, build_summary, \
+    detect_date_format, get_date_sequences, resolve_timestamps
+from storage import get_data_path, save_data, set_data_dir
+from timing import observe_stage, timed_stage
 
 
-def extract_battery_report(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
-
+def get_table(backend, document, header_text, tag='h2'):
     # Find the header with the specific text
-    header = soup.find('h1', string=lambda text: text and header_text in text)
-    if not header:
+    header = backend.find(document, tag, text=header_text)
+    if header is None:
         print(f"Header '{header_text}' not found.")
         return
 
     # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
+    table = backend.find_next(header, 'table')
+    if table is None:
         print("No table found after the header.")
         return
 
+    return table
+
+
+def get_period(backend, cell):
+    # "<span class="date">START </span>- END": the start date has its own span, the rest of the cell is the end date
+    text = backend.get_text(cell).strip()
+    date_span = backend.find(cell, 'span', class_='date')
+    if date_span is not None:
+        start_date = backend.get_text(date_span).strip()
+    else:
+        start_date = text.split()[0] if text else ''
+    end_date = text[len(start_date):].strip().lstrip('-').strip()
+    return start_date, end_date
+
+
+def get_estimate(backend, cell):
+    # Connected standby estimates are "<div>TIME</div><span>DRAIN % / 16 h</span>", or "-" without data
+    time_div = backend.find(cell, 'div')
+    drain_span = backend.find(cell, 'span')
+    time = backend.get_text(time_div if time_div is not None else cell, strip=True)
+    drain = backend.get_text(drain_span, strip=True) if drain_span is not None else None
+    return time, drain
+
+
+def parse_battery_report(backend, document, header_text):
+    table = get_table(backend, document, header_text, tag='h1')
+    if table is None:
+        return
+
     # Extract details from the table
     details = {}
-    rows = table.find_all('tr')
+    rows = backend.find_all(table, 'tr')
     if not rows:
         print("No rows found.")
         return
 
     for row in rows:
-        label_cell = row.find('td', class_='label')
-        value_cell = label_cell.find_next('td') if label_cell else None
-        if label_cell and value_cell:
-            label = label_cell.get_text(strip=True)
-            value = value_cell.get_text(strip=True)
+        label_cell = backend.find(row, 'td', class_='label')
+        value_cell = backend.find_next(label_cell, 'td') if label_cell is not None else None
+        if label_cell is not None and value_cell is not None:
+            label = backend.get_text(label_cell, strip=True)
+            # The report time is written as a date span and a time span
+            value = backend.get_text(value_cell, strip=True, separator=' ')
             details[label] = value
 
     # Print the extracted details
@@ -42,40 +75,23 @@ def extract_battery_report(file_path, header_text):
     # else:
     #     print("No details found.")
 
-    # Save data to JSON file
-    output_json = "data/battery-report.json"
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(details, json_file, ensure_ascii=False, indent=4)
-
-    print(f"Data successfully saved to {output_json}")
-
+    return details
 
-def extract_installed_batteries(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
 
-    # Find the header with the specific text
-    header = soup.find('h2', string=lambda text: text and header_text in text)
-    # header = soup.find('h2', string=header_text)
-    if not header:
-        print(f"Header '{header_text}' not found.")
-        return
-
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
+def parse_installed_batteries(backend, document, header_text):
+    table = get_table(backend, document, header_text)
+    if table is None:
         return
 
     # Extract details from the table
     details = {}
-    rows = table.find_all('tr')
+    rows = backend.find_all(table, 'tr')
     for row in rows:
-        label_cell = row.find('span', class_='label')
-        value_cell = label_cell.find_next('td') if label_cell else None
-        if label_cell and value_cell:
-            label = label_cell.get_text(strip=True)
-            value = value_cell.get_text(strip=True)
+        label_cell = backend.find(row, 'span', class_='label')
+        value_cell = backend.find_next(label_cell, 'td') if label_cell is not None else None
+        if label_cell is not None and value_cell is not None:
+            label = backend.get_text(label_cell, strip=True)
+            value = backend.get_text(value_cell, strip=True)
             details[label] = value
 
     # Print the extracted details
@@ -84,394 +100,378 @@ def extract_installed_batteries(file_path, header_text):
     # else:
     #     print("No rows found.")
 
-    # Save data to JSON file
-    output_json = "data/installed-batteries.json"
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(details, json_file, ensure_ascii=False, indent=4)
+    return details
 
-    print(f"Data successfully saved to {output_json}")
-
-
-def extract_recent_usage(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
 
-    # Find the header with the specific text
-    header = soup.find('h2', string=lambda text: text and header_text in text)
-    if not header:
-        print(f"Header '{header_text}' not found.")
+def parse_usage(backend, document, header_text, section):
+    table = get_table(backend, document, header_text)
+    if table is None:
         return
 
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
-        return
-
-    # Extract details from the table
-    rows = table.find_all('tr')
+    rows = backend.find_all(table, 'tr')
     if not rows:
         print("No rows found.")
         return
 
-    # Extracting the table headers
-    headers = [th.get_text(strip=True) for th in rows[0].find_all('td')]
-
-    # Adjust headers to account for the ENERGY DRAINED column
-    headers[3] = "CAPACITY REMAINING (%)"
-    headers.append("CAPACITY REMAINING (mWh)")
-
-    # Extracting the table data
+    # START TIME, STATE, SOURCE or DURATION, then the percent and mWh halves of the last column
+    decoders = get_decoders(section)
     data = []
     current_date = ""
     for row in rows[1:]:
-        cells = row.find_all('td')
-        if len(cells) == 1 and 'colspan' in cells[0].attrs:  # Skip rows with single cell and colspan attribute
+        cells = backend.find_all(row, 'td')
+        if not cells or (len(cells) == 1 and 'colspan' in backend.attrs(cells[0])):
+            # Skip rows with single cell and colspan attribute
             continue
-        cell_data = []
-        for i, cell in enumerate(cells):
-            # Extracting date and time if span elements are present
-            if i == 0:  # The first column contains the date and time
-                date_span = cell.find('span', class_='date')
-                time_span = cell.find('span', class_='time')
-                if date_span and date_span.get_text(strip=True):
-                    current_date = date_span.get_text(strip=True)
-                date_time = f"{current_date} {time_span.get_text(strip=True)}" if time_span else current_date
-                cell_data.append(date_time.strip())
-            elif i == 3:  # The fourth column contains percentage
-                percent = cell.get_text(strip=True).split('%')[0].strip() + ' %'
-                cell_data.append(percent)
-            elif i == 4:  # The fifth column contains mWh
-                mwh = cell.get_text(strip=True).replace(',', '').split(' ')[0].strip() + ' mWh'
-                cell_data.append(mwh)
-            else:
-                cell_data.append(cell.get_text(strip=True))
 
-        if cell_data:
-            # Check for ENERGY DRAINED (mWh) column value
-            if len(cell_data) == len(headers) - 1:
-                cell_data.append("0 mWh")
-            data.append(dict(zip(headers, cell_data)))
+        # The date is only written on the first entry of each day
+        date_span = backend.find(cells[0], 'span', class_='date')
+        time_span = backend.find(cells[0], 'span', class_='time')
+        if date_span is not None and backend.get_text(date_span, strip=True):
+            current_date = backend.get_text(date_span, strip=True)
+        date_time = f"{current_date} {backend.get_text(time_span, strip=True)}" if time_span is not None else current_date
 
-    # Print the extracted details
-    # for entry in data:
-    #     print(entry)
+        values = [date_time] + [backend.get_text(cell, strip=True) for cell in cells[1:]]
+        if len(values) == len(decoders) - 1:
+            # No mWh column on this row
+            values.append(0)
+        data.append(decode_row(decoders, values))
 
-    # Save data to JSON file
-    output_json = os.path.join("data", header_text.split(' ')[0].lower() + "-usage.json")
-    os.makedirs(os.path.dirname(output_json), exist_ok=True)
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
+    return data
 
-    print(f"Data successfully saved to {output_json}")
 
+def parse_recent_usage(backend, document, header_text):
+    return parse_usage(backend, document, header_text, 'recent usage')
 
-def extract_battery_usage(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
 
-    # Find the header with the specific text
-    header = soup.find('h2', string=lambda text: text and header_text in text)
-    if not header:
-        print(f"Header '{header_text}' not found.")
-        return
+def parse_battery_usage(backend, document, header_text):
+    return parse_usage(backend, document, header_text, 'battery usage')
 
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
+
+def parse_usage_history(backend, document, header_text):
+    table = get_table(backend, document, header_text)
+    if table is None:
         return
 
-    # Extract details from the table
-    rows = table.find_all('tr')
+    rows = backend.find_all(table, 'tr')
     if not rows:
         print("No rows found.")
         return
 
-    # Extracting the table headers
-    headers = [th.get_text(strip=True) for th in rows[0].find_all('td')]
-
-    # Adjust headers to account for the ENERGY DRAINED column
-    headers[3] = "ENERGY DRAINED (%)"
-    headers.append("ENERGY DRAINED (mWh)")
-
-    # Extracting the table data
+    # PERIOD, battery ACTIVE and CONNECTED STANDBY, a column break, then AC ACTIVE and CONNECTED STANDBY; the data
+    # starts after the two header rows
+    decoders = get_decoders('usage history')
     data = []
-    current_date = ""
-    for row in rows[1:]:
-        cells = row.find_all('td')
-        if len(cells) == 1 and 'colspan' in cells[0].attrs:  # Skip rows with single cell and colspan attribute
+    for row in rows[2:]:
+        cells = backend.find_all(row, 'td')
+        if len(cells) < 6:
             continue
-        cell_data = []
-        for i, cell in enumerate(cells):
-            # Extracting date and time if span elements are present
-            if i == 0:  # The first column contains the date and time
-                date_span = cell.find('span', class_='date')
-                time_span = cell.find('span', class_='time')
-                if date_span and date_span.get_text(strip=True):
-                    current_date = date_span.get_text(strip=True)
-                date_time = f"{current_date} {time_span.get_text(strip=True)}" if time_span else current_date
-                cell_data.append(date_time.strip())
-            elif i == 3:  # The fourth column contains percentage
-                percent = cell.get_text(strip=True).split('%')[0].strip() + ' %'
-                cell_data.append(percent)
-            elif i == 4:  # The fifth column contains mWh
-                mwh = cell.get_text(strip=True).replace(',', '').split(' ')[0].strip() + ' mWh'
-                cell_data.append(mwh)
-            else:
-                cell_data.append(cell.get_text(strip=True))
-
-        if cell_data:
-            # Check for ENERGY DRAINED (mWh) column value
-            if len(cell_data) == len(headers) - 1:
-                cell_data.append("0 mWh")
-            data.append(dict(zip(headers, cell_data)))
+        start_date, end_date = get_period(backend, cells[0])
+        values = [start_date, end_date] + [backend.get_text(cells[i], strip=True) for i in (1, 2, 4, 5)]
+        data.append(decode_row(decoders, values))
 
-    # Print the extracted details
-    # for entry in data:
-    #     print(entry)
-
-    # Save data to JSON file
-    output_json = os.path.join("data", header_text.split(' ')[0].lower() + "-usage.json")
-    os.makedirs(os.path.dirname(output_json), exist_ok=True)
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
-
-    print(f"Data successfully saved to {output_json}")
+    return data
 
 
-def extract_usage_history(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
-
-    # Find the header with the specific text
-    header = soup.find('h2', string=lambda text: text and header_text in text)
-    if not header:
-        print(f"Header '{header_text}' not found.")
+def parse_battery_capacity_history(backend, document, header_text):
+    table = get_table(backend, document, header_text)
+    if table is None:
         return
 
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
-        return
-
-    # Extract details from the table
-    rows = table.find_all('tr')
+    rows = backend.find_all(table, 'tr')
     if not rows:
         print("No rows found.")
         return
 
-    # Extracting the table headers
-    headers = [th.get_text(strip=True) for th in rows[1].find_all('td')]
-
-    # Extracting the table data
+    # PERIOD, FULL CHARGE CAPACITY, DESIGN CAPACITY
+    decoders = get_decoders('battery capacity history')
     data = []
-    for row in rows[2:]:
-        cells = row.find_all('td')
-        cell_data = [cell.get_text(strip=True) for cell in cells]
-        data.append(cell_data)
-
-    # Print the extracted details
-    # for entry in data:
-    #     print(dict(zip(headers, entry)))
-
-    # Save data to JSON file
-    output_json = "data/usage-history.json"
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
-
-    print(f"Data successfully saved to {output_json}")
+    for row in rows[1:]:
+        cells = backend.find_all(row, 'td')
+        if len(cells) < 3:
+            continue
+        start_date, end_date = get_period(backend, cells[0])
+        values = [start_date, end_date, backend.get_text(cells[1], strip=True), backend.get_text(cells[2], strip=True)]
+        data.append(decode_row(decoders, values))
 
+    return data
 
-def extract_battery_capacity_history(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
 
-    # Find the header with the specific text
-    header = soup.find('h2', string=lambda text: text and header_text in text)
-    if not header:
-        print(f"Header '{header_text}' not found.")
+def parse_battery_life_estimates(backend, document, header_text):
+    table = get_table(backend, document, header_text)
+    if table is None:
         return
 
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
-        return
-
-    # Extract details from the table
-    rows = table.find_all('tr')
+    # Find all rows in the table
+    rows = backend.find_all(table, 'tr')[2:]  # Skipping the first two header rows
     if not rows:
         print("No rows found.")
         return
 
-    # Extracting the table headers
-    headers = [th.get_text(strip=True) for th in rows[0].find_all('td')]
+    # PERIOD, then ACTIVE and CONNECTED STANDBY at full charge and, after a column break, at design capacity
+    decoders = get_decoders('battery life estimates')
+    data = []
+    for row in rows:
+        columns = backend.find_all(row, 'td')
+        if len(columns) < 6:
+            continue
+        start_date, end_date = get_period(backend, columns[0])
+        standby_full_charge, standby_full_charge_drain = get_estimate(backend, columns[2])
+        standby_design_capacity, standby_design_capacity_drain = get_estimate(backend, columns[5])
+        values = [
+            start_date,
+            end_date,
+            backend.get_text(columns[1], strip=True),
+            standby_full_charge,
+            standby_full_charge_drain,
+            backend.get_text(columns[4], strip=True),
+            standby_design_capacity,
+            standby_design_capacity_drain,
+        ]
+        data.append(decode_row(decoders, values))
+
+    return data
+
+
+def parse_current_battery_life_estimates(backend, document, div_text):
+    table = get_table(backend, document, div_text, tag='div')
+    if table is None:
+        return
 
-    # Extracting the table data
+    # Find the rows in the table
+    rows = backend.find_all(table, 'tr', class_='even')
+
+    decoders = get_decoders('current battery life estimates')
     data = []
-    for row in rows[1:]:
-        cells = row.find_all('td')
-        cell_data = [cell.get_text(strip=True) for cell in cells]
-        data.append(cell_data)
+    for row in rows:
+        cells = backend.find_all(row, 'td')
+        if len(cells) < 6:
+            continue
+        values = [
+            backend.get_text(cells[1], strip=True),
+            get_estimate(backend, cells[2])[0],
+            backend.get_text(cells[4], strip=True),
+            get_estimate(backend, cells[5])[0],
+        ]
+        data.append(decode_row(decoders, values))
+
+    return data
 
-    # Print the extracted details
-    # for entry in data:
-    #     print(dict(zip(headers, entry)))
 
-    # Save data to JSON file
-    output_json = "data/battery-capacity-history.json"
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
+def save_json(data, output_json):
+    # Save data to JSON file, replacing it atomically (see storage.py)
+    save_data(data, output_json)
 
     print(f"Data successfully saved to {output_json}")
 
 
-def extract_battery_life_estimates(file_path, header_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
+def save_summary(sections, summary_file=None):
+    save_json(build_summary(sections), summary_file or get_data_path(SUMMARY_FILE))
 
-    # Find the header with the specific text
-    header = soup.find('h2', string=lambda text: text and header_text in text)
-    if not header:
-        print(f"Header '{header_text}' not found.")
-        return
 
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
-        return
+def save_data_version(date_format=None):
+    # Written after every collection, so data in an older layout is detected and regenerated. The date format of
+    # the report is stored with it, so the loaders parse the dates with it instead of guessing.
+    save_json({'version': DATA_VERSION, 'date_format': date_format}, get_data_path(DATA_VERSION_FILE))
 
-    # Find all rows in the table
-    rows = table.find_all('tr')[2:]  # Skipping the first two header rows
-    if not rows:
-        print("No rows found.")
-        return
 
-    # Initialize a list to hold the extracted data
-    data = []
+def get_usage_output_json(header_text):
+    return header_text.split(' ')[0].lower() + "-usage.json"
+
+
+# Section title, parse function, header text and output file (in the data directory) for every section of the report
+SECTIONS = [
+    ('battery report', parse_battery_report, 'Battery report', "battery-report.json"),
+    ('installed batteries', parse_installed_batteries, 'Installed batteries', "installed-batteries.json"),
+    ('recent usage', parse_recent_usage, 'Recent usage', get_usage_output_json('Recent usage')),
+    ('battery usage', parse_battery_usage, 'Battery usage', get_usage_output_json('Battery usage')),
+    ('usage history', parse_usage_history, 'Usage history', "usage-history.json"),
+    ('battery capacity history', parse_battery_capacity_history, 'Battery capacity history',
+     "battery-capacity-history.json"),
+    ('battery life estimates', parse_battery_life_estimates, 'Battery life estimates',
+     "battery-life-estimates.json"),
+    ('current battery life estimates', parse_current_battery_life_estimates,
+     'Current estimate of battery life based on all observed drains since OS install',
+     "current-battery-life-estimate.json"),
+]
+
+
+# Sections with long tables, decoded in worker processes when extracting in parallel
+HEAVY_SECTIONS = ['Usage history', 'Battery capacity history', 'Battery life estimates', 'Recent usage',
+                  'Battery usage']
+
+# Reports larger than this are extracted in parallel by default
+PARALLEL_EXTRACT_SIZE = 4 * 1024 * 1024
+
+HEADER_PATTERN = re.compile(r'<h([12])\b[^>]*>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+
+
+def split_sections(markup):
+    # Cut the report at every <h1>/<h2> so each section can be parsed on its own; header text -> markup region
+    headers = list(HEADER_PATTERN.finditer(markup))
+    regions = {}
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(markup)
+        for _, _, header_text, _ in SECTIONS:
+            if header_text in match.group(2) and header_text not in regions:
+                regions[header_text] = markup[match.start():end]
+
+    # The current estimate is introduced by a <div> inside the battery life estimates section
+    div_text = SECTIONS[-1][2]
+    position = markup.find(div_text)
+    if position != -1:
+        start = markup.rfind('<div', 0, position)
+        following = [match.start() for match in headers if match.start() > position]
+        regions[div_text] = markup[start:following[0] if following else len(markup)]
+
+    return regions
+
+
+def get_stage_name(title):
+    # Metrics stage of a section, named like its extract_* function: "battery usage" -> "extract_battery_usage"
+    return 'extract_' + title.replace(' ', '_')
+
+
+def parse_section(backend, document, section):
+    # Parse one section; returns (data, seconds it took)
+    _, parse_function, header_text, _ = section
+    start = time.perf_counter()
+    data = parse_function(backend, document, header_text)
+    return data, time.perf_counter() - start
+
+
+def parse_section_region(backend_name, section_index, region):
+    # Runs in a worker process: parse one section region with a fresh backend. The duration is returned to the
+    # parent, whose metrics are the ones exported.
+    backend = get_backend(backend_name)
+    return parse_section(backend, backend.parse(region), SECTIONS[section_index])
+
+
+def parse_sections(markup, backend=None, workers=1):
+    # Section title -> section data, in SECTIONS order
+    if backend is None:
+        backend = get_backend()
+
+    if workers == 1:
+        document = backend.parse(markup)
+        results = {}
+        for section in SECTIONS:
+            results[section[0]], elapsed = parse_section(backend, document, section)
+            observe_stage(get_stage_name(section[0]), elapsed)
+        return results
+
+    regions = split_sections(markup)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Submit the largest regions first so the pool stays busy until the end
+        heavy = sorted((index for index, section in enumerate(SECTIONS) if section[2] in HEAVY_SECTIONS),
+                       key=lambda index: -len(regions.get(SECTIONS[index][2], '')))
+        futures = {SECTIONS[index][0]: executor.submit(parse_section_region, backend.name, index,
+                                                       regions[SECTIONS[index][2]])
+                   for index in heavy if SECTIONS[index][2] in regions}
+
+        # The light sections are parsed here while the workers run
+        for section in SECTIONS:
+            title, _, header_text, _ = section
+            if title in futures:
+                continue
+            if header_text in regions:
+                results[title], elapsed = parse_section(backend, backend.parse(regions[header_text]), section)
+                observe_stage(get_stage_name(title), elapsed)
+            else:
+                print(f"Header '{header_text}' not found.")
+                results[title] = None
+
+        for title, future in futures.items():
+            results[title], elapsed = future.result()
+            observe_stage(get_stage_name(title), elapsed)
 
-    # Loop through each row and extract the columns
-    for row in rows:
-        columns = row.find_all('td')
+    return {title: results[title] for title, _, _, _ in SECTIONS}
 
-        period = columns[0].text.strip()
-        active_full_charge = columns[1].text.strip()
 
-        connected_standby_full_charge = columns[2].text.strip()
+def extract_section(file_path, parse_function, header_text, output_json, backend=None):
+    if backend is None:
+        backend = get_backend()
+    data = parse_function(backend, parse_file(file_path, backend), header_text)
+    if data is not None:
+        save_json(data, get_data_path(output_json))
 
-        connected_standby_full_charge_drain = columns[2].find('span')
-        if connected_standby_full_charge_drain:
-            connected_standby_full_charge_drain = connected_standby_full_charge_drain.text
-        else:
-            connected_standby_full_charge_drain = ""
 
-        active_design_capacity = columns[4].text.strip()
+@timed_stage
+def extract_battery_report(file_path, header_text, backend=None):
+    extract_section(file_path, parse_battery_report, header_text, "battery-report.json", backend)
 
-        connected_standby_design_capacity = columns[5].text.strip()
 
-        connected_standby_design_capacity_drain = columns[5].find('span')
+@timed_stage
+def extract_installed_batteries(file_path, header_text, backend=None):
+    extract_section(file_path, parse_installed_batteries, header_text, "installed-batteries.json", backend)
 
-        if connected_standby_design_capacity_drain:
-            connected_standby_design_capacity_drain = connected_standby_design_capacity_drain.text
-        else:
-            connected_standby_design_capacity_drain = ""
 
-        # Append the extracted data to the list
-        data.append({
-            'PERIOD': period,
-            'ACTIVE (FULL CHARGE)': active_full_charge,
-            'CONNECTED STANDBY (FULL CHARGE)': connected_standby_full_charge,
-            'CONNECTED STANDBY (FULL CHARGE) DRAIN': connected_standby_full_charge_drain,
-            'ACTIVE (DESIGN CAPACITY)': active_design_capacity,
-            'CONNECTED STANDBY (DESIGN CAPACITY)': connected_standby_design_capacity,
-            'CONNECTED STANDBY (DESIGN CAPACITY) DRAIN': connected_standby_design_capacity_drain,
-        })
+@timed_stage
+def extract_recent_usage(file_path, header_text, backend=None):
+    extract_section(file_path, parse_recent_usage, header_text, get_usage_output_json(header_text), backend)
 
-    # Print the extracted data
-    # for entry in data:
-    #     print(entry)
 
-    # Save data to JSON file
-    output_json = "data/battery-life-estimates.json"
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
+@timed_stage
+def extract_battery_usage(file_path, header_text, backend=None):
+    extract_section(file_path, parse_battery_usage, header_text, get_usage_output_json(header_text), backend)
 
-    print(f"Data successfully saved to {output_json}")
 
+@timed_stage
+def extract_usage_history(file_path, header_text, backend=None):
+    extract_section(file_path, parse_usage_history, header_text, "usage-history.json", backend)
 
-def extract_current_battery_life_estimates(file_path, div_text):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
 
-    # Find the header with the specific text
-    header = soup.find('div', string=lambda text: text and div_text in text)
-    if not header:
-        print(f"Header '{div_text}' not found.")
-        return
+@timed_stage
+def extract_battery_capacity_history(file_path, header_text, backend=None):
+    extract_section(file_path, parse_battery_capacity_history, header_text, "battery-capacity-history.json",
+                    backend)
 
-    # Find the next table after the header
-    table = header.find_next('table')
-    if not table:
-        print("No table found after the header.")
-        return
 
-    # Find the rows in the table
-    rows = table.find_all('tr', class_='even')
+@timed_stage
+def extract_battery_life_estimates(file_path, header_text, backend=None):
+    extract_section(file_path, parse_battery_life_estimates, header_text, "battery-life-estimates.json", backend)
 
-    data = []
 
-    for row in rows:
-        # Extract the text from each cell in the row
-        cells = row.find_all('td')
-
-        # Extract data with proper checks
-        active_full_charge = cells[1].get_text(strip=True)
-        connected_standby_full_charge = cells[2].div.get_text(strip=True)
-        active_design_capacity = cells[4].get_text(strip=True)
-        connected_standby_design_capacity = cells[5].div.get_text(strip=True)
-
-        data.append({
-            'ACTIVE (FULL CHARGE)': active_full_charge,
-            'CONNECTED STANDBY (FULL CHARGE)': connected_standby_full_charge,
-            'ACTIVE (DESIGN CAPACITY)': active_design_capacity,
-            'CONNECTED STANDBY (DESIGN CAPACITY)': connected_standby_design_capacity,
-        })
-
-    # Print the extracted data
-    # for entry in data:
-    #     print(entry)
-
-    # Save data to JSON file
-    output_json = "data/current-battery-life-estimate.json"
-    with open(output_json, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, ensure_ascii=False, indent=4)
+@timed_stage
+def extract_current_battery_life_estimates(file_path, div_text, backend=None):
+    extract_section(file_path, parse_current_battery_life_estimates, div_text,
+                    "current-battery-life-estimate.json", backend)
 
-    print(f"Data successfully saved to {output_json}")
 
+@timed_stage
+def extract_data(file_path='cleaned_battery-report.html', backend=None, workers=None):
+    if backend is None:
+        backend = get_backend()
+    with open(file_path, 'r', encoding='utf-8') as file:
+        markup = file.read()
+
+    # Large reports are split into sections which are decoded concurrently
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(HEAVY_SECTIONS)) if len(markup) > PARALLEL_EXTRACT_SIZE else 1
 
-def extract_data():
-    file_path = 'cleaned_battery-report.html'
-    print('Extracting battery report')
-    extract_battery_report(file_path, 'Battery report')
-    print('Extracting installed batteries')
-    extract_installed_batteries(file_path, 'Installed batteries')
-    print('Extracting recent usage')
-    extract_recent_usage(file_path, 'Recent usage')
-    print('Extracting battery usage')
-    extract_battery_usage(file_path, 'Battery usage')
-    print('Extracting usage history')
-    extract_usage_history(file_path, 'Usage history')
-    print('Extracting battery capacity history')
-    extract_battery_capacity_history(file_path, 'Battery capacity history')
-    print('Extracting battery life estimates')
-    extract_battery_life_estimates(file_path, 'Battery life estimates')
-    print('Extracting current battery life estimates')
-    extract_current_battery_life_estimates(file_path,
-                                           'Current estimate of battery life based on all observed drains since OS install')
+    print(f'Extracting {len(SECTIONS)} sections with {workers} worker(s)')
+    sections = parse_sections(markup, backend, workers)
+    # Timestamps in another format than ISO are only decoded once the report's date format is known
+    date_format = detect_date_format(get_date_sequences(sections))
+    resolve_timestamps(sections, date_format)
+    for title, _, _, output_json in SECTIONS:
+        if sections[title] is not None:
+            save_json(sections[title], get_data_path(output_json))
+    save_summary(sections)
+    save_data_version(date_format)
 
 
 if __name__ == "__main__":
-    extract_data()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract the battery report sections to the data directory")
+    parser.add_argument('report', nargs='?', default='cleaned_battery-report.html')
+    parser.add_argument('--backend', choices=BACKENDS, help="HTML parser backend (default: fastest installed)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: automatic by report size)")
+    parser.add_argument('--data', help="data directory (default: data, or $BATTERY_REPORT_DATA_DIR)")
+    args = parser.parse_args()
+
+    if args.data:
+        set_data_dir(args.data)
+
+    extract_data(args.report, get_backend(args.backend), args.workers)
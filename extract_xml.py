@@ -0,0 +1,277 @@
+import xml.etree.ElementTree as ET
+
+from extract import SECTIONS, save_json, save_summary, save_data_version
+from schema import ISO_DATE_FORMAT, get_decoders, decode_row, decode_duration
+from storage import get_data_path
+from timing import timed_stage
+
+# `powercfg /batteryreport /xml` writes raw values (mWh, ISO 8601 timestamps and durations) under stable element
+# names. The functions below stream through it once and decode the same typed rows (schema.py) the HTML extractors
+# produce, so the loaders and the UI cannot tell which path the data came from.
+
+# Recent usage entry types, as shown in the STATE column of the HTML report
+ENTRY_STATES = {
+    'Active': 'Active',
+    'ConnectedStandby': 'Connected standby',
+    'CsEnter': 'Connected standby',
+    'CsExit': 'Active',
+    'Standby': 'Suspended',
+    'Suspend': 'Suspended',
+    'Hibernate': 'Hibernate',
+    'ReportGenerated': 'Report generated',
+}
+
+# Connected standby drain is reported per 16 hours, like the HTML report
+STANDBY_DRAIN_HOURS = 16
+
+
+def local_name(tag):
+    # Strip the "{namespace}" prefix ElementTree adds to every tag
+    return tag.rpartition('}')[2]
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_timestamp(value):
+    # "2024-06-04T10:11:12.345" -> "2024-06-04 10:11:12"
+    return (value or '').replace('T', ' ')[:19]
+
+
+def format_date(value):
+    return (value or '')[:10]
+
+
+def format_mwh(value):
+    return f"{value:,} mWh" if value is not None else '-'
+
+
+def get_estimate(time, energy, capacity):
+    # Runtime on a full battery of `capacity` mWh at the drain rate observed over `time` seconds
+    if not time or not energy or not capacity:
+        return None
+    return time * capacity / energy
+
+
+def read_xml_report(file_path):
+    report = {'information': {}, 'system': {}, 'batteries': [], 'estimates': {}, 'usage': [], 'history': []}
+
+    # Names and elements of the ancestors of the current element
+    path = []
+    elements = []
+    for event, element in ET.iterparse(file_path, events=('start', 'end')):
+        name = local_name(element.tag)
+        if event == 'start':
+            if name == 'Battery':
+                report['batteries'].append({})
+            path.append(name)
+            elements.append(element)
+            continue
+
+        path.pop()
+        elements.pop()
+        parent = path[-1] if path else None
+        if name == 'UsageEntry':
+            report['usage'].append(dict(element.attrib))
+        elif name == 'HistoryEntry':
+            report['history'].append(dict(element.attrib))
+        elif parent == 'ReportInformation':
+            report['information'][name] = element.text
+        elif parent == 'SystemInformation':
+            report['system'][name] = element.text
+        elif parent == 'Battery':
+            report['batteries'][-1][name] = element.text
+        elif parent in ('FullChargeCapacity', 'DesignCapacity') and len(path) >= 2 and path[-2] == 'RuntimeEstimates':
+            report['estimates'][(parent, name)] = element.text
+        else:
+            continue
+
+        # Elements are dropped as soon as they are read, so memory stays flat on long histories
+        elements[-1].remove(element)
+
+    return report
+
+
+def get_battery_report(report):
+    system = report['system']
+    return {
+        'COMPUTER NAME': system.get('ComputerName') or '',
+        'SYSTEM PRODUCT NAME': ' '.join(filter(None, [system.get('SystemManufacturer'),
+                                                      system.get('SystemProductName')])),
+        'BIOS': ' '.join(filter(None, [system.get('BIOSVersion'), system.get('BIOSDate')])),
+        'OS BUILD': system.get('OSBuild') or '',
+        'PLATFORM ROLE': system.get('PlatformRole') or '',
+        'CONNECTED STANDBY': 'Supported' if system.get('ConnectedStandby') == '1' else 'Not supported',
+        'REPORT TIME': format_timestamp(report['information'].get('LocalScanTime')
+                                        or report['information'].get('ScanTime')),
+    }
+
+
+def get_installed_batteries(report):
+    if not report['batteries']:
+        return {}
+
+    # The HTML extractor keeps the first battery column, do the same
+    battery = report['batteries'][0]
+    return {
+        'NAME': battery.get('Id') or '',
+        'MANUFACTURER': battery.get('Manufacturer') or '',
+        'SERIAL NUMBER': battery.get('SerialNumber') or '',
+        'CHEMISTRY': battery.get('Chemistry') or '',
+        'DESIGN CAPACITY': format_mwh(parse_int(battery.get('DesignCapacity'))),
+        'FULL CHARGE CAPACITY': format_mwh(parse_int(battery.get('FullChargeCapacity'))),
+        'CYCLE COUNT': battery.get('CycleCount') or '-',
+    }
+
+
+def get_percent(part, whole):
+    # Whole percents, as shown in the HTML report
+    return round(part * 100 / whole) if part is not None and whole else None
+
+
+def get_recent_usage(report):
+    decoders = get_decoders('recent usage')
+    data = []
+    for entry in report['usage']:
+        data.append(decode_row(decoders, [
+            entry.get('LocalTimestamp') or entry.get('Timestamp'),
+            ENTRY_STATES.get(entry.get('EntryType'), entry.get('EntryType') or ''),
+            'AC' if entry.get('Ac') == '1' else 'Battery',
+            get_percent(parse_int(entry.get('ChargeCapacity')), parse_int(entry.get('FullChargeCapacity'))),
+            entry.get('ChargeCapacity'),
+        ]))
+    return data
+
+
+def get_battery_usage(report):
+    # Battery usage is the recent usage while on battery, with the energy drained during each entry
+    decoders = get_decoders('battery usage')
+    data = []
+    for entry in report['usage']:
+        if entry.get('Ac') == '1':
+            continue
+        data.append(decode_row(decoders, [
+            entry.get('LocalTimestamp') or entry.get('Timestamp'),
+            ENTRY_STATES.get(entry.get('EntryType'), entry.get('EntryType') or ''),
+            decode_duration(entry.get('Duration')) or 0,
+            get_percent(parse_int(entry.get('Discharge')), parse_int(entry.get('FullChargeCapacity'))),
+            entry.get('Discharge'),
+        ]))
+    return data
+
+
+def get_period(entry):
+    start_date = format_date(entry.get('LocalStartDate') or entry.get('StartDate'))
+    end_date = format_date(entry.get('LocalEndDate') or entry.get('EndDate'))
+    return start_date, end_date
+
+
+def get_duration(value):
+    # The report leaves empty durations blank ("-") rather than showing 0:00:00
+    return decode_duration(value) or None
+
+
+def get_usage_history(report):
+    decoders = get_decoders('usage history')
+    data = []
+    for entry in report['history']:
+        data.append(decode_row(decoders, [
+            *get_period(entry),
+            get_duration(entry.get('ActiveDcTime')),
+            get_duration(entry.get('CsDcTime')),
+            get_duration(entry.get('ActiveAcTime')),
+            get_duration(entry.get('CsAcTime')),
+        ]))
+    return data
+
+
+def get_battery_capacity_history(report):
+    decoders = get_decoders('battery capacity history')
+    data = []
+    for entry in report['history']:
+        data.append(decode_row(decoders, [
+            *get_period(entry),
+            entry.get('FullChargeCapacity'),
+            entry.get('DesignCapacity'),
+        ]))
+    return data
+
+
+def get_standby_estimate(time, energy, capacity):
+    # Estimated runtime in seconds, and the drain in % of the capacity per STANDBY_DRAIN_HOURS
+    estimate = get_estimate(time, energy, capacity)
+    if estimate is None:
+        return None, None
+    return estimate, round(energy * STANDBY_DRAIN_HOURS * 3600 * 100 / (time * capacity))
+
+
+def get_battery_life_estimates(report):
+    decoders = get_decoders('battery life estimates')
+    data = []
+    for entry in report['history']:
+        full_charge_capacity = parse_int(entry.get('FullChargeCapacity'))
+        design_capacity = parse_int(entry.get('DesignCapacity'))
+        active_time = decode_duration(entry.get('ActiveDcTime'))
+        active_energy = parse_int(entry.get('ActiveDcEnergy'))
+        standby_time = decode_duration(entry.get('CsDcTime'))
+        standby_energy = parse_int(entry.get('CsDcEnergy'))
+
+        data.append(decode_row(decoders, [
+            *get_period(entry),
+            get_estimate(active_time, active_energy, full_charge_capacity),
+            *get_standby_estimate(standby_time, standby_energy, full_charge_capacity),
+            get_estimate(active_time, active_energy, design_capacity),
+            *get_standby_estimate(standby_time, standby_energy, design_capacity),
+        ]))
+    return data
+
+
+def get_current_battery_life_estimates(report):
+    estimates = report['estimates']
+    if not estimates:
+        return []
+    return [decode_row(get_decoders('current battery life estimates'), [
+        get_duration(estimates.get(('FullChargeCapacity', 'ActiveRuntime'))),
+        get_duration(estimates.get(('FullChargeCapacity', 'ConnectedStandbyRuntime'))),
+        get_duration(estimates.get(('DesignCapacity', 'ActiveRuntime'))),
+        get_duration(estimates.get(('DesignCapacity', 'ConnectedStandbyRuntime'))),
+    ])]
+
+
+# Section builders, in the same order as extract.SECTIONS
+XML_SECTIONS = [
+    get_battery_report,
+    get_installed_batteries,
+    get_recent_usage,
+    get_battery_usage,
+    get_usage_history,
+    get_battery_capacity_history,
+    get_battery_life_estimates,
+    get_current_battery_life_estimates,
+]
+
+
+def parse_xml_report(file_path):
+    # Section title -> section data, for every section extract.py produces
+    report = read_xml_report(file_path)
+    return {section[0]: get_section(report) for section, get_section in zip(SECTIONS, XML_SECTIONS)}
+
+
+@timed_stage
+def extract_xml_data(file_path='battery-report.xml'):
+    print('Reading XML battery report')
+    sections = parse_xml_report(file_path)
+    for title, _, _, output_json in SECTIONS:
+        print(f'Extracting {title}')
+        save_json(sections[title], get_data_path(output_json))
+    save_summary(sections)
+    # Dates are taken from the ISO timestamps of the XML report
+    save_data_version(ISO_DATE_FORMAT)
+
+
+if __name__ == "__main__":
+    extract_xml_data()
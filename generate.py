@@ -1,10 +1,16 @@
 import subprocess
 
+from timing import timed_stage
 
-def generate_battery_report():
+
+@timed_stage
+def generate_battery_report(xml=False):
     try:
-        # Run the command 'powercfg /batteryreport'
-        result = subprocess.run(['powercfg', '/batteryreport'], capture_output=True, text=True, shell=True)
+        # Run the command 'powercfg /batteryreport', or 'powercfg /batteryreport /xml' for the raw XML report
+        command = ['powercfg', '/batteryreport']
+        if xml:
+            command += ['/xml', '/output', 'battery-report.xml']
+        result = subprocess.run(command, capture_output=True, text=True)
 
         # Check if the command was successful
         if result.returncode == 0:
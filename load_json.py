@@ -1,173 +1,302 @@
 import json
-import pandas as pd
+import os
 import numpy as np
+import pandas as pd
+
+from schema import SCHEMAS, TEXT, DATE, TIMESTAMP, MWH, PERCENT, DURATION, DATA_VERSION_FILE, get_columns, \
+    get_date_columns, detect_date_format, read_date_format
+from timing import timed_stage
 
 
 def read_json_file(file_path):
-    with open(file_path, 'r') as file:
+    with open(file_path, 'r', encoding='utf-8') as file:
         data = json.load(file)
     return data
 
 
-def load_capacity_history_from_json(json_file):
-    with open(json_file, 'r') as f:
-        data = json.load(f)
+def iter_json_rows(json_file, chunk_size=10000, block_size=1024 * 1024):
+    # Yield the elements of a top-level JSON array in lists of up to chunk_size, reading the file block by block,
+    # so arbitrarily long sections never have to be held in memory at once. The elements are objects or arrays.
+    decoder = json.JSONDecoder()
+    with open(json_file, 'r', encoding='utf-8') as file:
+        buffer = file.read(block_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{json_file} does not contain a JSON array")
+        position = 1
+        rows = []
+        end_of_file = False
+        while True:
+            # Skip the whitespace and the comma between two elements
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                break
+            try:
+                if position >= len(buffer):
+                    raise ValueError("Incomplete buffer")
+                row, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if end_of_file:
+                    raise
+                block = file.read(block_size)
+                end_of_file = not block
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+
+def load_section_from_json(json_file, section):
+    # Rows are already typed by the extractors (see schema.py), only the DataFrame has to be built
+    data = read_json_file(json_file)
+    return pd.DataFrame(data or [], columns=get_columns(section))
+
+
+def get_date_format(json_file, df=None):
+    # The format detected when the report was extracted, stored next to the data; data extracted before the format
+    # was stored is detected from its own dates
+    date_format = read_date_format(os.path.join(os.path.dirname(json_file), DATA_VERSION_FILE))
+    if date_format is None and df is not None and 'START DATE' in df:
+        dates = [date for pair in zip(df['START DATE'], df['END DATE']) for date in pair if date is not None]
+        date_format = detect_date_format([dates]) if dates else None
+    return date_format
+
+
+class ArrowDateParser:
+    # pyarrow's strptime runs over the whole column in C++, about ten times faster than pandas for formats other
+    # than ISO
+    name = 'pyarrow'
+
+    def __init__(self):
+        import pyarrow
+        import pyarrow.compute
+        self._pyarrow = pyarrow
+        self._compute = pyarrow.compute
+
+    def parse(self, series, date_format):
+        values = self._pyarrow.array(series.tolist(), type=self._pyarrow.string())
+        dates = self._compute.strptime(values, format=date_format, unit='s', error_is_null=True)
+        return pd.Series(dates.to_numpy(zero_copy_only=False).astype('datetime64[ns]'), index=series.index,
+                         name=series.name)
+
+
+class PandasDateParser:
+    name = 'pandas'
+
+    def parse(self, series, date_format):
+        return pd.to_datetime(series, format=date_format, errors='coerce')
+
+
+DATE_PARSERS = {
+    'pyarrow': ArrowDateParser,
+    'pandas': PandasDateParser,
+}
+
+
+def get_available_date_parsers():
+    available = []
+    for name, parser_class in DATE_PARSERS.items():
+        try:
+            parser_class()
+        except ImportError:
+            continue
+        available.append(name)
+    return available
 
-    capacity_history = []
-    for entry in data:
-        start_date = entry[0].split('\n')[0]  # Extracting the period from the first element
+
+def get_date_parser(name=None):
+    if name is not None:
+        return DATE_PARSERS[name]()
+
+    # Use the fastest parser that is installed
+    for parser_class in DATE_PARSERS.values():
         try:
-            end_date = entry[0].split('\n')[1]
-        except:
-            end_date = ""
-        full_charge_capacity = float(
-            entry[1].replace(' mWh', '').replace(',', ''))  # Extracting and converting full charge capacity
-        design_capacity = float(
-            entry[2].replace(' mWh', '').replace(',', ''))  # Extracting and converting design capacity
+            return parser_class()
+        except ImportError:
+            continue
 
-        capacity_history.append(
-            {'START DATE': start_date, 'END DATE': end_date, 'FULL CHARGE CAPACITY': full_charge_capacity,
-             'DESIGN CAPACITY': design_capacity})
 
-    capacity_history_df = pd.DataFrame(capacity_history)
-    capacity_history_df['START DATE'] = pd.to_datetime(capacity_history_df['START DATE'])
-    capacity_history_df['END DATE'] = pd.to_datetime(capacity_history_df['END DATE'])
-    return capacity_history_df
+DATE_PARSER = get_date_parser()
 
 
-def load_life_estimates_from_json(json_file):
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-
-    # Create a DataFrame from the list of dictionaries
-    df = pd.DataFrame(data)
-
-    # Clean up the 'PERIOD' column to make it more readable
-    df['PERIOD'] = df['PERIOD'].str.replace('\n', ' ')
-
-    # Separate 'PERIOD' into 'START DATE' and 'END DATE'
-    df[['START DATE', 'END DATE']] = df['PERIOD'].str.split(' - ', expand=True)
-    df.drop(columns=['PERIOD'], inplace=True)
-
-    df['CONNECTED STANDBY (FULL CHARGE) DRAIN (%)'] = df['CONNECTED STANDBY (FULL CHARGE) DRAIN'].str.extract(
-        r'(\d+ %)')
-    df['CONNECTED STANDBY (FULL CHARGE) (time)'] = df['CONNECTED STANDBY (FULL CHARGE)'].str.extract(
-        r'(\d{1,2}:\d{2}:\d{2})')
-    df.drop(columns=['CONNECTED STANDBY (FULL CHARGE)'], inplace=True)
-    df.drop(columns=['CONNECTED STANDBY (FULL CHARGE) DRAIN'], inplace=True)
-
-    df['CONNECTED STANDBY (DESIGN CAPACITY) DRAIN (%)'] = df['CONNECTED STANDBY (DESIGN CAPACITY) DRAIN'].str.extract(
-        r'(\d+ %)')
-    df['CONNECTED STANDBY (DESIGN CAPACITY) (time)'] = df['CONNECTED STANDBY (DESIGN CAPACITY)'].str.extract(
-        r'(\d{1,2}:\d{2}:\d{2})')
-    df.drop(columns=['CONNECTED STANDBY (DESIGN CAPACITY)'], inplace=True)
-    df.drop(columns=['CONNECTED STANDBY (DESIGN CAPACITY) DRAIN'], inplace=True)
-
-    df['START DATE'] = pd.to_datetime(df['START DATE'])
-    df['END DATE'] = pd.to_datetime(df['END DATE'])
-
-    # Function to preprocess time data
-    def preprocess_time(time_str):
-        if isinstance(time_str, float) and np.isnan(time_str):
-            return np.nan  # Return NaN if the value is NaN
-        components = time_str.split(':')
-        total_hours = int(components[0])
-        days = int(total_hours // 24)  # Calculate number of days
-        hours = int(total_hours % 24)  # Extract remaining hours
-        minutes = int(components[1])
-        seconds = int(components[2])
-        # return f'{days} days {hours:02d}:{minutes:02d}:{seconds:02d}'
-        return int(((days * 24 + hours) * 60 + minutes) * 60 + seconds)
-
-    # Apply preprocessing function to time column
-    df['ACTIVE (FULL CHARGE)'] = df['ACTIVE (FULL CHARGE)'].apply(preprocess_time)
-    df['ACTIVE (DESIGN CAPACITY)'] = df['ACTIVE (DESIGN CAPACITY)'].apply(preprocess_time)
-    df['CONNECTED STANDBY (FULL CHARGE) (time)'] = df['CONNECTED STANDBY (FULL CHARGE) (time)'].apply(preprocess_time)
-    df['CONNECTED STANDBY (DESIGN CAPACITY) (time)'] = df['CONNECTED STANDBY (DESIGN CAPACITY) (time)'].apply(preprocess_time)
+def parse_dates(series, date_format=None):
+    # One fixed format for the whole column instead of guessing it, which misreads day-first dates. Dates that do
+    # not match become NaT. Without a format (no dates could be detected) pandas infers it.
+    if date_format is None:
+        return pd.to_datetime(series, errors='coerce')
+    return DATE_PARSER.parse(series, date_format)
+
 
+def convert_dates(df, date_format=None):
+    for column in ['START DATE', 'END DATE']:
+        df[column] = parse_dates(df[column], date_format)
     return df
 
 
-def load_recent_usage_from_json(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def parse_timestamps(series):
+    # Seconds since the epoch -> datetime; timestamps stored as text because they could not be read become NaT
+    return pd.to_datetime(pd.to_numeric(series, errors='coerce'), unit='s')
+
 
-    # Create a DataFrame from the list of dictionaries
-    df = pd.DataFrame(data)
+def convert_recent_usage(df, date_format=None):
+    df['START TIME'] = parse_timestamps(df['START TIME'])
 
-    # Convert 'START TIME' to datetime
-    df['START TIME'] = pd.to_datetime(df['START TIME'], format='%Y-%m-%d %H:%M:%S')
+    # Replace missing values with 0; a column without any value is read as objects, so it is made numeric first
+    df['CAPACITY REMAINING (%)'] = pd.to_numeric(df['CAPACITY REMAINING (%)']).fillna(0)
+    df['CAPACITY REMAINING (mWh)'] = pd.to_numeric(df['CAPACITY REMAINING (mWh)']).fillna(0)
 
-    # Clean up the 'CAPACITY REMAINING (%)' column
-    df['CAPACITY REMAINING (%)'] = df['CAPACITY REMAINING (%)'].str.replace(' %', '')
-    df['CAPACITY REMAINING (%)'] = pd.to_numeric(df['CAPACITY REMAINING (%)'], errors='coerce')
+    return df
 
-    # Clean up the 'CAPACITY REMAINING (mWh)' column
-    df['CAPACITY REMAINING (mWh)'] = df['CAPACITY REMAINING (mWh)'].str.replace(' mWh', '').str.replace(',', '')
-    df['CAPACITY REMAINING (mWh)'] = pd.to_numeric(df['CAPACITY REMAINING (mWh)'], errors='coerce')
 
-    # Replace NaN values with 0 or any appropriate placeholder
-    df['CAPACITY REMAINING (%)'] = df['CAPACITY REMAINING (%)'].fillna(0)
-    df['CAPACITY REMAINING (mWh)'] = df['CAPACITY REMAINING (mWh)'].fillna(0)
+def convert_battery_usage(df, date_format=None):
+    df['START TIME'] = parse_timestamps(df['START TIME'])
+    df['DURATION'] = pd.to_timedelta(df['DURATION'], unit='s')
+
+    # Replace missing values with 0; a column without any value is read as objects, so it is made numeric first
+    df['ENERGY DRAINED (%)'] = pd.to_numeric(df['ENERGY DRAINED (%)']).fillna(0)
+    df['ENERGY DRAINED (mWh)'] = pd.to_numeric(df['ENERGY DRAINED (mWh)']).fillna(0)
 
     return df
 
 
-def load_battery_usage_from_json(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+# Section title -> conversion of the raw typed rows into the columns the UI works with
+SECTION_CONVERTERS = {
+    'recent usage': convert_recent_usage,
+    'battery usage': convert_battery_usage,
+    'usage history': convert_dates,
+    'battery capacity history': convert_dates,
+    'battery life estimates': convert_dates,
+    'current battery life estimates': lambda df, date_format=None: df,
+}
+
+
+# Loaded sections use compact dtypes, so many machines' data fits in one process:
+#   text                  -> category (STATE and SOURCE take a handful of values)
+#   percent               -> float32
+#   mWh, duration seconds -> int32, or float32 when values are missing (exact up to 2**24, far above any report)
+#   date, timestamp       -> datetime64[ns] and durations -> timedelta64[ns], int64 underneath
+# Columns whose values would not survive the narrower dtype keep a 64-bit one.
+INT32_MAX = np.iinfo(np.int32).max
+FLOAT32_EXACT_MAX = 2 ** 24
+
+
+def compact_integers(series):
+    values = series.astype('float64')
+    largest = values.abs().max()
+    if not values.isna().any() and not largest > INT32_MAX:
+        return values.astype('int32')
+    if not largest > FLOAT32_EXACT_MAX:
+        return values.astype('float32')
+    return values
+
+
+def compact_column(series, column_type):
+    if column_type == TEXT:
+        return series.astype('category')
+    if series.dtype.kind in 'mM':
+        return series
+    if column_type == PERCENT:
+        return series.astype('float32')
+    return compact_integers(series)
+
+
+def validate_frame(df, section):
+    # Raises ValueError when a loaded section does not match its schema
+    columns = get_columns(section)
+    if list(df.columns) != columns:
+        raise ValueError(f"{section}: expected columns {columns}, got {list(df.columns)}")
+    for column, column_type in SCHEMAS[section]:
+        values = df[column]
+        if column_type in (DATE, TIMESTAMP):
+            valid = values.dtype.kind == 'M'
+        elif column_type == TEXT:
+            # Checked in one pass of pandas' type inference rather than value by value
+            valid = isinstance(values.dtype, pd.CategoricalDtype) or \
+                pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty')
+        elif column_type == DURATION and values.dtype.kind == 'm':
+            valid = True
+        else:
+            valid = values.dtype.kind in 'iuf' or values.isna().all()
+        if not valid:
+            raise ValueError(f"{section}: column {column} has dtype {values.dtype}, expected {column_type} values")
+
+
+def compact_frame(df, section):
+    validate_frame(df, section)
+    for column, column_type in SCHEMAS[section]:
+        df[column] = compact_column(df[column], column_type)
+    return df
 
-    # Create a DataFrame from the list of dictionaries
-    df = pd.DataFrame(data)
 
-    # Convert 'START TIME' to datetime
-    df['START TIME'] = pd.to_datetime(df['START TIME'], format='%Y-%m-%d %H:%M:%S')
+def compact_chunk(df, section):
+    # The chunks of a section are compacted to dtypes picked from the schema alone, not from the values of each
+    # chunk, so every chunk of a section has the same dtypes: mWh and duration seconds use the nullable Int64,
+    # which holds missing values and any size. A chunk is at most chunk_size rows, so the wider integers cost little.
+    validate_frame(df, section)
+    for column, column_type in SCHEMAS[section]:
+        if column_type in (MWH, DURATION) and df[column].dtype.kind != 'm':
+            df[column] = df[column].astype('Int64')
+        else:
+            df[column] = compact_column(df[column], column_type)
+    return df
 
-    # Convert 'DURATION' to timedelta
-    df['DURATION'] = pd.to_timedelta(df['DURATION'])
 
-    # Clean up the 'ENERGY DRAINED (%)' column
-    df['ENERGY DRAINED (%)'] = df['ENERGY DRAINED (%)'].str.replace(' %', '')
-    df['ENERGY DRAINED (%)'] = pd.to_numeric(df['ENERGY DRAINED (%)'], errors='coerce')
+def get_memory_usage(df):
+    # Bytes held by the frame, including the strings of object and category columns
+    return int(df.memory_usage(deep=True).sum())
 
-    # Clean up the 'ENERGY DRAINED (mWh)' column
-    df['ENERGY DRAINED (mWh)'] = df['ENERGY DRAINED (mWh)'].str.replace(' mWh', '').str.replace(',', '')
-    df['ENERGY DRAINED (mWh)'] = pd.to_numeric(df['ENERGY DRAINED (mWh)'], errors='coerce')
 
-    # Replace NaN values with 0 or any appropriate placeholder
-    df['ENERGY DRAINED (%)'] = df['ENERGY DRAINED (%)'].fillna(0)
-    df['ENERGY DRAINED (mWh)'] = df['ENERGY DRAINED (mWh)'].fillna(0)
+def load_section(json_file, section, compact=True):
+    df = load_section_from_json(json_file, section)
+    date_format = get_date_format(json_file, df) if get_date_columns(section) else None
+    df = SECTION_CONVERTERS[section](df, date_format)
+    return compact_frame(df, section) if compact else df
 
-    return df
 
-def load_current_battery_life_estimate_from_json(json_file):
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Create a DataFrame from the list of dictionaries
-    df = pd.DataFrame(data)
-
-    # Function to preprocess time data
-    def preprocess_time(time_str):
-        if isinstance(time_str, float) and np.isnan(time_str):
-            return np.nan  # Return NaN if the value is NaN
-        components = time_str.split(':')
-        total_hours = int(components[0])
-        days = int(total_hours // 24)  # Calculate number of days
-        hours = int(total_hours % 24)  # Extract remaining hours
-        minutes = int(components[1])
-        seconds = int(components[2])
-        # return f'{days} days {hours:02d}:{minutes:02d}:{seconds:02d}'
-        return int(((days * 24 + hours) * 60 + minutes) * 60 + seconds)
-
-    # Apply preprocessing function to time column
-    df['ACTIVE (FULL CHARGE)'] = df['ACTIVE (FULL CHARGE)'].apply(preprocess_time)
-    df['CONNECTED STANDBY (FULL CHARGE)'] = df['CONNECTED STANDBY (FULL CHARGE)'].apply(preprocess_time)
-    df['ACTIVE (DESIGN CAPACITY)'] = df['ACTIVE (DESIGN CAPACITY)'].apply(preprocess_time)
-    df['CONNECTED STANDBY (DESIGN CAPACITY)'] = df['CONNECTED STANDBY (DESIGN CAPACITY)'].apply(
-        preprocess_time)
+def load_section_chunks(json_file, section, chunk_size=10000):
+    # Same frames as the loaders below, chunk_size rows at a time; the date format is resolved once, from the first
+    # chunk when it was not stored
+    date_format = get_date_format(json_file)
+    for rows in iter_json_rows(json_file, chunk_size):
+        df = pd.DataFrame(rows, columns=get_columns(section))
+        if date_format is None:
+            date_format = get_date_format(json_file, df)
+        yield compact_chunk(SECTION_CONVERTERS[section](df, date_format), section)
 
-    return df
+
+@timed_stage
+def load_capacity_history_from_json(json_file):
+    return load_section(json_file, 'battery capacity history')
+
+
+@timed_stage
+def load_life_estimates_from_json(json_file):
+    return load_section(json_file, 'battery life estimates')
+
+
+@timed_stage
+def load_recent_usage_from_json(json_file):
+    return load_section(json_file, 'recent usage')
+
+
+@timed_stage
+def load_battery_usage_from_json(json_file):
+    return load_section(json_file, 'battery usage')
+
+
+@timed_stage
+def load_usage_history_from_json(json_file):
+    return load_section(json_file, 'usage history')
+
+
+@timed_stage
+def load_current_battery_life_estimate_from_json(json_file):
+    return load_section(json_file, 'current battery life estimates')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+import argparse
+import math
+import os
+import threading
+import time
+
+from load_json import read_json_file, load_capacity_history_from_json, load_life_estimates_from_json, \
+    load_recent_usage_from_json, load_battery_usage_from_json, load_usage_history_from_json, \
+    load_current_battery_life_estimate_from_json
+from schema import decode_mwh
+from sources import get_report_source
+from storage import get_data_dir, get_data_path
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+# Prometheus exporter: serves the battery gauges below and the pipeline stage durations recorded by timing.py.
+# The gauges are updated every --interval seconds from the live battery state and data/, and the full pipeline
+# only runs every --pipeline-interval seconds, never per scrape.
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+UPDATE_INTERVAL = 15
+PIPELINE_INTERVAL = 3600
+
+
+class BatteryMetrics:
+    def __init__(self, report_source):
+        self.report_source = report_source
+        self.percent = prometheus_client.Gauge('battery_percent', "Current charge of the battery in percent")
+        self.plugged = prometheus_client.Gauge('battery_plugged', "1 when the charger is plugged in")
+        self.seconds_left = prometheus_client.Gauge('battery_seconds_left',
+                                                     "Estimated time left on battery, NaN when charging or unknown")
+        self.design_capacity = prometheus_client.Gauge('battery_design_capacity_mwh', "Design capacity in mWh")
+        self.full_charge_capacity = prometheus_client.Gauge('battery_full_charge_capacity_mwh',
+                                                            "Full charge capacity in mWh")
+        self.health = prometheus_client.Gauge('battery_health_percent',
+                                              "Full charge capacity as a percent of the design capacity")
+        self.last_pipeline_run = prometheus_client.Gauge('battery_report_last_run_timestamp_seconds',
+                                                         "Time the report pipeline last ran")
+
+    def update_live(self):
+        # Cheap: one psutil or sysfs read
+        battery_info = self.report_source.get_current_battery_info()
+        if battery_info is None:
+            for gauge in (self.percent, self.plugged, self.seconds_left):
+                gauge.set(math.nan)
+            return
+        self.percent.set(battery_info['Percent'])
+        self.plugged.set(1 if battery_info['Plugged in'] == 'Yes' else 0)
+        seconds_left = battery_info['Seconds left']
+        self.seconds_left.set(seconds_left.total_seconds() if hasattr(seconds_left, 'total_seconds') else math.nan)
+
+    def update_capacity(self):
+        try:
+            battery_data = read_json_file(get_data_path('installed-batteries.json'))
+        except (OSError, ValueError) as e:
+            print("Error reading installed batteries:", e)
+            return
+        design_capacity = decode_mwh(battery_data.get('DESIGN CAPACITY'))
+        full_charge_capacity = decode_mwh(battery_data.get('FULL CHARGE CAPACITY'))
+        self.design_capacity.set(design_capacity if design_capacity is not None else math.nan)
+        self.full_charge_capacity.set(full_charge_capacity if full_charge_capacity is not None else math.nan)
+        if design_capacity and full_charge_capacity is not None:
+            self.health.set(full_charge_capacity / design_capacity * 100)
+        else:
+            self.health.set(math.nan)
+
+    def run_pipeline(self):
+        # Generate and extract the report, then load every section as the app does, timing each stage
+        os.makedirs(get_data_dir(), exist_ok=True)
+        self.report_source.collect()
+        loaders = [
+            (load_recent_usage_from_json, get_data_path('recent-usage.json')),
+            (load_battery_usage_from_json, get_data_path('battery-usage.json')),
+            (load_usage_history_from_json, get_data_path('usage-history.json')),
+            (load_capacity_history_from_json, get_data_path('battery-capacity-history.json')),
+            (load_life_estimates_from_json, get_data_path('battery-life-estimates.json')),
+            (load_current_battery_life_estimate_from_json, get_data_path('current-battery-life-estimate.json')),
+        ]
+        for loader, json_file in loaders:
+            if os.path.exists(json_file):
+                loader(json_file)
+        self.last_pipeline_run.set_to_current_time()
+
+
+def run_exporter(host=METRICS_HOST, port=METRICS_PORT, interval=UPDATE_INTERVAL, pipeline_interval=PIPELINE_INTERVAL,
+                 stop_event=None):
+    report_source = get_report_source()
+    metrics = BatteryMetrics(report_source)
+    prometheus_client.start_http_server(port, addr=host)
+    print(f"Serving metrics on http://{host}:{port}/metrics ({report_source.name} source)")
+
+    stop_event = stop_event or threading.Event()
+    next_pipeline_run = time.monotonic()
+    while not stop_event.is_set():
+        if pipeline_interval > 0 and time.monotonic() >= next_pipeline_run:
+            # Any failure (powercfg, a malformed report, a loader) is reported and the exporter keeps serving the
+            # gauges; the pipeline is tried again at its next run
+            try:
+                metrics.run_pipeline()
+            except Exception as e:
+                print("Error running the report pipeline:", e)
+            next_pipeline_run = time.monotonic() + pipeline_interval
+        try:
+            metrics.update_live()
+            metrics.update_capacity()
+        except Exception as e:
+            print("Error updating the battery gauges:", e)
+        stop_event.wait(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export battery health and pipeline timings to Prometheus")
+    parser.add_argument('--host', default=METRICS_HOST)
+    parser.add_argument('--port', type=int, default=METRICS_PORT)
+    parser.add_argument('--interval', type=float, default=UPDATE_INTERVAL,
+                        help="seconds between updates of the battery gauges")
+    parser.add_argument('--pipeline-interval', type=float, default=PIPELINE_INTERVAL,
+                        help="seconds between runs of the report pipeline; 0 only reads the existing data")
+    args = parser.parse_args()
+
+    if prometheus_client is None:
+        print("The metrics exporter needs prometheus_client: pip install prometheus-client")
+    else:
+        try:
+            run_exporter(args.host, args.port, args.interval, args.pipeline_interval)
+        except KeyboardInterrupt:
+            print("Stopping")
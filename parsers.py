@@ -0,0 +1,210 @@
+from bs4 import BeautifulSoup
+
+# Each backend exposes the same small set of queries the extractors need, working directly on the backend's own
+# node objects (no wrapper per node), and reproduces BeautifulSoup's text semantics so every backend yields
+# identical section data:
+#   parse(markup)                        -> root node
+#   find(node, tag, class_=None, text=None)
+#                                        -> first descendant element, optionally with a CSS class and/or whose
+#                                           single string contains `text` (like soup.find(string=...))
+#   find_all(node, tag, class_=None)     -> all descendant elements
+#   find_next(node, tag)                 -> first element after the start of `node` in document order
+#   get_text(node, strip=False, separator='')
+#                                        -> Tag.get_text(separator, strip=True) when strip, Tag.get_text(separator)
+#                                           otherwise
+#   attrs(node)                          -> attribute dict
+
+
+def _has_class(class_value, class_):
+    return class_ is None or (class_value is not None and class_ in class_value.split())
+
+
+class SoupBackend:
+    name = 'html.parser'
+
+    def parse(self, markup):
+        return BeautifulSoup(markup, 'html.parser')
+
+    def find(self, node, tag, class_=None, text=None):
+        kwargs = {}
+        if class_ is not None:
+            kwargs['class_'] = class_
+        if text is not None:
+            kwargs['string'] = lambda string: string and text in string
+        return node.find(tag, **kwargs)
+
+    def find_all(self, node, tag, class_=None):
+        if class_ is not None:
+            return node.find_all(tag, class_=class_)
+        return node.find_all(tag)
+
+    def find_next(self, node, tag):
+        return node.find_next(tag)
+
+    def get_text(self, node, strip=False, separator=''):
+        return node.get_text(separator, strip=True) if strip else node.get_text(separator)
+
+    def attrs(self, node):
+        return node.attrs
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        self._lxml_html = lxml.html
+
+    def parse(self, markup):
+        return self._lxml_html.document_fromstring(markup)
+
+    def _string(self, node):
+        # Equivalent of Tag.string: the text of an element with exactly one child, followed recursively
+        children = list(node)
+        if not children:
+            return node.text
+        if len(children) == 1 and not node.text and not children[0].tail and isinstance(children[0].tag, str):
+            return self._string(children[0])
+        return None
+
+    def find(self, node, tag, class_=None, text=None):
+        for element in node.iterdescendants(tag):
+            if not _has_class(element.get('class'), class_):
+                continue
+            if text is not None:
+                string = self._string(element)
+                if not (string and text in string):
+                    continue
+            return element
+        return None
+
+    def find_all(self, node, tag, class_=None):
+        if class_ is None:
+            return list(node.iterdescendants(tag))
+        return [element for element in node.iterdescendants(tag) if _has_class(element.get('class'), class_)]
+
+    def find_next(self, node, tag):
+        for element in node.iterdescendants(tag):
+            return element
+        following = node.xpath(f'following::{tag}[1]')
+        return following[0] if following else None
+
+    def get_text(self, node, strip=False, separator=''):
+        strings = node.xpath('.//text()')
+        if strip:
+            return separator.join(stripped for stripped in (string.strip() for string in strings) if stripped)
+        return separator.join(strings)
+
+    def attrs(self, node):
+        return dict(node.attrib)
+
+
+class LexborBackend:
+    name = 'lexbor'
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, markup):
+        return self._parser(markup).root
+
+    def _string(self, node):
+        # Equivalent of Tag.string: the text of an element with exactly one child, followed recursively
+        children = list(node.iter(include_text=True))
+        if len(children) != 1:
+            return None
+        child = children[0]
+        if child.tag == '-text':
+            return child.text_content
+        if child.tag.startswith('-'):
+            return None
+        return self._string(child)
+
+    def _descendants(self, node, tag, class_=None):
+        # Lexbor selectors also match the node itself, skip it to keep descendant semantics
+        elements = node.css(tag if class_ is None else f'{tag}.{class_}')
+        if elements and elements[0].mem_id == node.mem_id:
+            return elements[1:]
+        return elements
+
+    def find(self, node, tag, class_=None, text=None):
+        for element in self._descendants(node, tag, class_):
+            if text is not None:
+                string = self._string(element)
+                if not (string and text in string):
+                    continue
+            return element
+        return None
+
+    def find_all(self, node, tag, class_=None):
+        return self._descendants(node, tag, class_)
+
+    def find_next(self, node, tag):
+        descendants = self._descendants(node, tag)
+        if descendants:
+            return descendants[0]
+
+        # Walk forward in document order through the following siblings of the node and of each ancestor
+        current = node
+        while current is not None:
+            sibling = current.next
+            while sibling is not None:
+                if sibling.tag == tag:
+                    return sibling
+                if not sibling.tag.startswith('-'):
+                    match = sibling.css_first(tag)
+                    if match is not None:
+                        return match
+                sibling = sibling.next
+            current = current.parent
+        return None
+
+    def get_text(self, node, strip=False, separator=''):
+        # Lexbor strips every text node separately, like get_text(strip=True)
+        if not strip or not separator:
+            return node.text(deep=True, separator=separator, strip=strip)
+        # It keeps the empty ones, which would double the separator
+        strings = (child.text_content for child in node.traverse(include_text=True) if child.tag == '-text')
+        return separator.join(stripped for stripped in (string.strip() for string in strings) if stripped)
+
+    def attrs(self, node):
+        return node.attributes
+
+
+# Fastest first
+BACKENDS = {
+    'lexbor': LexborBackend,
+    'lxml': LxmlBackend,
+    'html.parser': SoupBackend,
+}
+
+
+def get_available_backends():
+    available = []
+    for name, backend_class in BACKENDS.items():
+        try:
+            backend_class()
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def get_backend(name=None):
+    if name is not None:
+        return BACKENDS[name]()
+
+    # Use the fastest backend that is installed
+    for backend_class in BACKENDS.values():
+        try:
+            return backend_class()
+        except ImportError:
+            continue
+
+
+def parse_file(file_path, backend=None):
+    if backend is None:
+        backend = get_backend()
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return backend.parse(file.read())
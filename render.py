@@ -0,0 +1,210 @@
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from PyQt6.QtCharts import QChart
+from PyQt6.QtCore import QRect, QRectF, QSize
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtSvg import QSvgGenerator
+from PyQt6.QtWidgets import QApplication, QGraphicsScene
+
+from charts import build_capacity_history, build_life_estimates
+from load_json import load_capacity_history_from_json, load_current_battery_life_estimate_from_json, \
+    load_life_estimates_from_json
+from schema import read_summary
+from themes import THEMES, get_theme, style_chart
+
+# Renders the history charts of many machines to PNG or SVG files without a display, for fleet reviews. Every
+# data directory (one per machine, as written by extract.py) is rendered by a worker process with its own
+# QApplication on Qt's offscreen platform, through the same chart builders as the window (charts.py).
+#
+#   python render.py fleet/*/data --output renders --format svg --workers 8
+CHARTS = ['capacity-history', 'life-estimates-active', 'life-estimates-standby']
+FORMATS = ['png', 'svg']
+DEFAULT_SIZE = (1024, 600)
+DEFAULT_THEME = 'accent'
+
+# The QApplication of a worker process, created once by init_renderer
+APPLICATION = None
+
+
+def init_renderer():
+    # Runs first in every worker process; Qt needs an application, and no display is needed with "offscreen"
+    global APPLICATION
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    APPLICATION = QApplication.instance() or QApplication([])
+
+
+def load_machine(data_dir):
+    return {
+        'capacity history': load_capacity_history_from_json(os.path.join(data_dir, 'battery-capacity-history.json')),
+        'life estimates': load_life_estimates_from_json(os.path.join(data_dir, 'battery-life-estimates.json')),
+        'current estimate': load_current_battery_life_estimate_from_json(
+            os.path.join(data_dir, 'current-battery-life-estimate.json')),
+    }
+
+
+def get_machine_name(data_dir):
+    # The computer name of the report, else the directory ("fleet/laptop-42/data" -> "laptop-42")
+    summary = read_summary(os.path.join(data_dir, 'summary.json'))
+    name = summary.get('computer_name') if summary else None
+    if not name:
+        path = os.path.normpath(os.path.abspath(data_dir))
+        name = os.path.basename(path)
+        if name == 'data':
+            name = os.path.basename(os.path.dirname(path))
+    return re.sub(r'[^\w.-]+', '_', name)
+
+
+def build_chart(chart, name, frames):
+    # Animations would be captured mid-way
+    if name == 'capacity-history':
+        build_capacity_history(chart, frames['capacity history'], animate=False)
+    else:
+        build_life_estimates(chart, frames['capacity history'], frames['life estimates'], frames['current estimate'],
+                             name.rsplit('-', 1)[1], animate=False)
+
+
+def save_chart(chart, output_path, size):
+    # The chart is drawn from a scene rather than a chart view: a view that is never shown does not resize its chart
+    scene = QGraphicsScene()
+    scene.addItem(chart)
+    chart.setGeometry(QRectF(0, 0, *size))
+    # Lets the chart lay out its axes at this size before it is drawn
+    APPLICATION.processEvents()
+
+    if output_path.endswith('.svg'):
+        device = QSvgGenerator()
+        device.setFileName(output_path)
+        device.setSize(QSize(*size))
+        device.setViewBox(QRect(0, 0, *size))
+    else:
+        device = QImage(*size, QImage.Format.Format_ARGB32_Premultiplied)
+        device.fill(0xffffffff)
+    painter = QPainter(device)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    scene.render(painter, QRectF(0, 0, *size), QRectF(0, 0, *size))
+    painter.end()
+    if isinstance(device, QImage) and not device.save(output_path):
+        raise OSError(f"Cannot write {output_path}")
+
+
+def render_machine(data_dir, output_dir, name, charts=CHARTS, image_format='png', size=DEFAULT_SIZE,
+                   theme=DEFAULT_THEME):
+    # Renders the charts of one machine; returns the paths written
+    if APPLICATION is None:
+        init_renderer()
+    frames = load_machine(data_dir)
+    paths = []
+    for chart_name in charts:
+        chart = QChart()
+        build_chart(chart, chart_name, frames)
+        style_chart(chart, get_theme(theme))
+        output_path = os.path.join(output_dir, f"{name}-{chart_name}.{image_format}")
+        save_chart(chart, output_path, size)
+        paths.append(output_path)
+    return paths
+
+
+def get_machine_names(data_dirs):
+    # One distinct file name prefix per data directory
+    names = []
+    seen = {}
+    for data_dir in data_dirs:
+        name = get_machine_name(data_dir)
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}-{seen[name]}")
+    return names
+
+
+def render_in_pool(jobs, workers, output_dir, options):
+    # Renders the jobs [(data_dir, name)] in a pool of worker processes; returns (paths written, number of machines
+    # that failed, jobs lost when the pool broke, jobs not started). No more jobs than workers are submitted at a time,
+    # so when a worker process dies (a crash in Qt) and breaks the pool, only the jobs it was running are lost.
+    paths = []
+    failures = 0
+    crashed = []
+    running = {}
+    queue = list(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_renderer) as executor:
+        while running or (queue and not crashed):
+            while queue and not crashed and len(running) < workers:
+                data_dir, name = queue.pop(0)
+                running[executor.submit(render_machine, data_dir, output_dir, name, *options)] = (data_dir, name)
+            # Once the pool is broken, the other running jobs fail at once
+            done, _ = wait(running, return_when=ALL_COMPLETED if crashed else FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                try:
+                    paths += future.result()
+                except BrokenProcessPool:
+                    crashed.append(job)
+                except Exception as e:
+                    failures += 1
+                    print(f"Error rendering {job[0]}:", e)
+    return paths, failures, crashed, queue
+
+
+def render_fleet(data_dirs, output_dir, charts=CHARTS, image_format='png', size=DEFAULT_SIZE, theme=DEFAULT_THEME,
+                 workers=None):
+    # Renders every machine, in parallel; a machine that fails is reported and skipped, whatever the error, and the
+    # other machines are still rendered. Returns the paths written.
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or min(os.cpu_count() or 1, len(data_dirs))
+    options = (charts, image_format, size, theme)
+    jobs = list(zip(data_dirs, get_machine_names(data_dirs)))
+    paths = []
+    failures = 0
+    if workers <= 1:
+        for data_dir, name in jobs:
+            try:
+                paths += render_machine(data_dir, output_dir, name, *options)
+            except Exception as e:
+                failures += 1
+                print(f"Error rendering {data_dir}:", e)
+    else:
+        queue = jobs
+        while queue:
+            pool_paths, pool_failures, crashed, queue = render_in_pool(queue, workers, output_dir, options)
+            paths += pool_paths
+            failures += pool_failures
+            # The machines that were running when a worker died are rendered again one at a time, each in a new
+            # process, so only the machine that crashes the renderer is lost; the rest go to a new pool
+            for job in crashed:
+                job_paths, job_failures, job_crashed, _ = render_in_pool([job], 1, output_dir, options)
+                paths += job_paths
+                failures += job_failures
+                if job_crashed:
+                    failures += 1
+                    print(f"Error rendering {job[0]}: the renderer process crashed")
+    if failures:
+        print(f"{failures} of {len(jobs)} machines failed")
+    return paths
+
+
+def parse_size(value):
+    width, _, height = value.lower().partition('x')
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the history charts of many machines to image files")
+    parser.add_argument('data', nargs='+', help="data directories, one per machine")
+    parser.add_argument('--output', default='renders', help="output directory")
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--charts', nargs='+', choices=CHARTS, default=CHARTS)
+    parser.add_argument('--size', type=parse_size, default=DEFAULT_SIZE, help="WIDTHxHEIGHT in pixels")
+    parser.add_argument('--theme', choices=list(THEMES), default=DEFAULT_THEME)
+    parser.add_argument('--workers', type=int, help="worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = render_fleet(args.data, args.output, args.charts, args.format, args.size, args.theme, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)} charts written to {args.output} in {elapsed:.1f} s ({len(paths) / elapsed:.1f} per second)")
@@ -0,0 +1,328 @@
+import datetime
+import json
+import re
+
+from storage import get_data_path
+
+# Table sections are stored as typed rows, decoded once while the report is read:
+#   timestamp -> int, seconds since 1970-01-01 of the report's local wall-clock time, or the text as written in the
+#                report when it cannot be read with the report's date format (see resolve_timestamps)
+#   mWh       -> int
+#   percent   -> float
+#   duration  -> int, seconds
+#   date      -> str, as written in the report (its format depends on the Windows locale, see detect_date_format)
+#   text      -> str
+# Missing values ("-" in the report) are stored as None. Every extractor (HTML, XML, sysfs) goes through the same
+# decoders, so the loaders only have to build DataFrames.
+
+TEXT = 'text'
+DATE = 'date'
+TIMESTAMP = 'timestamp'
+MWH = 'mWh'
+PERCENT = 'percent'
+DURATION = 'duration'
+
+# Bump when the layout of the data/ files changes, so data written by an older version is regenerated
+DATA_VERSION = 3
+DATA_VERSION_FILE = 'version.json'
+
+# A few values of the report written next to the data at every extraction, so the window can show the battery
+# health before any section is loaded
+SUMMARY_FILE = 'summary.json'
+
+# Section title -> (column, type) for every table section
+SCHEMAS = {
+    'recent usage': [
+        ('START TIME', TIMESTAMP),
+        ('STATE', TEXT),
+        ('SOURCE', TEXT),
+        ('CAPACITY REMAINING (%)', PERCENT),
+        ('CAPACITY REMAINING (mWh)', MWH),
+    ],
+    'battery usage': [
+        ('START TIME', TIMESTAMP),
+        ('STATE', TEXT),
+        ('DURATION', DURATION),
+        ('ENERGY DRAINED (%)', PERCENT),
+        ('ENERGY DRAINED (mWh)', MWH),
+    ],
+    'usage history': [
+        ('START DATE', DATE),
+        ('END DATE', DATE),
+        ('BATTERY ACTIVE', DURATION),
+        ('BATTERY CONNECTED STANDBY', DURATION),
+        ('AC ACTIVE', DURATION),
+        ('AC CONNECTED STANDBY', DURATION),
+    ],
+    'battery capacity history': [
+        ('START DATE', DATE),
+        ('END DATE', DATE),
+        ('FULL CHARGE CAPACITY', MWH),
+        ('DESIGN CAPACITY', MWH),
+    ],
+    'battery life estimates': [
+        ('START DATE', DATE),
+        ('END DATE', DATE),
+        ('ACTIVE (FULL CHARGE)', DURATION),
+        ('CONNECTED STANDBY (FULL CHARGE) (time)', DURATION),
+        ('CONNECTED STANDBY (FULL CHARGE) DRAIN (%)', PERCENT),
+        ('ACTIVE (DESIGN CAPACITY)', DURATION),
+        ('CONNECTED STANDBY (DESIGN CAPACITY) (time)', DURATION),
+        ('CONNECTED STANDBY (DESIGN CAPACITY) DRAIN (%)', PERCENT),
+    ],
+    'current battery life estimates': [
+        ('ACTIVE (FULL CHARGE)', DURATION),
+        ('CONNECTED STANDBY (FULL CHARGE)', DURATION),
+        ('ACTIVE (DESIGN CAPACITY)', DURATION),
+        ('CONNECTED STANDBY (DESIGN CAPACITY)', DURATION),
+    ],
+}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# Formats of the dates in the report, which follow the Windows locale. Ties between formats that read the dates
+# equally well are broken in this order.
+ISO_DATE_FORMAT = '%Y-%m-%d'
+DATE_FORMATS = [ISO_DATE_FORMAT, '%m/%d/%Y', '%d/%m/%Y', '%d.%m.%Y', '%d-%m-%Y', '%Y/%m/%d', '%Y.%m.%d', '%Y. %m. %d.',
+                '%m/%d/%y', '%d/%m/%y', '%d.%m.%y']
+
+# Dates checked per sequence when detecting the format
+DATE_SAMPLE_SIZE = 500
+
+ISO_DURATION_PATTERN = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:([\d.]+)S)?)?')
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def decode_text(value):
+    return value.strip() if value else ''
+
+
+def decode_date(value):
+    return value.strip() if value and value.strip() != '-' else None
+
+
+def decode_timestamp(value):
+    # "2024-06-04 10:11:12" or "2024-06-04T10:11:12.345" -> seconds since the epoch, without time zone conversion.
+    # Any other text is kept as it is, so no timestamp is lost before the report's date format is known.
+    if is_number(value):
+        return int(value)
+    value = decode_date(value) if isinstance(value, str) else None
+    if value is None:
+        return None
+    try:
+        timestamp = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    return int((timestamp.replace(tzinfo=None) - EPOCH).total_seconds())
+
+
+def get_timestamp_seconds(value):
+    # A stored timestamp -> seconds since the epoch, or None when it is missing or could not be read
+    return value if is_number(value) else None
+
+
+def decode_mwh(value):
+    # "54,000 mWh", "54.000 mWh" or "54000" -> 54000; thousands separators depend on the locale
+    if is_number(value):
+        return int(value)
+    digits = ''.join(c for c in (value or '').split('m')[0] if c.isdigit())
+    return int(digits) if digits else None
+
+
+def decode_percent(value):
+    # "45 %" or "8 % / 16 h" -> the number before the first "%"
+    if is_number(value):
+        return float(value)
+    try:
+        return float((value or '').split('%')[0].strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def decode_duration(value):
+    # "167:02:03" or ISO 8601 "PT1H2M3S" -> seconds
+    if is_number(value):
+        return int(value)
+    value = (value or '').strip()
+    parts = value.split(':')
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        return (int(parts[0]) * 60 + int(parts[1])) * 60 + int(parts[2])
+    match = ISO_DURATION_PATTERN.fullmatch(value)
+    if match and value != 'P':
+        days, hours, minutes, seconds = match.groups()
+        return int(((int(days or 0) * 24 + int(hours or 0)) * 60 + int(minutes or 0)) * 60 + float(seconds or 0))
+    return None
+
+
+DECODERS = {
+    TEXT: decode_text,
+    DATE: decode_date,
+    TIMESTAMP: decode_timestamp,
+    MWH: decode_mwh,
+    PERCENT: decode_percent,
+    DURATION: decode_duration,
+}
+
+
+def get_columns(section):
+    return [column for column, _ in SCHEMAS[section]]
+
+
+def get_decoders(section):
+    # Resolve the decoders once per table, not once per cell
+    return [(column, DECODERS[column_type]) for column, column_type in SCHEMAS[section]]
+
+
+def decode_row(decoders, values):
+    # Raw cell values, in schema order -> typed row
+    return {column: decode(value) for (column, decode), value in zip(decoders, values)}
+
+
+def get_date_columns(section):
+    return [column for column, column_type in SCHEMAS[section] if column_type == DATE]
+
+
+def get_timestamp_columns(section):
+    return [column for column, column_type in SCHEMAS[section] if column_type == TIMESTAMP]
+
+
+def get_timestamp_date(value):
+    # "04/06/2024 10:11:12" -> "04/06/2024"; the date of a timestamp kept as text
+    return value.rsplit(' ', 1)[0]
+
+
+def get_date_sequences(sections):
+    # Section title -> rows  =>  the dates of every section, in report order (START, END, next START, ...), including
+    # the dates of the timestamps that could not be decoded without the report's format
+    sequences = []
+    for title, rows in sections.items():
+        if title not in SCHEMAS or not rows:
+            continue
+        columns = get_date_columns(title)
+        dates = [row[column] for row in rows for column in columns if row[column] is not None]
+        columns = get_timestamp_columns(title)
+        dates += [get_timestamp_date(row[column]) for row in rows for column in columns
+                  if isinstance(row[column], str)]
+        if dates:
+            sequences.append(dates)
+    return sequences
+
+
+def count_date_inversions(dates):
+    return sum(1 for previous, date in zip(dates, dates[1:]) if date < previous)
+
+
+def parse_date_sequences(sequences, date_format):
+    # None when a date does not match date_format
+    try:
+        return [[datetime.datetime.strptime(date, date_format) for date in sequence] for sequence in sequences]
+    except ValueError:
+        return None
+
+
+def detect_date_format(sequences):
+    # The format of the report's dates, from an evenly spaced sample of every sequence. Formats that cannot parse
+    # the sample are ruled out; when several can ("01/02/2024"), the one that keeps the periods in chronological
+    # order wins, since the report lists them oldest first and every period ends after it starts.
+    samples = [sequence[::max(1, len(sequence) // DATE_SAMPLE_SIZE)] for sequence in sequences if sequence]
+    if not samples:
+        return None
+    candidates = []
+    for date_format in DATE_FORMATS:
+        parsed = parse_date_sequences(samples, date_format)
+        if parsed is not None:
+            candidates.append((sum(count_date_inversions(dates) for dates in parsed), date_format))
+    if not candidates:
+        return None
+
+    inversions = min(candidate[0] for candidate in candidates)
+    tied = [date_format for count, date_format in candidates if count == inversions]
+    if len(tied) > 1:
+        # Only days up to 12 in the sample: the first format that reads every date, not just the sample, wins
+        for date_format in tied:
+            if parse_date_sequences(sequences, date_format) is not None:
+                return date_format
+    return tied[0]
+
+
+def resolve_timestamps(sections, date_format):
+    # Section title -> rows, in place: timestamps kept as text are decoded with the report's date format, detected
+    # from every date of the report. Text that still cannot be read is kept.
+    if date_format is None:
+        return
+    timestamp_format = f"{date_format} %H:%M:%S"
+    for title, rows in sections.items():
+        if title not in SCHEMAS or not rows:
+            continue
+        for column in get_timestamp_columns(title):
+            for row in rows:
+                value = row[column]
+                if not isinstance(value, str):
+                    continue
+                try:
+                    timestamp = datetime.datetime.strptime(value, timestamp_format)
+                except ValueError:
+                    continue
+                row[column] = int((timestamp - EPOCH).total_seconds())
+
+
+def read_version_file(version_file=None):
+    if version_file is None:
+        version_file = get_data_path(DATA_VERSION_FILE)
+    try:
+        with open(version_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def read_data_version(version_file=None):
+    return read_version_file(version_file).get('version')
+
+
+def read_date_format(version_file=None):
+    # Detected once when the report is extracted and stored next to the data
+    return read_version_file(version_file).get('date_format')
+
+
+def is_data_current(version_file=None):
+    return read_data_version(version_file) == DATA_VERSION
+
+
+def build_summary(sections):
+    # Section title -> section data  =>  the summary stored in SUMMARY_FILE
+    report = sections.get('battery report') or {}
+    batteries = sections.get('installed batteries') or {}
+    design_capacity = decode_mwh(batteries.get('DESIGN CAPACITY'))
+    full_charge_capacity = decode_mwh(batteries.get('FULL CHARGE CAPACITY'))
+    health = None
+    if design_capacity and full_charge_capacity is not None:
+        health = full_charge_capacity / design_capacity * 100
+    estimates = sections.get('current battery life estimates') or []
+    return {
+        'version': DATA_VERSION,
+        'report_time': report.get('REPORT TIME'),
+        'computer_name': report.get('COMPUTER NAME'),
+        'design_capacity': design_capacity,
+        'full_charge_capacity': full_charge_capacity,
+        'health': health,
+        'current_estimate': estimates[0] if estimates else None,
+    }
+
+
+def read_summary(summary_file=None):
+    # None when there is no summary, or it was written for another layout of the data
+    if summary_file is None:
+        summary_file = get_data_path(SUMMARY_FILE)
+    try:
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(summary, dict) or summary.get('version') != DATA_VERSION:
+        return None
+    return summary
@@ -0,0 +1,151 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from load_json import compact_frame, load_section_from_json, parse_timestamps
+from storage import get_data_path, set_data_dir
+
+# Discharge sessions. A session is a run of consecutive rows on battery; a row starting more than SESSION_GAP after
+# the end of the rows before it starts a new one. label_sessions finds them for both logs of the report:
+#   recent usage    every row is a state change with the power source and the capacity remaining at that moment,
+#                   and lasts until the next one; a session ends at the first row back on AC (or at the last row
+#                   when the log ends on battery)
+#   battery usage   every row is a period on battery with its duration and energy drained (get_drain_sessions in
+#                   app.py, for the drain chart)
+# Sessions of the recent usage log are summarized by segment_sessions:
+#   START TIME, END TIME, DURATION
+#   START/END CAPACITY (%), DEPTH OF DISCHARGE (%)
+#   ENERGY DRAINED (mWh), DRAIN RATE (mWh/h)
+BATTERY_SOURCE = 'battery'
+SESSION_GAP = np.timedelta64(5, 'm')
+
+SESSION_DTYPES = {
+    'START TIME': 'datetime64[ns]',
+    'END TIME': 'datetime64[ns]',
+    'DURATION': 'timedelta64[ns]',
+    'START CAPACITY (%)': 'float64',
+    'END CAPACITY (%)': 'float64',
+    'DEPTH OF DISCHARGE (%)': 'float64',
+    'ENERGY DRAINED (mWh)': 'float64',
+    'DRAIN RATE (mWh/h)': 'float64',
+}
+
+
+def load_recent_usage(json_file=None):
+    # The recent usage rows with missing capacities left as NaN (the app's loader shows them as 0)
+    json_file = json_file or get_data_path('recent-usage.json')
+    df = load_section_from_json(json_file, 'recent usage')
+    df['START TIME'] = parse_timestamps(df['START TIME'])
+    return compact_frame(df, 'recent usage')
+
+
+def label_sessions(start, end, on_battery, gap=SESSION_GAP):
+    # Rows sorted by start (datetime64 arrays of their start and end) -> session number of every row, counted from 0,
+    # and -1 for the rows not on battery. Missing times never split a session.
+    on_battery = np.asarray(on_battery, dtype=bool)
+    if not len(on_battery):
+        return np.array([], dtype=np.int64)
+    latest_end = np.fmax.accumulate(end)
+    new_session = on_battery.copy()
+    new_session[1:] &= ~on_battery[:-1] | (start[1:] > latest_end[:-1] + gap)
+    session = np.cumsum(new_session) - 1
+    return np.where(on_battery, session, -1)
+
+
+def get_session_bounds(session):
+    # Session number of every row -> positions of the first and last row of every session
+    in_session = session >= 0
+    previous = np.concatenate([[-1], session[:-1]])
+    following = np.concatenate([session[1:], [-1]])
+    return np.flatnonzero(in_session & (session != previous)), np.flatnonzero(in_session & (session != following))
+
+
+def segment_sessions(df, gap=SESSION_GAP):
+    # Recent usage rows -> one row per discharge session, computed with whole-array operations only
+    if df.empty:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in SESSION_DTYPES.items()})
+    df = df.sort_values('START TIME', kind='stable')
+    times = df['START TIME'].to_numpy()
+    on_battery = df['SOURCE'].astype(str).str.strip().str.lower().to_numpy() == BATTERY_SOURCE
+    percent = df['CAPACITY REMAINING (%)'].to_numpy(dtype=float)
+    mwh = df['CAPACITY REMAINING (mWh)'].to_numpy(dtype=float)
+
+    # Every row lasts until the next one. The first and last row of every session, and the row that ends it.
+    first, last = get_session_bounds(label_sessions(times, np.concatenate([times[1:], times[-1:]]), on_battery, gap))
+    end = np.minimum(last + 1, len(df) - 1)
+
+    duration = times[end] - times[first]
+    hours = duration / np.timedelta64(1, 'h')
+    drained = mwh[first] - mwh[end]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(hours > 0, drained / hours, np.nan)
+
+    return pd.DataFrame({
+        'START TIME': times[first],
+        'END TIME': times[end],
+        'DURATION': duration,
+        'START CAPACITY (%)': percent[first],
+        'END CAPACITY (%)': percent[end],
+        'DEPTH OF DISCHARGE (%)': percent[first] - percent[end],
+        'ENERGY DRAINED (mWh)': drained,
+        'DRAIN RATE (mWh/h)': rate,
+    })
+
+
+class SessionIndex:
+    # Sessions sorted by start time; date ranges are binary searches and only the sessions in range are ranked
+
+    def __init__(self, sessions):
+        self.sessions = sessions.sort_values('START TIME', kind='stable', ignore_index=True)
+        self.starts = self.sessions['START TIME'].to_numpy()
+        self.rates = self.sessions['DRAIN RATE (mWh/h)'].to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get_range(self, start=None, end=None):
+        # Positions of the sessions starting in [start, end)
+        first = 0 if start is None else int(np.searchsorted(self.starts, np.datetime64(start), side='left'))
+        last = len(self.starts) if end is None else int(np.searchsorted(self.starts, np.datetime64(end), side='left'))
+        return first, max(first, last)
+
+    def between(self, start=None, end=None):
+        first, last = self.get_range(start, end)
+        return self.sessions.iloc[first:last]
+
+    def worst(self, count=10, days=None, now=None):
+        # The `count` sessions with the highest drain rate, among those of the last `days` days when given
+        start = None
+        if days is not None:
+            now = np.datetime64(now) if now is not None else self.starts[-1] if len(self.starts) else None
+            start = now - np.timedelta64(int(days * 86400), 's') if now is not None else None
+        first, last = self.get_range(start)
+        rates = self.rates[first:last]
+        rates = np.where(np.isnan(rates), -np.inf, rates)
+        if count < len(rates):
+            top = np.argpartition(-rates, count)[:count]
+        else:
+            top = np.arange(len(rates))
+        top = top[np.argsort(-rates[top], kind='stable')]
+        top = top[np.isfinite(rates[top])]
+        return self.sessions.iloc[first + top]
+
+
+def load_sessions(json_file=None):
+    return SessionIndex(segment_sessions(load_recent_usage(json_file)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Discharge sessions and drain rates from the recent usage log")
+    parser.add_argument('--data', help="data directory")
+    parser.add_argument('--worst', type=int, default=10, help="number of sessions to list")
+    parser.add_argument('--days', type=float, help="only sessions from the last DAYS days of the log")
+    args = parser.parse_args()
+
+    if args.data:
+        set_data_dir(args.data)
+    index = load_sessions()
+    print(f"{len(index)} discharge sessions")
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(index.worst(args.worst, args.days).to_string(index=False))
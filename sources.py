@@ -0,0 +1,237 @@
+import datetime
+import glob
+import os
+import platform
+import socket
+import sys
+
+import psutil
+
+from clean import clean_html
+from extract import extract_data, save_json, save_summary, save_data_version
+from extract_xml import extract_xml_data
+from generate import generate_battery_report
+from load_json import read_json_file
+from schema import ISO_DATE_FORMAT, get_decoders, decode_row, is_data_current
+from storage import get_data_dir, get_data_path
+
+POWER_SUPPLY_PATH = '/sys/class/power_supply'
+DMI_PATH = '/sys/class/dmi/id'
+
+
+class ReportSource:
+    # A report source fills the data/ directory with the same sections the HTML extractors write, and reports
+    # the live battery state in the structure shown by the UI.
+    name = None
+
+    def is_available(self):
+        raise NotImplementedError
+
+    def collect(self):
+        raise NotImplementedError
+
+    def get_current_battery_info(self):
+        battery = psutil.sensors_battery()
+        if battery is None:
+            return None
+
+        if battery.secsleft < 0:
+            time_remaining = '- -'
+        else:
+            time_remaining = datetime.timedelta(seconds=battery.secsleft)
+        if battery.power_plugged:
+            is_plugged = 'Yes'
+        else:
+            is_plugged = 'No'
+        battery_info = {
+            'Percent': battery.percent,
+            'Seconds left': time_remaining,
+            'Plugged in': is_plugged
+        }
+        return battery_info
+
+
+class PowercfgSource(ReportSource):
+    # Windows: generate battery-report.html with powercfg and scrape it, or read battery-report.xml which needs no
+    # cleaning or string parsing
+    name = 'powercfg'
+
+    def __init__(self, report_format='html'):
+        self.report_format = report_format
+
+    def is_available(self):
+        return sys.platform == 'win32'
+
+    def collect(self):
+        if self.report_format == 'xml':
+            generate_battery_report(xml=True)
+            extract_xml_data()
+        else:
+            generate_battery_report()
+            clean_html()
+            extract_data()
+
+
+class SysfsSource(ReportSource):
+    # Linux: read the battery straight from /sys/class/power_supply/BAT*, no report to generate or parse
+    name = 'sysfs'
+
+    def __init__(self, power_supply_path=POWER_SUPPLY_PATH):
+        self.power_supply_path = power_supply_path
+
+    def get_battery_path(self):
+        batteries = sorted(glob.glob(os.path.join(self.power_supply_path, 'BAT*')))
+        return batteries[0] if batteries else None
+
+    def is_available(self):
+        return sys.platform.startswith('linux') and self.get_battery_path() is not None
+
+    def read_value(self, path, name):
+        try:
+            with open(os.path.join(path, name), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def read_int(self, path, name):
+        value = self.read_value(path, name)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def read_energy(self, battery_path, name):
+        # Energy in mWh; batteries that only report charge (µAh) are converted with the design voltage (µV)
+        energy = self.read_int(battery_path, f'energy_{name}')
+        if energy is not None:
+            return energy // 1000
+        charge = self.read_int(battery_path, f'charge_{name}')
+        voltage = self.read_int(battery_path, 'voltage_min_design')
+        if charge is not None and voltage is not None:
+            return charge * voltage // 10 ** 9
+        return None
+
+    def read_power(self, battery_path):
+        # Power draw in mW, or None if unknown
+        power = self.read_int(battery_path, 'power_now')
+        if power is not None:
+            return abs(power) // 1000
+        current = self.read_int(battery_path, 'current_now')
+        voltage = self.read_int(battery_path, 'voltage_now')
+        if current is not None and voltage is not None:
+            return abs(current) * voltage // 10 ** 9
+        return None
+
+    def get_installed_batteries(self, battery_path):
+        design_capacity = self.read_energy(battery_path, 'full_design')
+        full_charge_capacity = self.read_energy(battery_path, 'full')
+        cycle_count = self.read_value(battery_path, 'cycle_count')
+
+        return {
+            'NAME': self.read_value(battery_path, 'model_name') or '',
+            'MANUFACTURER': self.read_value(battery_path, 'manufacturer') or '',
+            'SERIAL NUMBER': self.read_value(battery_path, 'serial_number') or '',
+            'CHEMISTRY': self.read_value(battery_path, 'technology') or '',
+            'DESIGN CAPACITY': f"{design_capacity:,} mWh" if design_capacity is not None else '-',
+            'FULL CHARGE CAPACITY': f"{full_charge_capacity:,} mWh" if full_charge_capacity is not None else '-',
+            'CYCLE COUNT': cycle_count if cycle_count is not None else '-',
+        }
+
+    def get_battery_report(self):
+        return {
+            'COMPUTER NAME': socket.gethostname(),
+            'SYSTEM PRODUCT NAME': ' '.join(filter(None, [self.read_value(DMI_PATH, 'sys_vendor'),
+                                                          self.read_value(DMI_PATH, 'product_name')])),
+            'BIOS': ' '.join(filter(None, [self.read_value(DMI_PATH, 'bios_version'),
+                                           self.read_value(DMI_PATH, 'bios_date')])),
+            'OS BUILD': f"{platform.system()} {platform.release()}",
+            'REPORT TIME': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def get_capacity_history(self, full_charge_capacity, design_capacity, keep_history=True):
+        # sysfs keeps no history, so every collection adds (or updates) today's entry
+        capacity_history_json = get_data_path('battery-capacity-history.json')
+        capacity_history = []
+        if keep_history and os.path.exists(capacity_history_json):
+            capacity_history = read_json_file(capacity_history_json)
+
+        today = datetime.date.today().isoformat()
+        entry = decode_row(get_decoders('battery capacity history'),
+                           [today, today, full_charge_capacity, design_capacity])
+        if capacity_history and capacity_history[-1]['START DATE'] == today:
+            capacity_history[-1] = entry
+        else:
+            capacity_history.append(entry)
+        return capacity_history
+
+    def collect(self):
+        battery_path = self.get_battery_path()
+        if battery_path is None:
+            print("No battery found.")
+            return
+
+        # Files written by an older version have a different layout and are replaced rather than extended
+        keep_history = is_data_current()
+
+        battery_report = self.get_battery_report()
+        installed_batteries = self.get_installed_batteries(battery_path)
+        save_json(battery_report, get_data_path('battery-report.json'))
+        save_json(installed_batteries, get_data_path('installed-batteries.json'))
+
+        full_charge_capacity = self.read_energy(battery_path, 'full')
+        design_capacity = self.read_energy(battery_path, 'full_design')
+        if full_charge_capacity is not None and design_capacity is not None:
+            save_json(self.get_capacity_history(full_charge_capacity, design_capacity, keep_history),
+                      get_data_path('battery-capacity-history.json'))
+
+        # Usage logs and life estimates only exist in the Windows report
+        for file_name in ['recent-usage.json', 'battery-usage.json', 'usage-history.json', 'battery-life-estimates.json',
+                          'current-battery-life-estimate.json']:
+            output_json = get_data_path(file_name)
+            if not keep_history or not os.path.exists(output_json):
+                save_json([], output_json)
+
+        save_summary({'battery report': battery_report, 'installed batteries': installed_batteries})
+        save_data_version(ISO_DATE_FORMAT)
+
+    def get_current_battery_info(self):
+        battery_path = self.get_battery_path()
+        if battery_path is None:
+            return None
+
+        status = self.read_value(battery_path, 'status')
+        percent = self.read_int(battery_path, 'capacity')
+        energy_now = self.read_energy(battery_path, 'now')
+        power = self.read_power(battery_path)
+
+        if status == 'Discharging' and energy_now is not None and power:
+            time_remaining = datetime.timedelta(seconds=int(energy_now * 3600 / power))
+        else:
+            time_remaining = '- -'
+        is_plugged = 'No' if status == 'Discharging' else 'Yes'
+
+        return {
+            'Percent': percent if percent is not None else 0,
+            'Seconds left': time_remaining,
+            'Plugged in': is_plugged
+        }
+
+
+# Native sources first, powercfg as the fallback
+REPORT_SOURCES = [SysfsSource, PowercfgSource]
+
+
+def get_report_source():
+    for source_class in REPORT_SOURCES:
+        source = source_class()
+        if source.is_available():
+            return source
+    return PowercfgSource()
+
+
+if __name__ == "__main__":
+    source = get_report_source()
+    print(f"Collecting battery data with the {source.name} source")
+    os.makedirs(get_data_dir(), exist_ok=True)
+    source.collect()
+    print(source.get_current_battery_info())
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+# Output layer for the data/ directory. Every section is written through save_data, which serializes it compactly
+# and replaces the file atomically: the data is written to a temporary file next to the target and renamed over
+# it, so a crash or a reader running at the same time (the app, api.py, watch.py) sees either the old or the new
+# file, never half of one.
+#
+# The directory defaults to data/ in the working directory and can be moved with the BATTERY_REPORT_DATA_DIR
+# environment variable or set_data_dir().
+DATA_DIR_VARIABLE = 'BATTERY_REPORT_DATA_DIR'
+DATA_DIR = os.environ.get(DATA_DIR_VARIABLE) or 'data'
+
+# os.replace fails on Windows while another process has the target open; retry for a moment before giving up
+REPLACE_RETRIES = 10
+REPLACE_RETRY_DELAY = 0.05
+
+
+def get_data_dir():
+    return DATA_DIR
+
+
+def set_data_dir(data_dir):
+    global DATA_DIR
+    DATA_DIR = data_dir
+
+
+def get_data_path(file_name):
+    # "battery-report.json" -> "<data dir>/battery-report.json"
+    return os.path.join(DATA_DIR, file_name)
+
+
+class CompactJsonSerializer:
+    name = 'json'
+
+    def dumps(self, data):
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class IndentedJsonSerializer:
+    # The format data/ used to be written in, kept for comparison
+    name = 'json-indent'
+
+    def dumps(self, data):
+        return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+
+
+class OrjsonSerializer:
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, data):
+        return self._orjson.dumps(data)
+
+
+# Fastest first; all of them write JSON, which is what every reader of data/ (the loaders, the archive, the API
+# and the exporters) parses
+SERIALIZERS = {
+    'orjson': OrjsonSerializer,
+    'json': CompactJsonSerializer,
+    'json-indent': IndentedJsonSerializer,
+}
+
+
+def get_available_serializers():
+    available = []
+    for name, serializer_class in SERIALIZERS.items():
+        try:
+            serializer_class()
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def get_serializer(name=None):
+    if name is not None:
+        return SERIALIZERS[name]()
+
+    # Use the fastest serializer that is installed
+    for serializer_class in SERIALIZERS.values():
+        try:
+            return serializer_class()
+        except ImportError:
+            continue
+
+
+SERIALIZER = get_serializer()
+
+
+def atomic_write(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def save_data(data, path, serializer=None):
+    atomic_write(path, (serializer or SERIALIZER).dumps(data))
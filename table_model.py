@@ -0,0 +1,164 @@
+import re
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Numeric filters: ">5000", "<= 20", "=0"
+NUMERIC_FILTER_PATTERN = re.compile(r'\s*(<=|>=|<|>|=)\s*(-?\d+(?:\.\d+)?)\s*')
+
+NUMERIC_FILTER_OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '=': np.equal,
+}
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_date(value):
+    return '-' if np.isnat(value) else str(np.datetime_as_string(value, unit='D'))
+
+
+def format_value(value):
+    # Display text of one cell, computed only when the view asks for it
+    if value is None or value is pd.NaT:
+        return '-'
+    if isinstance(value, np.datetime64):
+        return '-' if np.isnat(value) else np.datetime_as_string(value, unit='s').replace('T', ' ')
+    if isinstance(value, np.timedelta64):
+        return '-' if np.isnat(value) else format_duration(value / np.timedelta64(1, 's'))
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return '-'
+        return f"{value:,.0f}" if value.is_integer() else f"{value:,.2f}"
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}"
+    return str(value)
+
+
+class DataFrameModel(QAbstractTableModel):
+    # Read-only table model over the columns of a DataFrame. The columns are kept as numpy arrays and the view is a
+    # row index array, so sorting and filtering never copy the data and only the visible cells are ever formatted.
+
+    def __init__(self, df=None, formatters=None, parent=None):
+        super().__init__(parent)
+        self.set_data_frame(df if df is not None else pd.DataFrame(), formatters)
+
+    def set_data_frame(self, df, formatters=None):
+        self.beginResetModel()
+        self.headers = [str(column) for column in df.columns]
+        self.columns = [df[column].to_numpy() for column in df.columns]
+        # Column name -> function(value) -> display text, for values format_value cannot infer (e.g. seconds)
+        self.formatters = [(formatters or {}).get(header, format_value) for header in self.headers]
+        self.row_count = len(df)
+        self.rows = np.arange(self.row_count)
+        self.sort_column = None
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        self.filter_column = None
+        self.filter_text = ''
+        # Column index -> lowercase display strings, built the first time a column is filtered or sorted as text
+        self.text_columns = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            column = index.column()
+            return self.format_cell(column, self.columns[column][self.rows[index.row()]])
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if self.columns[index.column()].dtype.kind in 'iufmM':
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def format_cell(self, column, value):
+        if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+            return '-'
+        return self.formatters[column](value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+    def get_sort_keys(self, column):
+        values = self.columns[column]
+        if values.dtype.kind in 'iufmMb':
+            return values
+        # Object columns (text, or numbers with None) are sorted on their text
+        return self.get_text_column(column)
+
+    def get_text_column(self, column):
+        if column not in self.text_columns:
+            self.text_columns[column] = np.array([self.format_cell(column, value).lower()
+                                                  for value in self.columns[column]])
+        return self.text_columns[column]
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column < 0 or column >= len(self.columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column = column
+        self.sort_order = order
+        self.apply_view()
+        self.layoutChanged.emit()
+
+    def set_filter(self, column, text):
+        # Keep the rows whose cell contains `text`, or satisfies a comparison like ">5000" on numeric columns
+        self.beginResetModel()
+        self.filter_column = column
+        self.filter_text = text.strip()
+        self.apply_view()
+        self.endResetModel()
+
+    def get_filter_mask(self):
+        column = self.filter_column
+        text = self.filter_text
+        if column is None or not text:
+            return None
+
+        values = self.columns[column]
+        match = NUMERIC_FILTER_PATTERN.fullmatch(text)
+        if match and values.dtype.kind in 'iuf':
+            operator, number = match.groups()
+            with np.errstate(invalid='ignore'):
+                return NUMERIC_FILTER_OPERATORS[operator](values, float(number))
+
+        # Everything else matches on the text shown in the table
+        return np.char.find(self.get_text_column(column), text.lower()) >= 0
+
+    def apply_view(self):
+        rows = np.arange(self.row_count)
+
+        mask = self.get_filter_mask()
+        if mask is not None:
+            rows = rows[mask]
+
+        if self.sort_column is not None:
+            keys = self.get_sort_keys(self.sort_column)[rows]
+            # Stable, so equal keys keep their report order; missing values sort last in both directions
+            if self.sort_order == Qt.SortOrder.DescendingOrder:
+                # Sorting the reversed keys and reversing the result puts the largest keys first and leaves equal
+                # keys in their original order, for numbers, dates and text alike
+                order = len(keys) - 1 - np.argsort(keys[::-1], kind='stable')[::-1]
+                missing = pd.isna(keys[order]) if keys.dtype.kind in 'fmM' else np.zeros(len(order), dtype=bool)
+                order = np.concatenate([order[~missing], np.sort(order[missing])])
+            else:
+                order = np.argsort(keys, kind='stable')
+            rows = rows[order]
+
+        self.rows = rows
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The modules of the app live at the top of the repository
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import storage  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'tests', 'fixtures')
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # An empty data directory for the test, used by everything that reads or writes data/
+    path = tmp_path / 'data'
+    path.mkdir()
+    monkeypatch.setattr(storage, 'DATA_DIR', str(path))
+    return path
+
+
+def get_fixture_path(name):
+    return os.path.join(FIXTURES_DIR, name)
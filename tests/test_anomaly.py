@@ -0,0 +1,87 @@
+import copy
+import json
+import random
+import statistics
+
+from anomaly import ANOMALY_STATE_FILE, MEAN_DEVIATION_SCALE, MIN_SPREAD, AnomalyDetector, RollingStats, \
+    detect_anomalies
+
+METRIC = 'active drain (mWh/h)'
+
+
+def feed_steady(detector, count, start_time=0):
+    # Drain alternating around 10000 mWh/h, one value an hour
+    for i in range(count):
+        assert detector.update(METRIC, start_time + i * 3600, 10000 + (200 if i % 2 else -200)) is None
+    return start_time + count * 3600
+
+
+def test_spread_estimates_standard_deviation():
+    generator = random.Random(1)
+    values = [generator.gauss(10000, 500) for _ in range(20000)]
+    stats = RollingStats()
+    for value in values:
+        stats.update(value, alpha=0.002)
+    assert abs(MEAN_DEVIATION_SCALE * stats.mean_deviation / statistics.stdev(values) - 1) < 0.1
+    assert abs(stats.median / statistics.median(values) - 1) < 0.01
+
+
+def test_no_anomalies_during_warmup():
+    detector = AnomalyDetector(warmup=20)
+    time = feed_steady(detector, 5)
+    assert detector.update(METRIC, time, 100000) is None
+
+    detector = AnomalyDetector(warmup=20)
+    time = feed_steady(detector, 20)
+    event = detector.update(METRIC, time, 100000)
+    assert event is not None
+    assert event['METRIC'] == METRIC and event['TIME'] == time and event['VALUE'] == 100000
+
+
+def test_threshold():
+    detector = AnomalyDetector(warmup=20)
+    time = feed_steady(detector, 50)
+    stats = detector.stats[METRIC]
+    spread = max(MEAN_DEVIATION_SCALE * stats.mean_deviation, MIN_SPREAD * stats.median)
+
+    below = copy.deepcopy(detector)
+    assert below.update(METRIC, time, stats.median + spread * (detector.threshold - 0.1)) is None
+    event = detector.update(METRIC, time, stats.median + spread * (detector.threshold + 0.1))
+    assert event is not None
+    assert abs(event['ROBUST Z SCORE'] - (detector.threshold + 0.1)) < 0.01
+
+
+def test_resume_skips_values_already_seen():
+    detector = AnomalyDetector()
+    time = feed_steady(detector, 30)
+    restored = AnomalyDetector(json.loads(json.dumps(detector.get_state())))
+    assert restored.get_state() == detector.get_state()
+
+    # Values up to the last one fed are ignored, newer ones are counted
+    assert restored.update(METRIC, time - 3600, 100000) is None
+    assert restored.stats[METRIC].count == 30
+    assert restored.update(METRIC, time, 100000) is not None
+    assert restored.stats[METRIC].count == 31
+
+
+def test_state_written_with_mad_field():
+    state = {METRIC: {'count': 30, 'mean': 10000.0, 'variance': 40000.0, 'median': 10000.0, 'mad': 200.0,
+                      'last_time': 0}}
+    detector = AnomalyDetector(state)
+    assert detector.stats[METRIC].mean_deviation == 200.0
+
+
+def test_detect_anomalies_resumes_from_state(tmp_path):
+    rows = [{'START TIME': i * 3600, 'STATE': 'Active', 'DURATION': 3600, 'ENERGY DRAINED (%)': 20.0,
+             'ENERGY DRAINED (mWh)': 10000 + (200 if i % 2 else -200)} for i in range(40)]
+    rows[35]['ENERGY DRAINED (mWh)'] = 100000
+    (tmp_path / 'battery-usage.json').write_text(json.dumps(rows), encoding='utf-8')
+
+    events = detect_anomalies(str(tmp_path))
+    assert [event['TIME'] for event in events] == [35 * 3600]
+    state = json.loads((tmp_path / ANOMALY_STATE_FILE).read_text(encoding='utf-8'))
+    assert state[METRIC]['count'] == 40 and state[METRIC]['last_time'] == 39 * 3600
+
+    # The same rows again, as after an import of an overlapping report
+    assert detect_anomalies(str(tmp_path)) == []
+    assert json.loads((tmp_path / ANOMALY_STATE_FILE).read_text(encoding='utf-8')) == state
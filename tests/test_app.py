@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('PyQt6.QtCharts')
+
+import app  # noqa: E402
+from conftest import get_fixture_path  # noqa: E402
+from extract_xml import extract_xml_data  # noqa: E402
+
+
+def run_section_loads(sections):
+    signals = app.SectionLoadSignals()
+    loaded, failed = {}, {}
+    signals.loaded.connect(lambda section, df: loaded.__setitem__(section, df))
+    signals.failed.connect(lambda section, error: failed.__setitem__(section, error))
+    for section in sections:
+        app.SectionLoadTask(section, signals).run()
+    return loaded, failed
+
+
+def test_section_loads(data_dir):
+    extract_xml_data(get_fixture_path('battery-report.xml'))
+    loaded, failed = run_section_loads(app.SECTION_LOADERS)
+    assert failed == {}
+    assert sorted(loaded) == sorted(app.SECTION_LOADERS)
+    assert not loaded['capacity history'].empty
+
+
+def test_failed_section_load_is_reported(data_dir, monkeypatch):
+    extract_xml_data(get_fixture_path('battery-report.xml'))
+
+    def broken_loader(json_file):
+        raise RuntimeError("broken loader")
+
+    _, _, file_name = app.SECTION_LOADERS['battery usage']
+    monkeypatch.setitem(app.SECTION_LOADERS, 'battery usage', ('battery_usage_df', broken_loader, file_name))
+    (data_dir / 'recent-usage.json').write_text('[{"START TIME"', encoding='utf-8')
+
+    loaded, failed = run_section_loads(app.SECTION_LOADERS)
+    assert sorted(failed) == ['battery usage', 'recent usage']
+    assert failed['battery usage'] == "broken loader"
+    assert sorted(loaded) == ['capacity history', 'life estimates']
+
+
+def test_drain_sessions(data_dir):
+    # 2024-06-04 10:00:00, in seconds since the epoch
+    ten = 1717495200
+    rows = [
+        # Out of order: sessions are found on the rows sorted by start
+        {'START TIME': ten + 43 * 60 + 1, 'STATE': 'Active', 'DURATION': 5 * 60, 'ENERGY DRAINED (mWh)': 30},
+        {'START TIME': ten, 'STATE': 'Active', 'DURATION': 10 * 60, 'ENERGY DRAINED (mWh)': 100},
+        {'START TIME': ten + 12 * 60, 'STATE': 'Connected standby', 'DURATION': 20 * 60, 'ENERGY DRAINED (mWh)': 50},
+        # Exactly 5 minutes after the end of the row before: same session
+        {'START TIME': ten + 37 * 60, 'STATE': 'Active', 'DURATION': 60, 'ENERGY DRAINED (mWh)': 5},
+        # 5 minutes and 1 second after the end of the row before (first row): new session, which also has a state
+        # that drained nothing
+        {'START TIME': ten + 49 * 60, 'STATE': 'Suspended', 'DURATION': 60, 'ENERGY DRAINED (mWh)': None},
+    ]
+    for row in rows:
+        row['ENERGY DRAINED (%)'] = None
+    (data_dir / 'battery-usage.json').write_text(json.dumps(rows))
+    df = app.load_battery_usage_from_json(str(data_dir / 'battery-usage.json'))
+
+    sessions = app.get_drain_sessions(df)
+    assert list(sessions.index) == [pd.Timestamp('2024-06-04 10:00:00'), pd.Timestamp('2024-06-04 10:43:01')]
+    assert sorted(sessions.columns) == ['Active', 'Connected standby']
+    assert sessions['Active'].tolist() == [105, 30]
+    assert sessions['Connected standby'].tolist() == [50, 0]
+
+    # A wider gap merges them
+    sessions = app.get_drain_sessions(df, gap=np.timedelta64(10, 'm'))
+    assert len(sessions) == 1 and sessions['Active'].tolist() == [135]
+
+    assert app.get_drain_sessions(df.iloc[:0]).empty
@@ -0,0 +1,49 @@
+import json
+
+from archive import archive_snapshot, get_archive_dir, list_snapshots, load_snapshot, restore_snapshot
+from clean import clean_html
+from conftest import get_fixture_path
+from extract import extract_data
+from schema import DATA_VERSION_FILE, SUMMARY_FILE
+
+
+def read_data_files(directory):
+    return {path.name: json.loads(path.read_text(encoding='utf-8'))
+            for path in directory.iterdir() if path.suffix == '.json'}
+
+
+def test_snapshots_round_trip(data_dir, tmp_path):
+    cleaned_path = tmp_path / 'cleaned_battery-report.html'
+    clean_html(get_fixture_path('battery-report.html'), str(cleaned_path))
+    extract_data(str(cleaned_path), workers=1)
+    original = read_data_files(data_dir)
+    archive_dir = get_archive_dir(data_dir=str(data_dir))
+
+    first_id = archive_snapshot(str(data_dir))
+    # Nothing changed, so no new snapshot
+    assert archive_snapshot(str(data_dir)) == first_id
+    assert list_snapshots(archive_dir) == [first_id]
+
+    # A refresh that adds a row and changes the report
+    usage = original['battery-usage.json']
+    (data_dir / 'battery-usage.json').write_text(json.dumps(usage + [dict(usage[-1], STATE='Suspended')]))
+    report = dict(original['battery-report.json'], **{'REPORT TIME': '2024-06-05 10:11:12'})
+    (data_dir / 'battery-report.json').write_text(json.dumps(report))
+    second_id = archive_snapshot(str(data_dir))
+    assert list_snapshots(archive_dir) == [first_id, second_id]
+    assert load_snapshot(second_id, archive_dir)['battery-usage'][-1]['STATE'] == 'Suspended'
+
+    # Rows shared by both snapshots are stored once
+    with open(f'{archive_dir}/battery-usage.jsonl', 'rb') as f:
+        assert len(f.readlines()) == len(usage) + 1
+
+    restored_dir = tmp_path / 'restored'
+    restored_dir.mkdir()
+    restore_snapshot(first_id, str(restored_dir), archive_dir)
+    restored = read_data_files(restored_dir)
+    assert restored == original
+    assert restored[DATA_VERSION_FILE] == original[DATA_VERSION_FILE]
+    assert restored[SUMMARY_FILE] == original[SUMMARY_FILE]
+
+    restore_snapshot(second_id, str(restored_dir), archive_dir)
+    assert read_data_files(restored_dir)['battery-report.json'] == report
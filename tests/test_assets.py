@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import struct
+
+import pytest
+
+pytest.importorskip('PyQt6.QtWidgets')
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+import assets  # noqa: E402
+from build_assets import build_bundle  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def application():
+    # QPixmap needs a GUI application; a QApplication, so tests that draw widgets can share it
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(scope='module')
+def bundle_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('assets') / 'assets.bundle'
+    build_bundle(str(path))
+    return path
+
+
+@pytest.fixture
+def source_copy(tmp_path, monkeypatch):
+    # The suggestion icon's source, copied so the tests can change it
+    path = tmp_path / 'i_icon.png'
+    shutil.copy2(assets.get_source_path('suggestion'), path)
+    monkeypatch.setattr(assets, 'get_source_path', lambda name: path)
+    return path
+
+
+def use_bundle(monkeypatch, bundle):
+    monkeypatch.setattr(assets, 'BUNDLE', {'bundle': bundle})
+
+
+def test_read_bundle(bundle_path):
+    header, data = assets.read_bundle(bundle_path)
+    assert sorted(header['assets']) == sorted(assets.ASSETS)
+    for name, asset in header['assets'].items():
+        sizes = assets.ASSETS[name][1]
+        if len(sizes) > 1:
+            assert [(image['width'], image['height']) for image in asset['images']] == sizes
+        assert asset['sha256'] == assets.get_source_digest(assets.get_source_path(name))
+    last = header['assets']['app-icon']['images'][-1]
+    assert len(data) == last['offset'] + last['length']
+
+
+def test_read_bundle_rejects_other_files(bundle_path, tmp_path):
+    assert assets.read_bundle(tmp_path / 'missing.bundle') is None
+
+    other = tmp_path / 'other.bundle'
+    other.write_bytes(b'PNG' + bundle_path.read_bytes())
+    assert assets.read_bundle(other) is None
+
+    header = json.dumps({'version': assets.BUNDLE_VERSION - 1, 'assets': {}}).encode('utf-8')
+    other.write_bytes(assets.BUNDLE_MAGIC + struct.pack('<I', len(header)) + header)
+    assert assets.read_bundle(other) is None
+
+
+def test_is_stale(bundle_path, source_copy):
+    header, _ = assets.read_bundle(bundle_path)
+    asset = dict(header['assets']['suggestion'])
+    stat = os.stat(source_copy)
+    asset['mtime'] = stat.st_mtime_ns
+    assert not assets.is_stale('suggestion', asset)
+
+    # A copy or a checkout changes the time but not the content
+    os.utime(source_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not assets.is_stale('suggestion', asset)
+
+    # Same size, other content
+    content = bytearray(source_copy.read_bytes())
+    content[-20] ^= 0xff
+    source_copy.write_bytes(bytes(content))
+    assert assets.is_stale('suggestion', asset)
+
+    # Other size
+    source_copy.write_bytes(bytes(content) + b'\0')
+    assert assets.is_stale('suggestion', asset)
+
+    # Sources are not needed once the bundle is built
+    source_copy.unlink()
+    assert not assets.is_stale('suggestion', asset)
+
+
+def test_images_come_from_the_bundle(application, bundle_path, monkeypatch):
+    use_bundle(monkeypatch, assets.read_bundle(bundle_path))
+    images = assets.get_images('battery-health')
+    assert len(images) > 1
+    assert all((image.width(), image.height()) == (48, 48) for image, _ in images)
+    assert assets.get_pixmap('suggestion').size().width() == 26
+
+
+def test_stale_or_missing_bundle_falls_back_to_sources(application, bundle_path, source_copy, monkeypatch, capsys):
+    use_bundle(monkeypatch, None)
+    assert assets.get_images('suggestion') is None
+    assert not assets.get_pixmap('suggestion').isNull()
+
+    use_bundle(monkeypatch, assets.read_bundle(bundle_path))
+    source_copy.write_bytes(source_copy.read_bytes() + b'\0')
+    assert assets.get_images('suggestion') is None
+    assert 'run build_assets.py' in capsys.readouterr().out
+    pixmap = assets.get_pixmap('suggestion')
+    assert (pixmap.width(), pixmap.height()) == (26, 26)
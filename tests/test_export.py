@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from export import export_data
+from load_json import load_section_chunks
+from schema import DATA_VERSION, DATA_VERSION_FILE, ISO_DATE_FORMAT, decode_row, get_decoders
+
+# Decoded from the cells of the report like the extractors do, so the rows are the dicts they write
+CAPACITY_HISTORY = [decode_row(get_decoders('battery capacity history'), cells) for cells in [
+    ['2024-01-01', '2024-01-07', '47,000 mWh', '54,000 mWh'],
+    ['2024-01-08', '2024-01-14', '46,990 mWh', '54,000 mWh'],
+    ['2024-01-15', '2024-01-21', '-', '54,000 mWh'],
+    ['2024-01-22', '2024-01-28', '46,970 mWh', '54,000 mWh'],
+]]
+
+
+@pytest.fixture
+def export_dir(data_dir):
+    # Capacity history with a missing value in its second chunk of two rows, and battery usage without rows
+    (data_dir / 'battery-capacity-history.json').write_text(json.dumps(CAPACITY_HISTORY))
+    (data_dir / 'battery-usage.json').write_text('[]')
+    (data_dir / DATA_VERSION_FILE).write_text(json.dumps({'version': DATA_VERSION, 'date_format': ISO_DATE_FORMAT}))
+    return data_dir
+
+
+def test_chunks_share_dtypes(export_dir):
+    chunks = list(load_section_chunks(str(export_dir / 'battery-capacity-history.json'), 'battery capacity history', 2))
+    assert len(chunks) == 2
+    assert dict(chunks[0].dtypes) == dict(chunks[1].dtypes)
+
+
+def test_csv_numbers_keep_their_format(export_dir, tmp_path):
+    export_data(str(tmp_path / 'out' / 'battery.csv'), 'csv', str(export_dir), chunk_size=2)
+    lines = (tmp_path / 'out' / 'battery-battery-capacity-history.csv').read_text().splitlines()
+    assert [line.split(',')[2] for line in lines] == ['FULL CHARGE CAPACITY', '47000', '46990', '', '46970']
+    # Sections without rows keep their header
+    assert (tmp_path / 'out' / 'battery-battery-usage.csv').read_text().splitlines() == \
+        ['START TIME,STATE,DURATION,ENERGY DRAINED (%),ENERGY DRAINED (mWh)']
+
+
+def test_parquet_writes_every_listed_file(export_dir, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    paths = export_data(str(tmp_path / 'out' / 'battery.parquet'), 'parquet', str(export_dir), chunk_size=2)
+    history_path = str(tmp_path / 'out' / 'battery-battery-capacity-history.parquet')
+    usage_path = str(tmp_path / 'out' / 'battery-battery-usage.parquet')
+    assert sorted(paths) == sorted([history_path, usage_path])
+    assert parquet.read_table(history_path).num_rows == 4
+    usage = parquet.read_table(usage_path)
+    assert usage.num_rows == 0
+    assert usage.column_names == ['START TIME', 'STATE', 'DURATION', 'ENERGY DRAINED (%)', 'ENERGY DRAINED (mWh)']
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from clean import clean_html
+from conftest import get_fixture_path
+from extract import SECTIONS, extract_data, parse_sections
+from parsers import get_available_backends, get_backend
+from schema import DATA_VERSION_FILE
+
+# battery-report-day-first.html is battery-report.html with every date written as dd/mm/yyyy, as powercfg writes it
+# on a day-first Windows locale
+
+
+def read_cleaned_fixture(name, tmp_path):
+    cleaned_path = tmp_path / f'cleaned_{name}'
+    clean_html(get_fixture_path(name), str(cleaned_path))
+    return cleaned_path.read_text(encoding='utf-8')
+
+
+def extract_fixture(name, data_dir, tmp_path):
+    for path in data_dir.iterdir():
+        path.unlink()
+    cleaned_path = tmp_path / f'cleaned_{name}'
+    clean_html(get_fixture_path(name), str(cleaned_path))
+    extract_data(str(cleaned_path), workers=1)
+    return {path.name: json.loads(path.read_text(encoding='utf-8')) for path in data_dir.iterdir()}
+
+
+def test_day_first_timestamps(data_dir, tmp_path):
+    iso_files = extract_fixture('battery-report.html', data_dir, tmp_path)
+    day_first_files = extract_fixture('battery-report-day-first.html', data_dir, tmp_path)
+
+    assert iso_files[DATA_VERSION_FILE]['date_format'] == '%Y-%m-%d'
+    assert day_first_files[DATA_VERSION_FILE]['date_format'] == '%d/%m/%Y'
+    for name in ['recent-usage.json', 'battery-usage.json']:
+        times = [row['START TIME'] for row in day_first_files[name]]
+        assert times and all(isinstance(time, int) for time in times), name
+        assert day_first_files[name] == iso_files[name], name
+
+
+@pytest.mark.parametrize('backend_name', get_available_backends())
+def test_backends_give_the_same_sections(backend_name, tmp_path):
+    markup = read_cleaned_fixture('battery-report.html', tmp_path)
+    expected = parse_sections(markup, get_backend('html.parser'))
+    assert all(expected[title] for title, _, _, _ in SECTIONS)
+    assert expected['battery report']['REPORT TIME'] == '2024-06-04 10:11:12'
+    assert parse_sections(markup, get_backend(backend_name)) == expected
+
+
+def test_parallel_extraction_matches_serial(data_dir, tmp_path):
+    markup = read_cleaned_fixture('battery-report.html', tmp_path)
+    backend = get_backend()
+    assert parse_sections(markup, backend, workers=2) == parse_sections(markup, backend, workers=1)
+
+    serial_files = extract_fixture('battery-report.html', data_dir, tmp_path)
+    for path in data_dir.iterdir():
+        path.unlink()
+    extract_data(str(tmp_path / 'cleaned_battery-report.html'), workers=2)
+    assert {path.name: json.loads(path.read_text(encoding='utf-8')) for path in data_dir.iterdir()} == serial_files
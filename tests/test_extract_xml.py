@@ -0,0 +1,42 @@
+import json
+
+from clean import clean_html
+from conftest import get_fixture_path
+from extract import SECTIONS, extract_data
+from extract_xml import extract_xml_data, parse_xml_report
+
+# battery-report.html and battery-report.xml in fixtures/ are the same report, as powercfg writes it with and
+# without /xml
+
+
+def read_data_files(directory):
+    return {path.name: json.loads(path.read_text(encoding='utf-8')) for path in directory.iterdir()}
+
+
+def test_xml_sections_match_html(data_dir, tmp_path):
+    cleaned_path = tmp_path / 'cleaned_battery-report.html'
+    clean_html(get_fixture_path('battery-report.html'), str(cleaned_path))
+    extract_data(str(cleaned_path))
+    html_files = read_data_files(data_dir)
+    for path in data_dir.iterdir():
+        path.unlink()
+
+    extract_xml_data(get_fixture_path('battery-report.xml'))
+    xml_files = read_data_files(data_dir)
+
+    assert sorted(xml_files) == sorted(html_files)
+    assert xml_files['battery-report.json']['REPORT TIME'] == '2024-06-04 10:11:12'
+    assert html_files['battery-report.json']['REPORT TIME'] == '2024-06-04 10:11:12'
+    for name in html_files:
+        assert xml_files[name] == html_files[name], name
+
+
+def test_parse_xml_report():
+    sections = parse_xml_report(get_fixture_path('battery-report.xml'))
+    assert list(sections) == [title for title, _, _, _ in SECTIONS]
+    assert sections['battery report']['COMPUTER NAME'] == 'DESKTOP-TEST'
+    assert sections['installed batteries']['DESIGN CAPACITY'] == '54,000 mWh'
+    # Entries on AC are left out of battery usage
+    assert len(sections['recent usage']) == 4
+    assert [row['STATE'] for row in sections['battery usage']] == ['Active', 'Connected standby', 'Report generated']
+    assert len(sections['battery capacity history']) == 2
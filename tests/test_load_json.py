@@ -0,0 +1,81 @@
+import json
+import re
+
+import pandas as pd
+import pytest
+
+from load_json import compact_chunk, compact_frame, load_section, validate_frame
+from schema import DATA_VERSION, DATA_VERSION_FILE, ISO_DATE_FORMAT
+
+BATTERY_USAGE = [
+    {'START TIME': 1717495872, 'STATE': 'Active', 'DURATION': 600, 'ENERGY DRAINED (%)': 2.5,
+     'ENERGY DRAINED (mWh)': 1200},
+    {'START TIME': 1717496472, 'STATE': 'Connected standby', 'DURATION': 3600, 'ENERGY DRAINED (%)': None,
+     'ENERGY DRAINED (mWh)': None},
+    {'START TIME': '04/06/2024 11:11:12', 'STATE': 'Active', 'DURATION': 60, 'ENERGY DRAINED (%)': 0.5,
+     'ENERGY DRAINED (mWh)': 240},
+]
+
+
+@pytest.fixture
+def usage_file(data_dir):
+    path = data_dir / 'battery-usage.json'
+    path.write_text(json.dumps(BATTERY_USAGE))
+    (data_dir / DATA_VERSION_FILE).write_text(json.dumps({'version': DATA_VERSION, 'date_format': ISO_DATE_FORMAT}))
+    return str(path)
+
+
+def test_loaded_sections_use_compact_dtypes(usage_file):
+    df = load_section(usage_file, 'battery usage')
+    assert df['START TIME'].dtype.kind == 'M'
+    # Timestamps that could not be read are missing, not errors
+    assert df['START TIME'].isna().tolist() == [False, False, True]
+    assert isinstance(df['STATE'].dtype, pd.CategoricalDtype)
+    assert df['DURATION'].dtype.kind == 'm'
+    assert df['ENERGY DRAINED (%)'].dtype == 'float32'
+    # Missing values were filled with 0, so mWh fits in int32
+    assert df['ENERGY DRAINED (mWh)'].dtype == 'int32'
+    assert df['ENERGY DRAINED (mWh)'].tolist() == [1200, 0, 240]
+
+    # A column without any value loads as zeros rather than failing validation
+    with open(usage_file, 'w') as f:
+        json.dump([dict(row, **{'ENERGY DRAINED (%)': None}) for row in BATTERY_USAGE], f)
+    df = load_section(usage_file, 'battery usage')
+    assert df['ENERGY DRAINED (%)'].dtype == 'float32'
+    assert df['ENERGY DRAINED (%)'].tolist() == [0, 0, 0]
+
+
+def test_compact_chunk_dtypes_come_from_the_schema(usage_file):
+    frame = compact_frame(load_section(usage_file, 'battery usage', compact=False), 'battery usage')
+    chunk = compact_chunk(load_section(usage_file, 'battery usage', compact=False), 'battery usage')
+    assert chunk['ENERGY DRAINED (mWh)'].dtype == 'Int64'
+    assert chunk['ENERGY DRAINED (%)'].dtype == frame['ENERGY DRAINED (%)'].dtype
+    assert chunk['DURATION'].dtype == frame['DURATION'].dtype
+
+
+def test_validate_frame_rejects_other_dtypes(usage_file):
+    df = load_section(usage_file, 'battery usage', compact=False)
+    validate_frame(df, 'battery usage')
+
+    # All-missing numbers and empty text are valid
+    empty = df.copy()
+    empty['ENERGY DRAINED (mWh)'] = None
+    empty['STATE'] = pd.Series([None] * len(df), dtype=object)
+    validate_frame(empty, 'battery usage')
+
+    with pytest.raises(ValueError, match='expected columns'):
+        validate_frame(df.drop(columns=['STATE']), 'battery usage')
+    with pytest.raises(ValueError, match='expected columns'):
+        validate_frame(df[list(reversed(df.columns))], 'battery usage')
+
+    invalid = {
+        # Timestamps that were never converted from the stored seconds and text
+        'START TIME': pd.Series([row['START TIME'] for row in BATTERY_USAGE], dtype=object),
+        'STATE': pd.Series([1, 2, 3]),
+        'ENERGY DRAINED (mWh)': pd.Series(['1,200 mWh', '-', '240 mWh']),
+    }
+    for column, values in invalid.items():
+        other = df.copy()
+        other[column] = values
+        with pytest.raises(ValueError, match=re.escape(f'column {column} ')):
+            validate_frame(other, 'battery usage')
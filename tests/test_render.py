@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+
+import pytest
+
+pytest.importorskip('PyQt6.QtCharts')
+
+import render  # noqa: E402
+from conftest import get_fixture_path  # noqa: E402
+from extract_xml import extract_xml_data  # noqa: E402
+
+
+@pytest.fixture
+def machine_dir(data_dir):
+    extract_xml_data(get_fixture_path('battery-report.xml'))
+    return str(data_dir)
+
+
+def crash_on_marker(data_dir, *args):
+    # Stands in for a crash in Qt: the worker process dies without raising
+    if os.path.basename(data_dir) == 'crash':
+        os._exit(1)
+    return RENDER_MACHINE(data_dir, *args)
+
+
+RENDER_MACHINE = render.render_machine
+
+
+def test_render_machine(machine_dir, tmp_path):
+    paths = render.render_fleet([machine_dir], str(tmp_path / 'out'), image_format='svg', workers=1)
+    assert [os.path.basename(path) for path in paths] == [f'DESKTOP-TEST-{chart}.svg' for chart in render.CHARTS]
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            assert '<svg' in f.read()
+
+
+def test_failed_machines_do_not_stop_fleet(machine_dir, tmp_path, monkeypatch, capsys):
+    # Worker processes have to be forked to render with the patched function
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip("needs forked worker processes")
+    monkeypatch.setattr(render, 'render_machine', crash_on_marker)
+    crash_dir = tmp_path / 'crash'
+    crash_dir.mkdir()
+    data_dirs = [machine_dir, str(tmp_path / 'missing'), str(crash_dir), machine_dir, machine_dir]
+    paths = render.render_fleet(data_dirs, str(tmp_path / 'out'), charts=['capacity-history'], workers=2)
+
+    # Every good machine is rendered, whichever worker died next to it
+    assert sorted(os.path.basename(path) for path in paths) == \
+        ['DESKTOP-TEST-2-capacity-history.png', 'DESKTOP-TEST-3-capacity-history.png',
+         'DESKTOP-TEST-capacity-history.png']
+    output = capsys.readouterr().out
+    assert f"Error rendering {crash_dir}: the renderer process crashed" in output
+    assert "2 of 5 machines failed" in output
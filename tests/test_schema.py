@@ -0,0 +1,23 @@
+import pandas as pd
+
+from load_json import parse_timestamps
+from schema import decode_timestamp, get_timestamp_seconds
+
+
+def test_decode_timestamp():
+    assert decode_timestamp('2024-06-04 10:11:12') == 1717495872
+    assert decode_timestamp('2024-06-04T10:11:12.345') == 1717495872
+    assert decode_timestamp(1717495872) == 1717495872
+    assert decode_timestamp('-') is None
+    assert decode_timestamp('') is None
+    assert decode_timestamp(None) is None
+
+
+def test_undecodable_timestamp_keeps_its_text():
+    assert decode_timestamp(' 04/06/2024 10:11:12 ') == '04/06/2024 10:11:12'
+    assert get_timestamp_seconds('04/06/2024 10:11:12') is None
+    assert get_timestamp_seconds(1717495872) == 1717495872
+
+    times = parse_timestamps(pd.Series([1717495872, '04/06/2024 10:11:12', None], dtype=object))
+    assert times.iloc[0] == pd.Timestamp('2024-06-04 10:11:12')
+    assert times.iloc[1:].isna().all()
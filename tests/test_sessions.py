@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from sessions import SESSION_GAP, SessionIndex, label_sessions, segment_sessions
+
+
+def make_recent_usage(rows):
+    # (start time, source, capacity %, capacity mWh) -> recent usage frame as load_recent_usage returns it
+    return pd.DataFrame({
+        'START TIME': pd.to_datetime([row[0] for row in rows]),
+        'STATE': 'Active',
+        'SOURCE': [row[1] for row in rows],
+        'CAPACITY REMAINING (%)': [row[2] for row in rows],
+        'CAPACITY REMAINING (mWh)': [row[3] for row in rows],
+    })
+
+
+def test_label_sessions():
+    start = np.array(['2024-06-04T10:00', '2024-06-04T10:30', '2024-06-04T11:00', '2024-06-04T12:00',
+                      '2024-06-04T12:30'], dtype='datetime64[ns]')
+    end = start + np.timedelta64(30, 'm')
+    on_battery = [True, True, False, True, True]
+    assert label_sessions(start, end, on_battery).tolist() == [0, 0, -1, 1, 1]
+
+    # A break longer than the gap splits a run on battery
+    end[3] = start[3] + np.timedelta64(10, 'm')
+    assert label_sessions(start, end, on_battery).tolist() == [0, 0, -1, 1, 2]
+    assert label_sessions(start, end, on_battery, gap=np.timedelta64(30, 'm')).tolist() == [0, 0, -1, 1, 1]
+    assert label_sessions(start[:0], end[:0], []).tolist() == []
+
+
+def test_segment_sessions():
+    df = make_recent_usage([
+        ('2024-06-04 08:00', 'AC', 100.0, 50000),
+        ('2024-06-04 09:00', 'Battery', 100.0, 50000),
+        ('2024-06-04 10:00', 'Battery', 80.0, 40000),
+        ('2024-06-04 11:00', 'AC', 60.0, 30000),
+        ('2024-06-04 12:00', 'Battery', 90.0, 45000),
+        ('2024-06-04 12:30', 'Battery', 85.0, 42500),
+    ])
+    # Rows out of order are sorted first
+    sessions = segment_sessions(df.iloc[::-1])
+    assert sessions['START TIME'].tolist() == [pd.Timestamp('2024-06-04 09:00'), pd.Timestamp('2024-06-04 12:00')]
+    # The first session ends at the row back on AC, the second at the end of the log
+    assert sessions['END TIME'].tolist() == [pd.Timestamp('2024-06-04 11:00'), pd.Timestamp('2024-06-04 12:30')]
+    assert sessions['DURATION'].tolist() == [pd.Timedelta(hours=2), pd.Timedelta(minutes=30)]
+    assert sessions['DEPTH OF DISCHARGE (%)'].tolist() == [40.0, 5.0]
+    assert sessions['ENERGY DRAINED (mWh)'].tolist() == [20000.0, 2500.0]
+    assert sessions['DRAIN RATE (mWh/h)'].tolist() == [10000.0, 5000.0]
+
+    empty = segment_sessions(df.iloc[:0])
+    assert empty.empty and str(empty['START TIME'].dtype) == 'datetime64[ns]'
+
+
+def test_segment_sessions_uses_the_session_gap():
+    # Consecutive rows on battery last until the next one, so the gap never splits them
+    df = make_recent_usage([
+        ('2024-06-04 09:00', 'Battery', 100.0, 50000),
+        ('2024-06-04 18:00', 'Battery', 50.0, 25000),
+    ])
+    assert len(segment_sessions(df, gap=SESSION_GAP)) == 1
+
+
+def make_sessions(rates):
+    starts = pd.date_range('2024-06-01', periods=len(rates), freq='D')
+    return pd.DataFrame({'START TIME': starts, 'DRAIN RATE (mWh/h)': rates})
+
+
+def test_worst_sessions():
+    index = SessionIndex(make_sessions([5000.0, 9000.0, np.nan, 7000.0, 9000.0, 3000.0]).iloc[::-1])
+    assert len(index) == 6
+
+    worst = index.worst(3)
+    assert worst['DRAIN RATE (mWh/h)'].tolist() == [9000.0, 9000.0, 7000.0]
+    # Ties keep the order of the start times
+    assert worst['START TIME'].tolist()[:2] == [pd.Timestamp('2024-06-02'), pd.Timestamp('2024-06-05')]
+    # Sessions without a rate are never listed
+    assert len(index.worst(10)) == 5
+
+    # The last days are counted back from the latest session, or from `now`
+    assert index.worst(10, days=1)['DRAIN RATE (mWh/h)'].tolist() == [9000.0, 3000.0]
+    assert index.worst(10, days=2, now='2024-06-05')['DRAIN RATE (mWh/h)'].tolist() == [9000.0, 7000.0, 3000.0]
+    assert index.between('2024-06-02', '2024-06-04')['START TIME'].tolist() == \
+        [pd.Timestamp('2024-06-02'), pd.Timestamp('2024-06-03')]
@@ -0,0 +1,107 @@
+import datetime
+import json
+
+import pytest
+
+import sources
+from schema import DATA_VERSION, DATA_VERSION_FILE, SUMMARY_FILE
+from sources import SysfsSource
+
+
+def write_files(directory, values):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, value in values.items():
+        (directory / name).write_text(f'{value}\n')
+
+
+@pytest.fixture
+def power_supply(tmp_path, monkeypatch):
+    # A fake /sys/class/power_supply with the charger, a battery reporting energy (µWh) and a second battery
+    path = tmp_path / 'power_supply'
+    write_files(path / 'AC', {'online': 0})
+    write_files(path / 'BAT0', {
+        'status': 'Discharging',
+        'capacity': 80,
+        'energy_now': 38400000,
+        'energy_full': 48000000,
+        'energy_full_design': 54000000,
+        'power_now': 9600000,
+        'cycle_count': 123,
+        'model_name': 'DELL 1234',
+        'manufacturer': 'SMP',
+        'serial_number': '42',
+        'technology': 'Li-ion',
+    })
+    write_files(path / 'BAT1', {'status': 'Unknown', 'capacity': 10})
+    dmi = tmp_path / 'dmi'
+    write_files(dmi, {'sys_vendor': 'Dell Inc.', 'product_name': 'XPS 13', 'bios_version': '1.2.3',
+                      'bios_date': '01/02/2024'})
+    monkeypatch.setattr(sources, 'DMI_PATH', str(dmi))
+    return path
+
+
+def read_data_file(data_dir, name):
+    return json.loads((data_dir / name).read_text(encoding='utf-8'))
+
+
+def test_collect(power_supply, data_dir):
+    source = SysfsSource(str(power_supply))
+    assert source.get_battery_path() == str(power_supply / 'BAT0')
+    source.collect()
+
+    batteries = read_data_file(data_dir, 'installed-batteries.json')
+    assert batteries['NAME'] == 'DELL 1234' and batteries['CHEMISTRY'] == 'Li-ion'
+    assert batteries['DESIGN CAPACITY'] == '54,000 mWh'
+    assert batteries['FULL CHARGE CAPACITY'] == '48,000 mWh'
+    assert batteries['CYCLE COUNT'] == '123'
+    report = read_data_file(data_dir, 'battery-report.json')
+    assert report['SYSTEM PRODUCT NAME'] == 'Dell Inc. XPS 13'
+    assert report['BIOS'] == '1.2.3 01/02/2024'
+
+    today = datetime.date.today().isoformat()
+    assert read_data_file(data_dir, 'battery-capacity-history.json') == [
+        {'START DATE': today, 'END DATE': today, 'FULL CHARGE CAPACITY': 48000, 'DESIGN CAPACITY': 54000}]
+    assert read_data_file(data_dir, 'recent-usage.json') == []
+    assert read_data_file(data_dir, SUMMARY_FILE)['health'] == pytest.approx(48000 / 54000 * 100)
+    assert read_data_file(data_dir, DATA_VERSION_FILE) == {'version': DATA_VERSION, 'date_format': '%Y-%m-%d'}
+
+    # A second collection on the same day updates today's entry instead of adding one
+    (power_supply / 'BAT0' / 'energy_full').write_text('47000000\n')
+    source.collect()
+    history = read_data_file(data_dir, 'battery-capacity-history.json')
+    assert [entry['FULL CHARGE CAPACITY'] for entry in history] == [47000]
+
+
+def test_charge_only_battery(tmp_path):
+    # Batteries that report charge (µAh) are converted to mWh with the design voltage (µV)
+    path = tmp_path / 'power_supply'
+    write_files(path / 'BAT0', {
+        'status': 'Charging',
+        'capacity': 50,
+        'charge_now': 2000000,
+        'charge_full': 4000000,
+        'charge_full_design': 5000000,
+        'voltage_min_design': 11400000,
+        'current_now': 1000000,
+        'voltage_now': 12000000,
+    })
+    source = SysfsSource(str(path))
+    battery_path = source.get_battery_path()
+    assert source.read_energy(battery_path, 'full_design') == 57000
+    assert source.read_energy(battery_path, 'full') == 45600
+    assert source.read_power(battery_path) == 12000
+    assert source.get_installed_batteries(battery_path)['CYCLE COUNT'] == '-'
+    assert source.get_current_battery_info() == {'Percent': 50, 'Seconds left': '- -', 'Plugged in': 'Yes'}
+
+
+def test_current_battery_info(power_supply):
+    info = SysfsSource(str(power_supply)).get_current_battery_info()
+    # 38400 mWh left at 9600 mW
+    assert info == {'Percent': 80, 'Seconds left': datetime.timedelta(hours=4), 'Plugged in': 'No'}
+
+
+def test_no_battery(tmp_path):
+    source = SysfsSource(str(tmp_path))
+    assert source.get_battery_path() is None
+    assert not source.is_available()
+    assert source.get_current_battery_info() is None
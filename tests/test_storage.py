@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+import storage
+from storage import atomic_write, get_available_serializers, get_serializer, save_data
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'battery-report.json'
+    save_data({'COMPUTER NAME': 'OLD'}, str(path))
+    return path
+
+
+def assert_unchanged(path):
+    assert json.loads(path.read_text(encoding='utf-8')) == {'COMPUTER NAME': 'OLD'}
+    assert os.listdir(path.parent) == [path.name]
+
+
+@pytest.mark.parametrize('serializer_name', get_available_serializers())
+def test_serializers_write_the_same_data(serializer_name, tmp_path):
+    data = [{'START TIME': 1717495872, 'STATE': 'Active', 'NAME': 'Batería'}, {'START TIME': None}]
+    path = tmp_path / 'recent-usage.json'
+    save_data(data, str(path), get_serializer(serializer_name))
+    assert json.loads(path.read_text(encoding='utf-8')) == data
+    assert os.listdir(tmp_path) == [path.name]
+
+
+def test_failed_serialization_keeps_the_old_file(data_file):
+    with pytest.raises(TypeError):
+        save_data({'COMPUTER NAME': object()}, str(data_file))
+    assert_unchanged(data_file)
+
+
+def test_failed_write_keeps_the_old_file(data_file, monkeypatch):
+    def fail(fd):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(storage.os, 'fsync', fail)
+    with pytest.raises(OSError):
+        save_data({'COMPUTER NAME': 'NEW'}, str(data_file))
+    assert_unchanged(data_file)
+
+
+def test_replace_retries_while_the_target_is_open(data_file, monkeypatch):
+    monkeypatch.setattr(storage, 'REPLACE_RETRY_DELAY', 0)
+    replace = os.replace
+    attempts = []
+
+    def locked(source, target):
+        attempts.append(target)
+        if len(attempts) < 3:
+            raise PermissionError('in use')
+        replace(source, target)
+
+    monkeypatch.setattr(storage.os, 'replace', locked)
+    atomic_write(str(data_file), b'{"COMPUTER NAME":"NEW"}')
+    assert len(attempts) == 3
+    assert json.loads(data_file.read_text(encoding='utf-8')) == {'COMPUTER NAME': 'NEW'}
+    assert os.listdir(data_file.parent) == [data_file.name]
+
+    # Still locked after every retry: the error is raised and the file on disk left as it was
+    def always_locked(source, target):
+        attempts.append(target)
+        raise PermissionError('in use')
+
+    attempts.clear()
+    monkeypatch.setattr(storage.os, 'replace', always_locked)
+    with pytest.raises(PermissionError):
+        atomic_write(str(data_file), b'{"COMPUTER NAME":"OLD"}')
+    assert len(attempts) == storage.REPLACE_RETRIES
+    assert json.loads(data_file.read_text(encoding='utf-8')) == {'COMPUTER NAME': 'NEW'}
+    assert os.listdir(data_file.parent) == [data_file.name]
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('PyQt6.QtCore')
+
+from PyQt6.QtCore import Qt  # noqa: E402
+
+from table_model import DataFrameModel  # noqa: E402
+
+
+def get_sorted_ids(df, column, order):
+    model = DataFrameModel(df)
+    model.sort(list(df.columns).index(column), order)
+    return [int(df['ID'].iloc[row]) for row in model.rows]
+
+
+def test_sort_keeps_equal_keys_in_report_order():
+    df = pd.DataFrame({
+        'ID': [0, 1, 2, 3, 4, 5],
+        'MWH': [10.0, 20.0, np.nan, 10.0, 20.0, np.nan],
+        'STATE': ['Active', 'Suspended', 'Active', 'Suspended', 'Active', 'Active'],
+        'TIME': pd.to_datetime(['2024-06-04', None, '2024-06-03', '2024-06-04', '2024-06-03', None]),
+    })
+    ascending, descending = Qt.SortOrder.AscendingOrder, Qt.SortOrder.DescendingOrder
+
+    assert get_sorted_ids(df, 'MWH', ascending) == [0, 3, 1, 4, 2, 5]
+    assert get_sorted_ids(df, 'MWH', descending) == [1, 4, 0, 3, 2, 5]
+    assert get_sorted_ids(df, 'STATE', ascending) == [0, 2, 4, 5, 1, 3]
+    assert get_sorted_ids(df, 'STATE', descending) == [1, 3, 0, 2, 4, 5]
+    assert get_sorted_ids(df, 'TIME', descending) == [0, 3, 2, 4, 1, 5]
+
+
+def test_sort_after_filter():
+    df = pd.DataFrame({'ID': [0, 1, 2, 3], 'MWH': [5, 30, 30, 40]})
+    model = DataFrameModel(df)
+    model.set_filter(1, '>10')
+    model.sort(1, Qt.SortOrder.DescendingOrder)
+    assert model.rows.tolist() == [3, 1, 2]
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+pytest.importorskip('PyQt6.QtCharts')
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCharts import QBarSeries, QBarSet, QChart, QLineSeries, QStackedBarSeries, QValueAxis  # noqa: E402
+from PyQt6.QtCore import Qt  # noqa: E402
+from PyQt6.QtGui import QColor, QPalette  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+import themes  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def application():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def theme_cache(monkeypatch):
+    monkeypatch.setattr(themes, 'THEME_CACHE', {})
+    return themes.THEME_CACHE
+
+
+def test_get_theme_builds_each_theme_once(application, theme_cache, monkeypatch):
+    built = []
+    theme_class = themes.Theme
+
+    def build(name):
+        built.append(name)
+        return theme_class(name)
+
+    monkeypatch.setattr(themes, 'Theme', build)
+    for name in ['dark', 'light', 'dark', 'light', 'dark']:
+        assert themes.get_theme(name).name == name
+    assert built == ['dark', 'light']
+    assert themes.get_theme('dark') is theme_cache['dark']
+    assert themes.get_theme('dark').stylesheet
+    assert themes.get_theme('dark').palette.color(QPalette.ColorRole.Window) == QColor(53, 53, 53)
+
+
+def make_chart():
+    chart = QChart()
+    line = QLineSeries()
+    line.append(0, 1)
+    chart.addSeries(line)
+    bars = QStackedBarSeries()
+    for label in ['Active', 'Connected standby']:
+        bar_set = QBarSet(label)
+        bar_set.append(1)
+        bars.append(bar_set)
+    chart.addSeries(bars)
+    single = QBarSeries()
+    single.append(QBarSet('Suspended'))
+    single.append(QBarSet('Hibernate'))
+    chart.addSeries(single)
+    axis = QValueAxis()
+    chart.addAxis(axis, Qt.AlignmentFlag.AlignLeft)
+    return chart, line, bars, single, axis
+
+
+def test_style_chart_recolours_every_series(application, theme_cache):
+    chart, line, bars, single, axis = make_chart()
+    for name in ['light', 'dark']:
+        theme = themes.get_theme(name)
+        themes.style_chart(chart, theme)
+        colors = [QColor(color) for color in themes.THEMES[name]['chart']['series']]
+
+        assert chart.backgroundBrush().color() == QColor(themes.THEMES[name]['chart']['background'])
+        assert chart.titleBrush().color() == theme.text_color
+        assert axis.gridLineColor() == theme.grid_color
+        assert axis.labelsBrush().color() == theme.text_color
+        # Line series and every bar set take the colours of the theme in order, wrapping around
+        assert line.color() == colors[0]
+        assert [bar_set.color() for bar_set in bars.barSets()] == colors[1:3]
+        assert [bar_set.borderColor() for bar_set in bars.barSets()] == colors[1:3]
+        assert [bar_set.color() for bar_set in single.barSets()] == [colors[3], colors[0]]
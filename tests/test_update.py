@@ -0,0 +1,226 @@
+import hashlib
+import http.server
+import os
+import re
+import threading
+import time
+
+import pytest
+
+from update import UpdateError, check_for_updates, download_update
+
+RELEASE = b'''{"tag_name": "v2.1.0", "assets": [
+    {"name": "Battery-Health-Report-Generator-setup.exe",
+     "browser_download_url": "https://example.invalid/setup.exe",
+     "digest": "sha256:0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"}]}'''
+RELEASE_ETAG = '"release-1"'
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    # Answers with the handler function of the server's current test; requests are recorded on the server
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        self.server.handle_get(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    # A local HTTP stand-in for GitHub on 127.0.0.1
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def send_release(handler):
+    if handler.headers.get('If-None-Match') == RELEASE_ETAG:
+        handler.send_response(304)
+        handler.end_headers()
+        return
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Content-Length', str(len(RELEASE)))
+    handler.send_header('ETag', RELEASE_ETAG)
+    handler.end_headers()
+    handler.wfile.write(RELEASE)
+
+
+EXPECTED_UPDATE = ('v2.1.0', 'https://example.invalid/setup.exe',
+                   'sha256:0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef')
+
+
+def test_check_uses_etag(server, data_dir):
+    server.handle_get = send_release
+    assert check_for_updates(server.url + '/releases/latest') == EXPECTED_UPDATE
+    assert (data_dir / 'update-check.json').exists()
+
+    # The second check sends the ETag back and reuses the cached release on 304
+    assert check_for_updates(server.url + '/releases/latest') == EXPECTED_UPDATE
+    assert len(server.requests) == 2
+    assert 'If-None-Match' not in server.requests[0][1]
+    assert server.requests[1][1]['If-None-Match'] == RELEASE_ETAG
+
+
+def test_check_throttled(server, data_dir):
+    server.handle_get = send_release
+    assert check_for_updates(server.url, min_interval=3600) == EXPECTED_UPDATE
+    assert check_for_updates(server.url, min_interval=3600) == EXPECTED_UPDATE
+    assert len(server.requests) == 1
+
+    # Without an interval every check asks the server
+    assert check_for_updates(server.url) == EXPECTED_UPDATE
+    assert len(server.requests) == 2
+
+
+def test_check_timeout(server, data_dir):
+    def send_late(handler):
+        time.sleep(1)
+        send_release(handler)
+
+    server.handle_get = send_late
+    start = time.monotonic()
+    assert check_for_updates(server.url, timeout=0.2) == (None, None, None)
+    assert time.monotonic() - start < 1
+    assert not (data_dir / 'update-check.json').exists()
+
+
+def test_check_failure_keeps_cache(server, data_dir):
+    server.handle_get = send_release
+    check_for_updates(server.url)
+
+    def send_error(handler):
+        handler.send_response(500)
+        handler.end_headers()
+
+    server.handle_get = send_error
+    assert check_for_updates(server.url) == (None, None, None)
+    # The release cached by the first check is still used when the server is back
+    server.handle_get = send_release
+    assert check_for_updates(server.url) == EXPECTED_UPDATE
+    assert server.requests[-1][1]['If-None-Match'] == RELEASE_ETAG
+
+
+INSTALLER = os.urandom(300 * 1024)
+INSTALLER_DIGEST = 'sha256:' + hashlib.sha256(INSTALLER).hexdigest()
+
+
+def send_installer(handler, cut_at=None):
+    # Honours "Range: bytes=<start>-"; with cut_at the connection is closed after that many bytes of the file
+    start = 0
+    match = re.match(r'bytes=(\d+)-', handler.headers.get('Range') or '')
+    if match:
+        start = int(match.group(1))
+        if start >= len(INSTALLER):
+            handler.send_response(416)
+            handler.end_headers()
+            return
+        handler.send_response(206)
+        handler.send_header('Content-Range', f'bytes {start}-{len(INSTALLER) - 1}/{len(INSTALLER)}')
+    else:
+        handler.send_response(200)
+    handler.send_header('Content-Length', str(len(INSTALLER) - start))
+    handler.end_headers()
+    handler.wfile.write(INSTALLER[start:cut_at])
+    handler.close_connection = True
+
+
+def test_download_verified(server, tmp_path):
+    server.handle_get = send_installer
+    installer_path = str(tmp_path / 'setup.exe')
+    progress = []
+    assert download_update(server.url + '/setup.exe', installer_path, INSTALLER_DIGEST,
+                           progress_callback=lambda done, total: progress.append((done, total))) == installer_path
+    with open(installer_path, 'rb') as f:
+        assert f.read() == INSTALLER
+    assert not os.path.exists(installer_path + '.part')
+    assert progress[-1] == (len(INSTALLER), len(INSTALLER))
+
+
+def test_download_resumes_part_file(server, tmp_path):
+    server.handle_get = send_installer
+    installer_path = str(tmp_path / 'setup.exe')
+    with open(installer_path + '.part', 'wb') as f:
+        f.write(INSTALLER[:100000])
+
+    download_update(server.url, installer_path, INSTALLER_DIGEST)
+    assert server.requests[0][1]['Range'] == 'bytes=100000-'
+    with open(installer_path, 'rb') as f:
+        assert f.read() == INSTALLER
+
+
+def test_download_retries_interrupted_transfer(server, tmp_path):
+    # The first response is cut off half way, the retry asks for the rest
+    def send_interrupted(handler):
+        send_installer(handler, cut_at=len(INSTALLER) // 2 if len(server.requests) == 1 else None)
+
+    server.handle_get = send_interrupted
+    installer_path = str(tmp_path / 'setup.exe')
+    download_update(server.url, installer_path, INSTALLER_DIGEST, retry_delay=0)
+    assert len(server.requests) == 2
+    assert 'Range' not in server.requests[0][1]
+    # The chunk being read when the connection closed is read again
+    resumed_at = int(re.match(r'bytes=(\d+)-', server.requests[1][1]['Range']).group(1))
+    assert 0 < resumed_at <= len(INSTALLER) // 2
+    with open(installer_path, 'rb') as f:
+        assert f.read() == INSTALLER
+
+
+def test_download_gives_up_after_retries(server, tmp_path):
+    server.handle_get = lambda handler: send_installer(handler, cut_at=1000)
+    installer_path = str(tmp_path / 'setup.exe')
+    with pytest.raises(UpdateError):
+        download_update(server.url, installer_path, INSTALLER_DIGEST, retries=2, retry_delay=0)
+    assert len(server.requests) == 3
+    assert not os.path.exists(installer_path)
+
+
+def test_download_digest_mismatch(server, tmp_path):
+    server.handle_get = send_installer
+    installer_path = str(tmp_path / 'setup.exe')
+    with pytest.raises(UpdateError):
+        download_update(server.url, installer_path, 'sha256:' + hashlib.sha256(b'other').hexdigest())
+    assert not os.path.exists(installer_path + '.part')
+    assert not os.path.exists(installer_path)
+
+
+def test_download_rejects_unknown_digest(server, tmp_path):
+    server.handle_get = send_installer
+    with pytest.raises(UpdateError):
+        download_update(server.url, str(tmp_path / 'setup.exe'), 'crc99:abcdef')
+    assert server.requests == []
+
+
+def test_download_cancelled_during_retry_wait(server, tmp_path):
+    server.handle_get = lambda handler: send_installer(handler, cut_at=1000)
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+    start = time.monotonic()
+    with pytest.raises(UpdateError, match='cancelled'):
+        download_update(server.url, str(tmp_path / 'setup.exe'), INSTALLER_DIGEST, cancel_event=cancel_event,
+                        retry_delay=30)
+    assert time.monotonic() - start < 5
+
+
+def test_download_refuses_unverified_installer(server, tmp_path):
+    server.handle_get = send_installer
+    installer_path = str(tmp_path / 'setup.exe')
+    with pytest.raises(UpdateError, match='checksum'):
+        download_update(server.url, installer_path)
+    assert server.requests == []
+    assert not os.path.exists(installer_path)
+
+
+def test_download_unverified_installer_when_allowed(server, tmp_path):
+    server.handle_get = send_installer
+    installer_path = str(tmp_path / 'setup.exe')
+    download_update(server.url, installer_path, allow_unverified=True)
+    with open(installer_path, 'rb') as f:
+        assert f.read() == INSTALLER
@@ -0,0 +1,145 @@
+import os
+import shutil
+import time
+
+import storage
+from conftest import get_fixture_path
+from watch import PollingMonitor, ReportWatcher, ingest_report
+
+SETTLE_TIME = 0.3
+POLL_INTERVAL = 0.05
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def wait_quiet(watcher):
+    # Long enough for any pending change to settle and be submitted, then for its ingestion to finish
+    time.sleep(SETTLE_TIME + 4 * POLL_INTERVAL + 0.2)
+    watcher.wait()
+
+
+def record_paths(ingested):
+    return lambda path, data_dir: ingested.append(path)
+
+
+def start_watcher(directory, ingest):
+    watcher = ReportWatcher(str(directory), ingest=ingest, settle_time=SETTLE_TIME,
+                            monitor=PollingMonitor(interval=POLL_INTERVAL))
+    watcher.start()
+    return watcher
+
+
+def test_report_ingested_once_settled(tmp_path):
+    ingested = []
+    watcher = start_watcher(tmp_path, record_paths(ingested))
+    try:
+        report_path = tmp_path / 'battery-report.html'
+        # Written in pieces, each sooner than the settle time: nothing is ingested while the file keeps changing
+        with open(report_path, 'w', encoding='utf-8') as f:
+            for piece in range(5):
+                f.write(f'<p>piece {piece}</p>\n')
+                f.flush()
+                time.sleep(SETTLE_TIME / 3)
+                assert ingested == []
+        assert wait_for(lambda: len(ingested) == 1)
+        wait_quiet(watcher)
+        assert ingested == [str(report_path)]
+
+        # A new modification time with the same content is not ingested again
+        mtime = os.stat(report_path).st_mtime_ns
+        os.utime(report_path, ns=(mtime, mtime + 10 ** 9))
+        wait_quiet(watcher)
+        assert len(ingested) == 1
+
+        # New content is
+        with open(report_path, 'a', encoding='utf-8') as f:
+            f.write('<p>appended</p>\n')
+        assert wait_for(lambda: len(ingested) == 2)
+
+        # Files that do not match the pattern are ignored
+        (tmp_path / 'notes.html').write_text('<p>notes</p>')
+        wait_quiet(watcher)
+        assert len(ingested) == 2
+    finally:
+        watcher.stop()
+
+
+def test_failed_ingest_does_not_stop_watcher(tmp_path, capsys):
+    ingested = []
+
+    def ingest(path, data_dir):
+        if not ingested:
+            ingested.append(None)
+            raise RuntimeError('malformed report')
+        ingested.append(path)
+
+    watcher = start_watcher(tmp_path, ingest)
+    try:
+        report_path = tmp_path / 'battery-report.html'
+        report_path.write_text('<p>first</p>')
+        assert wait_for(lambda: len(ingested) == 1)
+        wait_quiet(watcher)
+        output = capsys.readouterr()
+        assert 'malformed report' in output.out
+        assert 'Traceback' in output.err
+
+        # The report is ingested once it is fixed
+        report_path.write_text('<p>second</p>')
+        assert wait_for(lambda: len(ingested) == 2)
+        assert ingested[1] == str(report_path)
+    finally:
+        watcher.stop()
+
+
+def test_ingest_report(data_dir, tmp_path, monkeypatch):
+    work_dir = tmp_path / 'work'
+    work_dir.mkdir()
+    monkeypatch.chdir(work_dir)
+    report_path = tmp_path / 'battery-report.html'
+    shutil.copy(get_fixture_path('battery-report.html'), report_path)
+
+    ingest_report(str(report_path))
+    assert (data_dir / 'battery-capacity-history.json').exists()
+    assert os.listdir(data_dir / 'archive' / 'snapshots')
+    # Nothing is written to the working directory
+    assert os.listdir(work_dir) == []
+
+
+def test_reports_of_a_directory_get_their_own_data_dir(data_dir, tmp_path):
+    drop_dir = tmp_path / 'drop'
+    drop_dir.mkdir()
+    for name in ['battery-report-laptop.html', 'battery-report-desktop.html']:
+        shutil.copy(get_fixture_path('battery-report.html'), drop_dir / name)
+
+    watcher = start_watcher(drop_dir, ingest_report)
+    try:
+        assert wait_for(lambda: len(watcher.ingested) == 2, timeout=30)
+    finally:
+        watcher.stop()
+
+    for name in ['battery-report-laptop', 'battery-report-desktop']:
+        assert (data_dir / name / 'battery-capacity-history.json').exists()
+        assert os.listdir(data_dir / name / 'archive' / 'snapshots')
+    # Nothing is written to the data directory itself, and it is still the one in use
+    assert sorted(os.listdir(data_dir)) == ['battery-report-desktop', 'battery-report-laptop']
+    assert storage.get_data_dir() == str(data_dir)
+
+
+def test_watched_report_is_ingested_into_the_data_dir(tmp_path):
+    report_path = tmp_path / 'battery-report.html'
+    report_path.write_text('<p>report</p>')
+    ingested = []
+    watcher = ReportWatcher(str(report_path), ingest=lambda path, data_dir: ingested.append(data_dir),
+                            settle_time=0, monitor=PollingMonitor(interval=POLL_INTERVAL))
+    watcher.notify(str(report_path), now=0)
+    watcher.process_pending(now=1)
+    watcher.wait()
+    watcher.stop()
+    assert ingested == [None]
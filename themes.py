@@ -0,0 +1,178 @@
+from pathlib import Path
+
+from PyQt6.QtCharts import QAbstractBarSeries, QLineSeries
+from PyQt6.QtGui import QBrush, QColor, QPalette, QPen
+
+# Everything a theme changes: the application palette, its stylesheet and the colours of the charts. Each theme is
+# built once, on first use, and cached, so switching back and forth neither rebuilds the palette nor reads the
+# stylesheet from disk again; the charts are restyled in place.
+STYLESHEETS_DIR = Path(__file__).parent / 'stylesheets'
+
+THEMES = {
+    'light': {
+        'palette': {
+            # Base colors
+            'Window': (255, 255, 255),
+            'WindowText': (0, 0, 0),
+            'Base': (255, 255, 255),
+            'AlternateBase': (240, 240, 240),
+            'ToolTipBase': (255, 255, 255),
+            'ToolTipText': (0, 0, 0),
+            'Text': (0, 0, 0),
+            'Button': (240, 240, 240),
+            'ButtonText': (0, 0, 0),
+            'BrightText': (255, 0, 0),
+            # Highlight colors
+            'Highlight': (0, 120, 215),
+            'Accent': (0, 120, 215),
+            'HighlightedText': (255, 255, 255),
+            # Menubar colors
+            'Light': (255, 255, 255),
+            'Midlight': (240, 240, 240),
+            'Dark': (200, 200, 200),
+            'Mid': (180, 180, 180),
+            'Shadow': (160, 160, 160),
+        },
+        'stylesheet': 'light_stylesheet.css',
+        'chart': {
+            'background': '#f0f0f0',
+            'text': '#000000',
+            'grid': '#d0d0d0',
+            'series': ['#0078d7', '#f39c12', '#27ae60', '#8e44ad'],
+        },
+    },
+    'accent': {
+        'palette': {
+            # Base colors
+            'Window': (245, 245, 245),  # Light gray background
+            'WindowText': (30, 30, 30),  # Dark text
+            'Base': (255, 255, 255),  # White for input fields
+            'AlternateBase': (240, 240, 240),  # Slightly darker for alternate rows
+            'ToolTipBase': (255, 255, 255),
+            'ToolTipText': (30, 30, 30),
+            'Text': (30, 30, 30),
+            'Button': (240, 240, 240),
+            'ButtonText': (30, 30, 30),
+            'BrightText': (255, 0, 0),  # Red for bright text
+            # Highlight colors
+            'Highlight': (0, 122, 204),  # Accent color for highlights
+            'Accent': (0, 122, 204),  # Accent color for focus
+            'HighlightedText': (255, 255, 255),  # White text on highlight
+            # Menubar colors
+            'Light': (255, 255, 255),
+            'Midlight': (240, 240, 240),
+            'Dark': (200, 200, 200),
+            'Mid': (180, 180, 180),
+            'Shadow': (160, 160, 160),
+        },
+        'stylesheet': 'accent_stylesheet.css',
+        'chart': {
+            'background': '#f0f0f0',
+            'text': '#1e1e1e',
+            'grid': '#d0d0d0',
+            'series': ['#0078d7', '#f39c12', '#27ae60', '#6957db'],
+        },
+    },
+    'dark': {
+        'palette': {
+            # Base colors
+            'Window': (53, 53, 53),
+            'WindowText': (255, 255, 255),
+            'Base': (35, 35, 35),
+            'AlternateBase': (53, 53, 53),
+            'ToolTipBase': (53, 53, 53),
+            'ToolTipText': (255, 255, 255),
+            'Text': (255, 255, 255),
+            'Button': (53, 53, 53),
+            'ButtonText': (255, 255, 255),
+            'BrightText': (255, 0, 0),
+            # Additional colors
+            'Highlight': (42, 130, 218),
+            'HighlightedText': (0, 0, 0),
+        },
+        'stylesheet': 'dark_stylesheet.css',
+        'chart': {
+            'background': '#353535',
+            'text': '#ffffff',
+            'grid': '#505050',
+            'series': ['#2a82da', '#f5b041', '#52be80', '#af7ac5'],
+        },
+    },
+}
+
+
+class Theme:
+    def __init__(self, name):
+        definition = THEMES[name]
+        self.name = name
+
+        self.palette = QPalette()
+        for role, rgb in definition['palette'].items():
+            self.palette.setColor(getattr(QPalette.ColorRole, role), QColor(*rgb))
+
+        stylesheet_path = STYLESHEETS_DIR / definition['stylesheet']
+        try:
+            self.stylesheet = stylesheet_path.read_text()
+        except OSError:
+            print(f"Stylesheet not found: {stylesheet_path}")
+            self.stylesheet = ''
+
+        # Brushes and pens are shared by every chart, rather than created per chart and per axis
+        chart = definition['chart']
+        self.background_brush = QBrush(QColor(chart['background']))
+        self.text_brush = QBrush(QColor(chart['text']))
+        self.text_color = QColor(chart['text'])
+        self.axis_pen = QPen(QColor(chart['text']))
+        self.grid_color = QColor(chart['grid'])
+        self.series_colors = [QColor(color) for color in chart['series']]
+
+    def get_series_color(self, index):
+        return self.series_colors[index % len(self.series_colors)]
+
+
+# Theme name -> Theme, filled on first use
+THEME_CACHE = {}
+
+
+def get_theme(name):
+    theme = THEME_CACHE.get(name)
+    if theme is None:
+        theme = THEME_CACHE[name] = Theme(name)
+    return theme
+
+
+def apply_theme(app, theme):
+    # Palette and stylesheet are applied with the windows' updates suspended, so they are repolished and painted
+    # once for both; the stylesheet is only set when it changes, since setting one repolishes every widget
+    windows = [window for window in app.topLevelWidgets() if window.isVisible() and window.updatesEnabled()]
+    for window in windows:
+        window.setUpdatesEnabled(False)
+    try:
+        app.setPalette(theme.palette)
+        if app.styleSheet() != theme.stylesheet:
+            app.setStyleSheet(theme.stylesheet)
+    finally:
+        for window in windows:
+            window.setUpdatesEnabled(True)
+
+
+def style_chart(chart, theme):
+    # Restyle an existing chart, its axes and its series in place
+    chart.setBackgroundBrush(theme.background_brush)
+    chart.setTitleBrush(theme.text_brush)
+    chart.legend().setLabelColor(theme.text_color)
+    for axis in chart.axes():
+        axis.setLabelsBrush(theme.text_brush)
+        axis.setTitleBrush(theme.text_brush)
+        axis.setLinePen(theme.axis_pen)
+        axis.setGridLineColor(theme.grid_color)
+    index = 0
+    for series in chart.series():
+        if isinstance(series, QLineSeries):
+            series.setColor(theme.get_series_color(index))
+            index += 1
+        elif isinstance(series, QAbstractBarSeries):
+            for bar_set in series.barSets():
+                bar_set.setColor(theme.get_series_color(index))
+                bar_set.setBorderColor(theme.get_series_color(index))
+                index += 1
@@ -0,0 +1,43 @@
+import functools
+import time
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+# Duration of every pipeline stage, exported by metrics.py. The pipeline functions are wrapped with timed_stage,
+# which does nothing when prometheus_client is not installed, so the app never depends on it.
+
+# From a loader on a small report to powercfg on a long history
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+if prometheus_client is not None:
+    STAGE_DURATION = prometheus_client.Histogram('battery_report_stage_duration_seconds',
+                                                 "Duration of each stage of the battery report pipeline", ['stage'],
+                                                 buckets=STAGE_BUCKETS)
+else:
+    STAGE_DURATION = None
+
+
+def observe_stage(stage, seconds):
+    if STAGE_DURATION is not None:
+        STAGE_DURATION.labels(stage).observe(seconds)
+
+
+def timed_stage(function):
+    # Record every call of `function` under its name, e.g. stage="clean_html"
+    stage = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if STAGE_DURATION is None:
+            return function(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            observe_stage(stage, time.perf_counter() - start)
+
+    return wrapper
+
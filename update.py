@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+import urllib3
+
+from storage import atomic_write, get_data_path
+
+# GitHub repository details
+REPO_OWNER = "arnav003"
+REPO_NAME = "Battery-Health-Report-Generator"
+
+# GitHub API URL for releases
+RELEASES_API_URL = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/releases/latest"
+
+# Cached release information and its ETag, so repeated checks cost a 304 (or nothing); kept in the data directory
+UPDATE_CACHE_FILE = "update-check.json"
+
+# Seconds to wait for the GitHub API before giving up
+UPDATE_CHECK_TIMEOUT = 5
+
+# Minimum number of seconds between two background update checks
+UPDATE_CHECK_INTERVAL = 24 * 60 * 60
+
+# Download chunk sizes grow from the minimum to the maximum while the connection keeps up
+MIN_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+MAX_DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+# Target time to read one chunk, in seconds
+DOWNLOAD_CHUNK_TIME = 0.25
+
+# Minimum number of seconds between two progress reports
+DOWNLOAD_PROGRESS_INTERVAL = 0.1
+
+# Number of times an interrupted download is resumed before giving up, and the wait before the first retry, in
+# seconds; the wait doubles after every failed attempt
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_RETRY_DELAY = 1.0
+
+
+class UpdateError(Exception):
+    pass
+
+
+def read_update_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_update_cache(cache_file, cache):
+    try:
+        atomic_write(cache_file, json.dumps(cache).encode('utf-8'))
+    except OSError as e:
+        print("Error saving update cache:", e)
+
+
+def get_release_download(release):
+    latest_version = release["tag_name"]
+    download_url = None
+    digest = None
+    for asset in release['assets']:
+        if asset['name'].endswith('.exe'):
+            download_url = asset['browser_download_url']
+            # GitHub publishes a "sha256:<hex>" digest for every release asset
+            digest = asset.get('digest')
+            break
+    return latest_version, download_url, digest
+
+
+def parse_version(version):
+    parts = []
+    for part in version.lstrip("v").split('.'):
+        digits = ''.join(c for c in part if c.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
+
+
+def is_newer_version(latest_version, current_version):
+    return parse_version(latest_version) > parse_version(current_version)
+
+
+def check_for_updates(api_url=RELEASES_API_URL, cache_file=None, timeout=UPDATE_CHECK_TIMEOUT, min_interval=0):
+    # The data directory can be moved at runtime (storage.set_data_dir), so the path is resolved on every check
+    cache_file = cache_file or get_data_path(UPDATE_CACHE_FILE)
+    cache = read_update_cache(cache_file)
+    release = cache.get('release')
+
+    # Throttle: reuse the cached release if it was checked recently enough
+    if release and time.time() - cache.get('checked_at', 0) < min_interval:
+        return get_release_download(release)
+
+    headers = {'Accept': 'application/vnd.github+json'}
+    if release and cache.get('etag'):
+        headers['If-None-Match'] = cache['etag']
+
+    try:
+        response = requests.get(api_url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and release:
+            # Release information has not changed since the last check
+            pass
+        elif response.status_code == 200:
+            latest_release = response.json()
+            # Only keep what is needed to offer the download
+            release = {
+                'tag_name': latest_release['tag_name'],
+                'assets': [{'name': asset['name'], 'browser_download_url': asset['browser_download_url'],
+                            'digest': asset.get('digest')}
+                           for asset in latest_release['assets']],
+            }
+            cache['etag'] = response.headers.get('ETag')
+        else:
+            print("Failed to fetch release information from GitHub:", response.text)
+            return None, None, None
+    except (requests.RequestException, KeyError, ValueError) as e:
+        print("Error checking for updates:", e)
+        return None, None, None
+
+    cache['release'] = release
+    cache['checked_at'] = time.time()
+    write_update_cache(cache_file, cache)
+
+    return get_release_download(release)
+
+
+def parse_digest(digest):
+    # Accepts "sha256:<hex>" as published by GitHub, or a bare sha256 hex string. A digest that cannot be checked is
+    # rejected here, before anything is downloaded.
+    algorithm, _, value = digest.rpartition(':')
+    algorithm = (algorithm or 'sha256').lower()
+    value = value.strip().lower()
+    # Variable length hashes (shake_*) have no fixed digest to compare with
+    if algorithm not in hashlib.algorithms_available or not hashlib.new(algorithm).digest_size:
+        raise UpdateError(f"Unsupported checksum algorithm: {algorithm}")
+    if not re.fullmatch(r'[0-9a-f]+', value) or len(value) != hashlib.new(algorithm).digest_size * 2:
+        raise UpdateError(f"Invalid {algorithm} checksum: {value}")
+    return algorithm, value
+
+
+def parse_content_range_total(content_range):
+    # "bytes 100-199/200" -> 200, "bytes 100-199/*" -> 0
+    match = re.match(r'bytes\s+\d+-\d+/(\d+)', content_range or '')
+    return int(match.group(1)) if match else 0
+
+
+def download_update(download_url, installer_path, digest=None, progress_callback=None, cancel_event=None,
+                    timeout=UPDATE_CHECK_TIMEOUT, retries=DOWNLOAD_RETRIES, retry_delay=DOWNLOAD_RETRY_DELAY,
+                    allow_unverified=False):
+    # Data is written to a ".part" file which is kept on failure, so the next attempt resumes where this one stopped.
+    # An installer without a published checksum is refused unless the user explicitly accepted it (allow_unverified).
+    part_path = installer_path + '.part'
+    if cancel_event is None:
+        cancel_event = threading.Event()
+
+    if not digest and not allow_unverified:
+        raise UpdateError("No checksum published for this update, it cannot be verified.")
+    algorithm, expected_hash = parse_digest(digest) if digest else ('sha256', None)
+
+    for attempt in range(retries + 1):
+        try:
+            _download_to_part_file(download_url, part_path, progress_callback, cancel_event, timeout)
+            break
+        except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+            if attempt == retries:
+                raise UpdateError(f"Download failed: {e}") from e
+            delay = retry_delay * 2 ** attempt
+            print(f"Download interrupted ({e}), resuming in {delay:.0f} s...")
+            # Cancelling stops the wait as well as the download
+            if cancel_event.wait(delay):
+                raise UpdateError("Download cancelled.")
+
+    # Verify the downloaded file before it is handed off
+    if expected_hash:
+        file_hash = hashlib.new(algorithm)
+        with open(part_path, 'rb') as f:
+            for block in iter(lambda: f.read(MAX_DOWNLOAD_CHUNK_SIZE), b''):
+                file_hash.update(block)
+        if file_hash.hexdigest() != expected_hash:
+            os.remove(part_path)
+            raise UpdateError("Downloaded update does not match the published checksum.")
+    else:
+        print("No checksum published for this update, installing it unverified as requested.")
+
+    os.replace(part_path, installer_path)
+    return installer_path
+
+
+def _download_to_part_file(download_url, part_path, progress_callback, cancel_event, timeout):
+    downloaded_size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {'Range': f'bytes={downloaded_size}-'} if downloaded_size else {}
+
+    with requests.get(download_url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 416 and downloaded_size:
+            # The previous attempt already received the whole file
+            if progress_callback:
+                progress_callback(downloaded_size, downloaded_size)
+            return
+        if response.status_code == 206:
+            total_size = parse_content_range_total(response.headers.get('Content-Range'))
+            mode = 'ab'
+        elif response.status_code == 200:
+            # Server ignored the range request, start over
+            downloaded_size = 0
+            total_size = int(response.headers.get('content-length') or 0)
+            mode = 'wb'
+        else:
+            raise UpdateError(f"Unexpected response while downloading update: {response.status_code}")
+
+        chunk_size = MIN_DOWNLOAD_CHUNK_SIZE
+        last_progress = 0
+        with open(part_path, mode) as f:
+            while True:
+                if cancel_event.is_set():
+                    raise UpdateError("Download cancelled.")
+
+                start = time.perf_counter()
+                chunk = response.raw.read(chunk_size, decode_content=True)
+                if not chunk:
+                    break
+                f.write(chunk)
+                downloaded_size += len(chunk)
+
+                # Grow or shrink the chunk size so each read takes about DOWNLOAD_CHUNK_TIME
+                elapsed = time.perf_counter() - start
+                if elapsed < DOWNLOAD_CHUNK_TIME / 2:
+                    chunk_size = min(chunk_size * 2, MAX_DOWNLOAD_CHUNK_SIZE)
+                elif elapsed > DOWNLOAD_CHUNK_TIME * 2:
+                    chunk_size = max(chunk_size // 2, MIN_DOWNLOAD_CHUNK_SIZE)
+
+                now = time.monotonic()
+                if progress_callback and now - last_progress >= DOWNLOAD_PROGRESS_INTERVAL:
+                    last_progress = now
+                    progress_callback(downloaded_size, total_size)
+
+        if total_size and downloaded_size < total_size:
+            raise requests.ConnectionError(f"Connection closed after {downloaded_size} of {total_size} bytes")
+
+    if progress_callback:
+        progress_callback(downloaded_size, total_size or downloaded_size)
+
+
+if __name__ == "__main__":
+    print(check_for_updates())
@@ -0,0 +1,298 @@
+import argparse
+import concurrent.futures
+import fnmatch
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import traceback
+
+from anomaly import detect_anomalies, format_event
+from archive import archive_snapshot
+from clean import clean_html
+from extract import extract_data
+from storage import get_data_dir, set_data_dir
+
+# Reports picked up in a drop directory: battery-report.html, battery-report-laptop.html, ... A drop directory
+# usually collects the reports of several machines, so every report file gets a data directory of its own, named
+# after it, inside the data directory (data/battery-report-laptop/). A single watched report is ingested into the
+# data directory itself, like a refresh.
+REPORT_PATTERN = 'battery-report*.html'
+
+# A report is ingested once its size and modification time have not changed for this long, so a report that is
+# still being written (powercfg, a copy, a sync client) is never read half-finished
+SETTLE_TIME = 2.0
+
+# How often the directory is scanned when file system notifications are not available
+POLL_INTERVAL = 1.0
+
+# watchdog event types that can mean a report was written
+WRITE_EVENTS = ('created', 'modified', 'moved', 'closed')
+
+
+def get_file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def get_file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_report_data_dir(report_path):
+    # battery-report-laptop.html -> <data dir>/battery-report-laptop
+    return os.path.join(get_data_dir(), os.path.splitext(os.path.basename(report_path))[0])
+
+
+def ingest_report(report_path, data_dir=None):
+    # Same pipeline as a refresh: clean -> extract to the data directory (data_dir when given) -> archive, then
+    # check the new rows for abnormal drain. The cleaned copy is written to a temporary directory, never next to the
+    # process's working directory. Reports are ingested one at a time, so the data directory is switched for the
+    # duration of the pipeline.
+    previous_data_dir = get_data_dir()
+    if data_dir is not None:
+        set_data_dir(data_dir)
+    try:
+        os.makedirs(get_data_dir(), exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix='battery-report-') as temp_dir:
+            cleaned_path = os.path.join(temp_dir, 'cleaned_' + os.path.basename(report_path))
+            clean_html(report_path, cleaned_path)
+            # clean_html only prints when the report is gone
+            if not os.path.exists(cleaned_path):
+                raise FileNotFoundError(f"Report '{report_path}' could not be cleaned")
+            extract_data(cleaned_path)
+        archive_snapshot()
+        for event in detect_anomalies():
+            print("Anomaly:", format_event(event))
+    finally:
+        set_data_dir(previous_data_dir)
+
+
+class PollingMonitor:
+    # Compares the size and modification time of the matching files every `interval` seconds
+    name = 'polling'
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self, watcher):
+        signatures = {}
+
+        def poll():
+            while not self.stop_event.is_set():
+                for path in watcher.list_reports():
+                    signature = get_file_signature(path)
+                    if signature is not None and signatures.get(path) != signature:
+                        signatures[path] = signature
+                        watcher.notify(path)
+                self.stop_event.wait(self.interval)
+
+        self.thread = threading.Thread(target=poll, name='report-poll', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+class WatchdogMonitor:
+    # inotify, FSEvents or ReadDirectoryChangesW through the watchdog package
+    name = 'watchdog'
+
+    def __init__(self, interval=POLL_INTERVAL):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+        self._observer_class = Observer
+        self._handler_class = FileSystemEventHandler
+        self.observer = None
+
+    def start(self, watcher):
+        class ReportEventHandler(self._handler_class):
+            def on_any_event(self, event):
+                # Only writes: "opened" and "closed_no_write" are also raised when the report is read for ingestion
+                if event.is_directory or event.event_type not in WRITE_EVENTS:
+                    return
+                # A report saved through a temporary file arrives as a move to its final name
+                for path in (event.src_path, getattr(event, 'dest_path', '')):
+                    if path and watcher.matches(path):
+                        watcher.notify(path)
+
+        self.observer = self._observer_class()
+        self.observer.schedule(ReportEventHandler(), watcher.directory, recursive=False)
+        self.observer.start()
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+
+
+MONITORS = {
+    'watchdog': WatchdogMonitor,
+    'polling': PollingMonitor,
+}
+
+
+def get_monitor(name=None, interval=POLL_INTERVAL):
+    if name is not None:
+        return MONITORS[name](interval)
+
+    # File system notifications when watchdog is installed, polling otherwise
+    for monitor_class in MONITORS.values():
+        try:
+            return monitor_class(interval)
+        except ImportError:
+            continue
+
+
+class ReportWatcher:
+    # Watches a report file, or a directory for files matching REPORT_PATTERN, and ingests every new or changed
+    # report once it has settled, into its own data directory when watching a directory. Ingestion runs on a single
+    # background worker, one report at a time. ingest(path, data_dir) is called with data_dir None for the data
+    # directory itself.
+
+    def __init__(self, target, ingest=ingest_report, settle_time=SETTLE_TIME, monitor=None):
+        target = os.path.abspath(target)
+        if os.path.isdir(target):
+            self.directory = target
+            self.pattern = REPORT_PATTERN
+            self.get_data_dir = get_report_data_dir
+        else:
+            self.directory = os.path.dirname(target)
+            self.pattern = os.path.basename(target)
+            self.get_data_dir = lambda path: None
+        self.ingest = ingest
+        self.settle_time = settle_time
+        self.monitor = monitor if monitor is not None else get_monitor()
+
+        # Path -> (signature, time the signature was last seen changing) of reports waiting to settle
+        self.pending = {}
+        # Path -> SHA-256 of the last ingested content, so touching a report does not ingest it again
+        self.ingested = {}
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-ingest')
+        self.futures = []
+        self.scheduler = None
+        self.stop_event = threading.Event()
+
+    def matches(self, path):
+        path = os.path.abspath(path)
+        return os.path.dirname(path) == self.directory and fnmatch.fnmatch(os.path.basename(path), self.pattern)
+
+    def list_reports(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(names) if fnmatch.fnmatch(name, self.pattern)]
+
+    def notify(self, path, now=None):
+        # Called by the monitors for every change; restarts the settle time of the report
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.pending[os.path.abspath(path)] = (get_file_signature(path), now)
+
+    def scan(self, now=None):
+        for path in self.list_reports():
+            self.notify(path, now)
+
+    def process_pending(self, now=None):
+        # Submit the reports that have settled; returns their paths
+        now = time.monotonic() if now is None else now
+        ready = []
+        with self.lock:
+            for path, (signature, changed_at) in list(self.pending.items()):
+                current = get_file_signature(path)
+                if current is None:
+                    # Deleted (or renamed away) before it settled
+                    del self.pending[path]
+                elif current != signature:
+                    self.pending[path] = (current, now)
+                elif now - changed_at >= self.settle_time:
+                    del self.pending[path]
+                    ready.append(path)
+
+        for path in ready:
+            self.futures.append(self.executor.submit(self.run_ingest, path))
+        self.futures = [future for future in self.futures if not future.done()]
+        return ready
+
+    def run_ingest(self, path):
+        try:
+            digest = get_file_digest(path)
+            if self.ingested.get(path) == digest:
+                print(f"Report '{path}' unchanged, skipping")
+                return False
+            data_dir = self.get_data_dir(path)
+            print(f"Ingesting report '{path}'" + (f" into '{data_dir}'" if data_dir else ''))
+            self.ingest(path, data_dir)
+            self.ingested[path] = digest
+            return True
+        except Exception as e:
+            # The watcher runs unattended: any error of the pipeline is logged, with its traceback, and the next
+            # report is still ingested. The report is retried when it changes again.
+            print(f"Error ingesting report '{path}':", e)
+            traceback.print_exc()
+            return False
+
+    def wait(self):
+        # Block until every submitted ingestion has finished
+        concurrent.futures.wait(list(self.futures))
+
+    def start(self):
+        print(f"Watching {os.path.join(self.directory, self.pattern)} ({self.monitor.name})")
+        self.monitor.start(self)
+        # Reports already present are ingested too, so data/ reflects the latest one
+        self.scan()
+
+        def schedule():
+            tick = min(self.settle_time / 4, POLL_INTERVAL) or POLL_INTERVAL
+            while not self.stop_event.wait(tick):
+                self.process_pending()
+
+        self.scheduler = threading.Thread(target=schedule, name='report-scheduler', daemon=True)
+        self.scheduler.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.monitor.stop()
+        if self.scheduler is not None:
+            self.scheduler.join()
+        self.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest new or changed battery reports as they appear")
+    parser.add_argument('target', nargs='?', default='.',
+                        help=f"report file, or directory to watch for {REPORT_PATTERN} (default: current directory)")
+    parser.add_argument('--settle', type=float, default=SETTLE_TIME,
+                        help="seconds a report must stay unchanged before it is ingested")
+    parser.add_argument('--monitor', choices=list(MONITORS),
+                        help="change detection (default: watchdog when installed, polling otherwise)")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="polling interval in seconds")
+    parser.add_argument('--data', help="data directory; each report of a watched directory gets its own inside it")
+    args = parser.parse_args()
+
+    if args.data:
+        set_data_dir(args.data)
+
+    watcher = ReportWatcher(args.target, settle_time=args.settle, monitor=get_monitor(args.monitor, args.interval))
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping")
+    finally:
+        watcher.stop()